@@ -4,12 +4,50 @@ Analyzes user queries to determine intent and route to appropriate handlers.
 """
 import os
 from typing import Dict, Any
-from openai import AzureOpenAI
+
+from backend.services.openai_service import get_openai_client
+from backend.services.classification_cache import classification_cache
+from backend.services.executor import run_blocking_io
+from backend.services.single_flight import coalesce
+from backend.services.metrics import span
+from backend.agents.fast_classifier import fast_classify, FAST_CLASSIFIER_THRESHOLD
 
 
 def classify_intent(query: str) -> Dict[str, Any]:
     """
-    Classify user query intent using Azure OpenAI.
+    Classify user query intent, trying the cache and the local fast-path
+    classifier before Azure OpenAI.
+    
+    Args:
+        query: User's input text
+        
+    Returns:
+        Dictionary with intent classification and confidence score
+    """
+    # Repeat or near-duplicate questions skip the LLM round trip
+    cached = classification_cache.get(query)
+    if cached is not None:
+        return cached
+
+    # Routine questions the local classifier is sure about skip the LLM too
+    local = fast_classify(query)
+    if local["confidence"] >= FAST_CLASSIFIER_THRESHOLD:
+        return local
+
+    return classify_intent_with_llm(query)
+
+
+async def classify_intent_async(query: str) -> Dict[str, Any]:
+    """
+    classify_intent on the upstream pool; concurrent identical queries share
+    one classification.
+    """
+    return await coalesce("classify_intent", (query,), lambda: run_blocking_io(classify_intent, query))
+
+
+def classify_intent_with_llm(query: str) -> Dict[str, Any]:
+    """
+    Classify user query intent with an Azure OpenAI call (no local shortcuts).
     
     Args:
         query: User's input text
@@ -18,11 +56,8 @@ def classify_intent(query: str) -> Dict[str, Any]:
         Dictionary with intent classification and confidence score
     """
     try:
-        client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_KEY"),
-            api_version="2024-02-15-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        # Shared client: reuses pooled keep-alive connections across requests
+        client = get_openai_client()
         
         system_prompt = """You are a classification agent for immigration compliance queries.
 Classify the user's intent into one of these categories:
@@ -36,24 +71,27 @@ Classify the user's intent into one of these categories:
 Respond in JSON format: {"intent": "category", "confidence": 0.0-1.0, "reasoning": "brief explanation"}
 """
         
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": query}
-            ],
-            temperature=0.3,
-            max_tokens=150
-        )
+        with span("upstream_call", service="openai", operation="classify"):
+            response = client.chat.completions.create(
+                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ],
+                temperature=0.3,
+                max_tokens=150
+            )
         
         import json
         result = json.loads(response.choices[0].message.content)
         
-        return {
+        classification = {
             "intent": result.get("intent", "general_inquiry"),
             "confidence": result.get("confidence", 0.5),
             "reasoning": result.get("reasoning", "")
         }
+        classification_cache.put(query, classification)
+        return classification
         
     except Exception as e:
         # Fallback classification
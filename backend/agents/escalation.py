@@ -1,11 +1,131 @@
 """
 Escalation Agent - Human Handoff Logic
 Determines when queries require human expert intervention.
+
+Conflict terms and the keyword sets in data/escalation_patterns.json are
+compiled into one phrase automaton, so each document and the user text is
+scanned once, in time linear in its length.
 """
-from typing import Dict, Any, List
+import os
+import json
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Set
+
+from backend.services.pattern_matcher import PhraseMatcher
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ESCALATION_PATTERNS_PATH = os.path.join(BACKEND_DIR, "data", "escalation_patterns.json")
+
+# Distinct keywords of one pattern the user text must contain to trigger it;
+# single generic words such as "name" or "passport" are not enough on their own
+ESCALATION_PATTERN_MIN_HITS = int(os.getenv("ESCALATION_PATTERN_MIN_HITS", "2"))
+
+# Contradictory keywords across documents
+CONFLICTING_PAIRS = [("eligible", "ineligible"), ("approved", "denied"), ("yes", "no")]
+
+
+class EscalationEngine:
+    """Single-pass scanner for conflict terms and escalation pattern keywords."""
+
+    def __init__(self, patterns: List[Dict[str, Any]], conflicting_pairs=CONFLICTING_PAIRS,
+                 min_hits: int = ESCALATION_PATTERN_MIN_HITS):
+        self.patterns = {p["pattern_id"]: p for p in patterns}
+        self.conflicting_pairs = list(conflicting_pairs)
+        self.min_hits = min_hits
+        phrases = []
+        for pair_index, pair in enumerate(self.conflicting_pairs):
+            phrases.extend((term, ("conflict", pair_index, side)) for side, term in enumerate(pair))
+        for pattern in patterns:
+            phrases.extend((kw, ("pattern", pattern["pattern_id"], kw)) for kw in pattern.get("keywords", []))
+        self.matcher = PhraseMatcher(phrases)
+
+    def scan(self, text: str) -> Set[tuple]:
+        """Distinct match payloads in text."""
+        return self.matcher.find_payloads(text or "")
+
+    def has_conflicts(self, document_hits: List[Set[tuple]]) -> bool:
+        """
+        True when one document contains a term and a different document its
+        opposite, from per-document scan results.
+        """
+        # (pair, side) -> indexes of documents containing that term
+        holders = defaultdict(set)
+        for doc_index, hits in enumerate(document_hits):
+            for hit in hits:
+                if hit[0] == "conflict":
+                    holders[(hit[1], hit[2])].add(doc_index)
+        for pair_index in range(len(self.conflicting_pairs)):
+            first, second = holders.get((pair_index, 0)), holders.get((pair_index, 1))
+            if first and second and (len(first) > 1 or len(second) > 1 or first != second):
+                return True
+        return False
+
+    def matched_patterns(self, query_hits: Set[tuple], document_hits: List[Set[tuple]],
+                         documents: List[Dict]) -> List[Dict[str, Any]]:
+        """
+        Escalation patterns found in the user text or documents.
+
+        Returns:
+            One entry per pattern with its id, name, risk level, reason, the
+            keywords seen, where they were seen, and whether the pattern
+            triggers escalation (enough distinct keywords in the user text)
+        """
+        keywords = defaultdict(set)
+        sources = defaultdict(list)
+        query_keywords = defaultdict(set)
+        for hit in query_hits:
+            if hit[0] == "pattern":
+                keywords[hit[1]].add(hit[2])
+                query_keywords[hit[1]].add(hit[2])
+        for pattern_id in query_keywords:
+            sources[pattern_id].append("query")
+        for doc, hits in zip(documents, document_hits):
+            seen = set()
+            for hit in hits:
+                if hit[0] == "pattern":
+                    keywords[hit[1]].add(hit[2])
+                    seen.add(hit[1])
+            for pattern_id in seen:
+                sources[pattern_id].append(doc.get("id"))
+
+        matched = []
+        for pattern_id in sorted(keywords):
+            pattern = self.patterns[pattern_id]
+            required = min(self.min_hits, len(pattern.get("keywords", [])))
+            matched.append({
+                "pattern_id": pattern_id,
+                "name": pattern.get("name"),
+                "risk_level": pattern.get("risk_level"),
+                "reason": pattern.get("reason"),
+                "keywords": sorted(keywords[pattern_id]),
+                "sources": sources[pattern_id],
+                "triggered": len(query_keywords.get(pattern_id, ())) >= required
+            })
+        return matched
 
 
-def check_escalation(intent: str, documents: List[Dict], confidence: float = 0.5) -> Dict[str, Any]:
+def _load_patterns() -> List[Dict[str, Any]]:
+    try:
+        with open(ESCALATION_PATTERNS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("escalation_patterns", [])
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not load escalation patterns: {e}")
+        return []
+
+
+_engine: Optional[EscalationEngine] = None
+
+
+def get_escalation_engine() -> EscalationEngine:
+    """Shared engine, compiled on first use."""
+    global _engine
+    if _engine is None:
+        _engine = EscalationEngine(_load_patterns())
+    return _engine
+
+
+def check_escalation(intent: str, documents: List[Dict], confidence: float = 0.5,
+                     query: Optional[str] = None) -> Dict[str, Any]:
     """
     Determine if query requires human escalation.
     
@@ -13,16 +133,22 @@ def check_escalation(intent: str, documents: List[Dict], confidence: float = 0.5
         intent: Classified intent
         documents: Retrieved documents
         confidence: Classification confidence score
+        query: Optional user text, scanned for escalation patterns
         
     Returns:
-        Escalation decision with reasoning
+        Escalation decision with reasoning and matched escalation patterns
     """
+    engine = get_escalation_engine()
+    document_hits = [engine.scan(doc.get("content") or "") for doc in documents]
+    matched_patterns = engine.matched_patterns(engine.scan(query), document_hits, documents)
+
     escalation_triggers = {
         "low_confidence": confidence < 0.7,
         "no_documents": len(documents) == 0,
         "high_risk_intent": intent in ["document_verification", "escalation_needed"],
-        "conflicting_information": _check_conflicts(documents),
-        "missing_critical_data": not all(doc.get("content") for doc in documents)
+        "conflicting_information": engine.has_conflicts(document_hits),
+        "missing_critical_data": not all(doc.get("content") for doc in documents),
+        "escalation_pattern": any(p["triggered"] for p in matched_patterns)
     }
     
     should_escalate = any(escalation_triggers.values())
@@ -40,32 +166,11 @@ def check_escalation(intent: str, documents: List[Dict], confidence: float = 0.5
         "case_id": case_id,
         "priority": "high" if len(triggered_reasons) > 2 else "medium",
         "triggered_reasons": triggered_reasons,
+        "matched_patterns": matched_patterns,
         "reasoning": _generate_escalation_reasoning(triggered_reasons)
     }
 
 
-def _check_conflicts(documents: List[Dict]) -> bool:
-    """Check if documents contain conflicting information."""
-    # Simplified conflict detection
-    if len(documents) < 2:
-        return False
-    
-    # Check for contradictory keywords
-    conflicting_pairs = [("eligible", "ineligible"), ("approved", "denied"), ("yes", "no")]
-    
-    for doc1 in documents:
-        content1 = doc1.get("content", "").lower()
-        for doc2 in documents:
-            if doc1 == doc2:
-                continue
-            content2 = doc2.get("content", "").lower()
-            for term1, term2 in conflicting_pairs:
-                if term1 in content1 and term2 in content2:
-                    return True
-    
-    return False
-
-
 def _generate_escalation_reasoning(reasons: List[str]) -> str:
     """Generate human-readable escalation reasoning."""
     reason_map = {
@@ -73,7 +178,8 @@ def _generate_escalation_reasoning(reasons: List[str]) -> str:
         "no_documents": "No relevant policy documents were found",
         "high_risk_intent": "This query involves high-stakes compliance decisions",
         "conflicting_information": "Retrieved documents contain conflicting information",
-        "missing_critical_data": "Critical information is missing from available documents"
+        "missing_critical_data": "Critical information is missing from available documents",
+        "escalation_pattern": "The query matches a known high-risk escalation pattern"
     }
     
     explanations = [reason_map.get(r, r) for r in reasons]
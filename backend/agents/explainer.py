@@ -3,8 +3,12 @@ Explainer Agent - Reasoning Generation
 Generates human-readable explanations with citations.
 """
 import os
-from typing import Dict, Any, List
-from openai import AzureOpenAI
+from typing import AsyncIterator, Dict, Any, List
+
+from backend.services.openai_service import get_openai_client, get_async_openai_client
+from backend.services.executor import run_blocking_io
+from backend.services.single_flight import coalesce
+from backend.services.metrics import span
 
 
 def explain_steps(intent: str, documents: List[Dict], validation: Dict, escalation: Dict) -> str:
@@ -21,20 +25,78 @@ def explain_steps(intent: str, documents: List[Dict], validation: Dict, escalati
         Human-readable explanation with citations
     """
     try:
-        client = AzureOpenAI(
-            api_key=os.getenv("AZURE_OPENAI_KEY"),
-            api_version="2024-02-15-preview",
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-        )
+        # Shared client: reuses pooled keep-alive connections across requests
+        client = get_openai_client()
         
-        # Build context from documents
-        context_parts = []
-        for doc in documents[:3]:  # Top 3 documents
-            context_parts.append(f"[{doc.get('source', 'Unknown')}]: {doc.get('content', '')[:500]}")
+        with span("upstream_call", service="openai", operation="explain"):
+            response = client.chat.completions.create(
+                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
+                messages=[{"role": "system", "content": _build_system_prompt(intent, documents, validation, escalation)}],
+                temperature=0.4,
+                max_tokens=800
+            )
         
-        context = "\n\n".join(context_parts)
+        return response.choices[0].message.content
         
-        system_prompt = f"""You are an explainer agent for immigration compliance.
+    except Exception as e:
+        return _fallback_explanation(intent, documents, escalation)
+
+
+async def explain_steps_async(intent: str, documents: List[Dict], validation: Dict, escalation: Dict) -> str:
+    """
+    explain_steps on the upstream pool; concurrent requests with identical
+    inputs share one generation.
+    """
+    return await coalesce(
+        "explain_steps", (intent, documents, validation, escalation),
+        lambda: run_blocking_io(explain_steps, intent, documents, validation, escalation)
+    )
+
+
+async def stream_explanation(intent: str, documents: List[Dict], validation: Dict,
+                             escalation: Dict) -> AsyncIterator[str]:
+    """
+    Streaming variant of explain_steps: yields explanation text as the model
+    generates it. Falls back to the static explanation if the call fails
+    before any text was produced.
+    """
+    produced = False
+    try:
+        client = get_async_openai_client()
+        # Time to the first streamed chunk (response headers)
+        with span("upstream_call", service="openai", operation="explain_stream"):
+            stream = await client.chat.completions.create(
+                model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
+                messages=[{"role": "system", "content": _build_system_prompt(intent, documents, validation, escalation)}],
+                temperature=0.4,
+                max_tokens=800,
+                stream=True
+            )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            content = chunk.choices[0].delta.content
+            if content:
+                produced = True
+                yield content
+
+    except Exception as e:
+        if produced:
+            raise
+        if not isinstance(escalation, dict):
+            escalation = {"should_escalate": bool(escalation)}
+        yield _fallback_explanation(intent, documents, escalation)
+
+
+def _build_system_prompt(intent: str, documents: List[Dict], validation: Dict, escalation: Dict) -> str:
+    # Build context from documents
+    context_parts = []
+    for doc in documents[:3]:  # Top 3 documents
+        context_parts.append(f"[{doc.get('source', 'Unknown')}]: {doc.get('content', '')[:500]}")
+    
+    context = "\n\n".join(context_parts)
+    
+    return f"""You are an explainer agent for immigration compliance.
 Generate a clear, structured explanation based on the following:
 
 Intent: {intent}
@@ -51,18 +113,6 @@ Provide:
 
 Format with clear headers and bullet points.
 """
-        
-        response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
-            messages=[{"role": "system", "content": system_prompt}],
-            temperature=0.4,
-            max_tokens=800
-        )
-        
-        return response.choices[0].message.content
-        
-    except Exception as e:
-        return _fallback_explanation(intent, documents, escalation)
 
 
 def _fallback_explanation(intent: str, documents: List[Dict], escalation: Dict) -> str:
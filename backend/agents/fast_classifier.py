@@ -0,0 +1,138 @@
+"""
+Fast Classifier - Local Intent Recognition
+Cheap in-process TF-IDF keyword classifier that answers routine queries
+without an LLM call. Its vocabulary comes from the category descriptions and
+examples in prompts/classifier_prompt.txt and the escalation keyword sets in
+data/escalation_patterns.json.
+"""
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List
+
+from backend.services.classification_cache import normalize_query
+
+FAST_CLASSIFIER_THRESHOLD = float(os.getenv("FAST_CLASSIFIER_THRESHOLD", "0.65"))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT_PATH = os.path.join(BACKEND_DIR, "prompts", "classifier_prompt.txt")
+ESCALATION_PATTERNS_PATH = os.path.join(BACKEND_DIR, "data", "escalation_patterns.json")
+
+# Smoothing mass added to the score total when computing confidence, so a
+# single weak keyword hit cannot produce a confident label
+CONFIDENCE_PRIOR = 2.0
+
+# Supplementary phrasing seen in ISO traffic, added to the prompt vocabulary
+SEED_KEYWORDS = {
+    "eligibility_question": ["eligible", "eligibility", "qualify", "requirements", "can apply", "allowed",
+                             "apply", "work on campus", "opt", "cpt", "graduated", "full-time"],
+    "document_verification": ["verify", "verification", "validate", "valid", "check", "review", "i-20",
+                              "transcript", "document", "documents", "correct"],
+    "policy_interpretation": ["policy", "regulation", "regulations", "rule", "rules", "interpret", "mean",
+                              "means", "cfr", "clarify", "grace period"],
+    "deadline_inquiry": ["deadline", "deadlines", "due", "how long", "timeline", "processing time", "date",
+                         "by when", "how many days", "how soon", "last day"],
+    "escalation_needed": ["denied", "appeal", "mismatch", "different name", "wrong name", "terminated",
+                          "lawyer", "attorney", "status violation", "out of status"],
+    "general_inquiry": ["office hours", "contact", "email", "phone", "where", "located", "who", "thank"],
+}
+
+_CATEGORY_LINE = re.compile(r"^-\s*([a-z_]+):\s*(.+)$")
+_EXAMPLE_LINE = re.compile(r'^-\s*"(.+)"\s*→\s*([a-z_]+)')
+
+
+def _terms(text: str) -> List[str]:
+    """Unigrams and bigrams of the normalized text, with a light plural fold."""
+    tokens = [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+              for t in normalize_query(text).split()]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def _load_category_documents() -> Dict[str, List[str]]:
+    """Collect training text per category from the prompt, patterns and seeds."""
+    documents: Dict[str, List[str]] = defaultdict(list)
+
+    with open(PROMPT_PATH, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            category = _CATEGORY_LINE.match(line)
+            if category:
+                documents[category.group(1)].append(category.group(2))
+                continue
+            example = _EXAMPLE_LINE.match(line)
+            if example:
+                documents[example.group(2)].append(example.group(1))
+
+    try:
+        with open(ESCALATION_PATTERNS_PATH, "r", encoding="utf-8") as f:
+            patterns = json.load(f).get("escalation_patterns", [])
+        for pattern in patterns:
+            documents["escalation_needed"].extend(pattern.get("keywords", []))
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not load escalation patterns: {e}")
+
+    for category, keywords in SEED_KEYWORDS.items():
+        documents[category].extend(keywords)
+
+    return documents
+
+
+class FastClassifier:
+    """TF-IDF weighted keyword scorer over the six intent categories."""
+
+    def __init__(self, documents: Dict[str, List[str]]):
+        term_counts = {c: Counter(t for text in texts for t in _terms(text)) for c, texts in documents.items()}
+        document_frequency = Counter(t for counts in term_counts.values() for t in counts)
+        total = len(term_counts)
+
+        # term -> [(category, weight)]; idf down-weights terms shared across categories
+        self.weights: Dict[str, List[tuple]] = defaultdict(list)
+        for category, counts in term_counts.items():
+            for term, count in counts.items():
+                idf = math.log((1 + total) / (1 + document_frequency[term])) + 1
+                # Bigrams are more specific than single words
+                boost = 1.5 if " " in term else 1.0
+                self.weights[term].append((category, (1 + math.log(count)) * idf * boost))
+
+    def classify(self, query: str) -> Dict[str, Any]:
+        """
+        Score query against every category.
+
+        Args:
+            query: User's input text
+
+        Returns:
+            Dictionary with intent, confidence (0-1) and matched terms as reasoning
+        """
+        scores: Dict[str, float] = defaultdict(float)
+        matched: Dict[str, List[str]] = defaultdict(list)
+        for term in set(_terms(query)):
+            for category, weight in self.weights.get(term, ()):
+                scores[category] += weight
+                matched[category].append(term)
+
+        if not scores:
+            return {"intent": "general_inquiry", "confidence": 0.0, "reasoning": "Local classifier: no known terms"}
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        intent, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        confidence = best / (best + runner_up + CONFIDENCE_PRIOR)
+        return {
+            "intent": intent,
+            "confidence": round(confidence, 3),
+            "reasoning": f"Local classifier matched: {', '.join(sorted(matched[intent]))}"
+        }
+
+
+_classifier = None
+
+
+def fast_classify(query: str) -> Dict[str, Any]:
+    """Classify query with the shared local classifier (built on first use)."""
+    global _classifier
+    if _classifier is None:
+        _classifier = FastClassifier(_load_category_documents())
+    return _classifier.classify(query)
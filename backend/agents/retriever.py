@@ -1,12 +1,63 @@
 """
 Retrieval Agent - Document Search
-Performs hybrid search across knowledge base using Azure Cognitive Search.
+Performs hybrid search across knowledge base using Azure Cognitive Search,
+with an in-process BM25 index over the policy corpus as the local tier.
+Several queries for one request (user text, intent, upload key phrases) are
+searched concurrently and merged with reciprocal rank fusion.
 """
 import os
-from typing import List, Dict, Any
-from azure.search.documents import SearchClient
+import time
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Optional
+from azure.search.documents.indexes import SearchIndexClient
+from azure.search.documents.models import VectorizedQuery
 from azure.core.credentials import AzureKeyCredential
 
+from backend.services.retrieval_cache import retrieval_cache, make_retrieval_key
+from backend.services.search_service import search_settings, get_search_client, get_async_search_client
+from backend.services.executor import run_blocking_io
+from backend.services.single_flight import coalesce
+from backend.services.metrics import span
+from backend.services.bm25_index import bm25_search, tokenize
+from backend.services.vector_index import hybrid_search, OpenAIEncoder
+
+# "azure" searches Azure Cognitive Search and falls back to the local index;
+# "local" serves every query from the local BM25 index
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "azure").lower()
+# "hybrid" fuses local vector and BM25 scores; "keyword" uses BM25 only
+LOCAL_RETRIEVAL_MODE = os.getenv("LOCAL_RETRIEVAL_MODE", "hybrid").lower()
+# Vector field of the Azure index; when set, queries are embedded and sent as vector queries too.
+# Query vectors must come from the embedding deployment the index was built
+# with, so its name and dimension are required alongside the field; without
+# them vector queries are disabled and searches are text-only.
+SEARCH_VECTOR_FIELD = os.getenv("SEARCH_VECTOR_FIELD")
+SEARCH_VECTOR_DEPLOYMENT = os.getenv("SEARCH_VECTOR_DEPLOYMENT")
+SEARCH_VECTOR_DIM = int(os.getenv("SEARCH_VECTOR_DIM", "0"))
+
+logger = logging.getLogger(__name__)
+
+if SEARCH_VECTOR_FIELD and not (SEARCH_VECTOR_DEPLOYMENT and SEARCH_VECTOR_DIM > 0):
+    logger.warning(
+        "SEARCH_VECTOR_FIELD is set but SEARCH_VECTOR_DEPLOYMENT and SEARCH_VECTOR_DIM are not; "
+        "vector queries are disabled and Azure searches are text-only"
+    )
+    SEARCH_VECTOR_FIELD = None
+
+SELECT_FIELDS = ["id", "title", "content", "source", "category"]
+
+# Rank offset in reciprocal rank fusion; 60 is the value from the original RRF paper
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Most frequent terms of an uploaded excerpt that form its search query
+KEY_PHRASE_TERMS = int(os.getenv("KEY_PHRASE_TERMS", "8"))
+
+# Indexes whose version the retrieval cache is already tracking
+_registered_indexes = set()
+
+# Encoder for Azure vector queries; created on first use
+_search_encoder: Optional[OpenAIEncoder] = None
+
 
 def retrieve_documents(intent: str, query: str = None, top_k: int = 5) -> List[Dict[str, Any]]:
     """
@@ -21,56 +72,190 @@ def retrieve_documents(intent: str, query: str = None, top_k: int = 5) -> List[D
         List of relevant documents with metadata
     """
     try:
-        search_endpoint = os.getenv("SEARCH_ENDPOINT")
-        search_key = os.getenv("SEARCH_API_KEY")
-        index_name = os.getenv("SEARCH_INDEX", "immigration-policies")
-        
-        if not search_endpoint or not search_key:
-            return _fallback_documents(intent)
-        
-        search_client = SearchClient(
-            endpoint=search_endpoint,
-            index_name=index_name,
-            credential=AzureKeyCredential(search_key)
-        )
-        
+        settings = search_settings()
         search_query = query or intent
+
+        if RETRIEVAL_BACKEND == "local" or settings is None:
+            return _fallback_documents(intent, query, top_k)
+
+        # Searches on intent labels repeat constantly; serve them from cache
+        endpoint, key, index_name = settings
+        _register_index_version(endpoint, key, index_name)
+        cache_key = make_retrieval_key(search_query, intent, top_k, SELECT_FIELDS, index_name)
+        cached = retrieval_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        search_client = get_search_client()
         
         # Hybrid search: vector + keyword
-        results = search_client.search(
-            search_text=search_query,
-            top=top_k,
-            select=["id", "title", "content", "source", "category"],
-            query_type="semantic"
-        )
-        
-        documents = []
-        for result in results:
-            documents.append({
-                "id": result.get("id"),
-                "title": result.get("title"),
-                "content": result.get("content"),
-                "source": result.get("source"),
-                "category": result.get("category"),
-                "score": result.get("@search.score", 0.0)
-            })
+        with span("upstream_call", service="search", operation="query"):
+            results = search_client.search(
+                search_text=search_query,
+                vector_queries=_vector_queries(search_query, top_k),
+                top=top_k,
+                select=SELECT_FIELDS,
+                query_type="semantic"
+            )
+            documents = [_to_document(result) for result in results]
         
+        retrieval_cache.put(cache_key, documents, latency_ms=(time.perf_counter() - started) * 1000)
         return documents
         
     except Exception as e:
-        return _fallback_documents(intent)
-
-
-def _fallback_documents(intent: str) -> List[Dict[str, Any]]:
-    """Fallback documents when search is unavailable."""
-    return [
-        {
-            "id": "doc_f1_001",
-            "title": "F-1 Visa Eligibility Requirements",
-            "content": "F-1 visa applicants must be accepted by a SEVP-certified school...",
-            "source": "8 CFR § 214.2(f)",
-            "category": "eligibility",
-            "score": 0.85
-        }
-    ]
+        logger.warning(f"Azure search failed, falling back to the local index: {type(e).__name__}: {e}")
+        return _fallback_documents(intent, query, top_k)
+
+
+async def retrieve_documents_async(intent: str, query: str = None, top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Async variant of retrieve_documents on the shared async SearchClient,
+    so many searches can be in flight without holding threads. Concurrent
+    identical searches share one call.
+    """
+    return await coalesce(
+        "retrieve_documents", (intent, query, top_k),
+        lambda: _retrieve_documents_async(intent, query, top_k)
+    )
+
+
+async def _retrieve_documents_async(intent: str, query: Optional[str], top_k: int) -> List[Dict[str, Any]]:
+    try:
+        settings = search_settings()
+        search_query = query or intent
+
+        if RETRIEVAL_BACKEND == "local" or settings is None:
+            return _fallback_documents(intent, query, top_k)
+
+        endpoint, key, index_name = settings
+        _register_index_version(endpoint, key, index_name)
+        cache_key = make_retrieval_key(search_query, intent, top_k, SELECT_FIELDS, index_name)
+        # A cache lookup may poll the index version over the network
+        cached = await run_blocking_io(retrieval_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        vector_queries = await run_blocking_io(_vector_queries, search_query, top_k) if SEARCH_VECTOR_FIELD else None
+        with span("upstream_call", service="search", operation="query"):
+            results = await get_async_search_client().search(
+                search_text=search_query,
+                vector_queries=vector_queries,
+                top=top_k,
+                select=SELECT_FIELDS,
+                query_type="semantic"
+            )
+            documents = [_to_document(result) async for result in results]
+
+        retrieval_cache.put(cache_key, documents, latency_ms=(time.perf_counter() - started) * 1000)
+        return documents
+
+    except Exception as e:
+        logger.warning(f"Async Azure search failed, falling back to the local index: {type(e).__name__}: {e}")
+        return _fallback_documents(intent, query, top_k)
+
+
+async def retrieve_multi(queries: Iterable[str], intent: str, top_k: int = 5) -> List[List[Dict[str, Any]]]:
+    """
+    Search several queries concurrently; wall-clock cost is one round trip.
+
+    Returns:
+        One ranked document list per distinct non-empty query, in order
+    """
+    distinct = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+    return list(await asyncio.gather(
+        *(retrieve_documents_async(intent, query=q, top_k=top_k) for q in distinct)
+    ))
+
+
+def reciprocal_rank_fusion(ranked_lists: Iterable[List[Dict[str, Any]]], top_k: int = 5,
+                           k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge ranked lists with reciprocal rank fusion: each document scores
+    sum(1 / (k + rank)) over the lists it appears in. Documents are deduped
+    by id; the copy from the earliest list is kept.
+    """
+    scores: Dict[Any, float] = {}
+    documents: Dict[Any, Dict[str, Any]] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked or [], start=1):
+            doc_id = doc.get("id") or doc.get("title")
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc_id, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [{**documents[doc_id], "score": round(scores[doc_id], 6)} for doc_id in best]
+
+
+def extract_key_phrases(text: str, max_terms: int = KEY_PHRASE_TERMS) -> str:
+    """Search query made of the most frequent content words in text."""
+    counts = Counter(t for t in tokenize(text or "") if len(t) > 2 and not t.isdigit())
+    return " ".join(term for term, _ in counts.most_common(max_terms))
+
+
+def _to_document(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": result.get("id"),
+        "title": result.get("title"),
+        "content": result.get("content"),
+        "source": result.get("source"),
+        "category": result.get("category"),
+        "score": result.get("@search.score", 0.0)
+    }
 
+
+def _vector_queries(search_query: str, top_k: int) -> Optional[list]:
+    """
+    Embed the query for the index's vector field, if one is configured, with
+    the index's embedding deployment (never the local encoder, whose vector
+    space does not match the index).
+    """
+    global _search_encoder
+    if not SEARCH_VECTOR_FIELD:
+        return None
+    if _search_encoder is None:
+        _search_encoder = OpenAIEncoder(deployment=SEARCH_VECTOR_DEPLOYMENT, dim=SEARCH_VECTOR_DIM)
+    vector = _search_encoder.encode([search_query])[0]
+    return [VectorizedQuery(vector=vector.tolist(), k_nearest_neighbors=top_k, fields=SEARCH_VECTOR_FIELD)]
+
+
+def _register_index_version(endpoint: str, key: str, index_name: str):
+    """Make the retrieval cache follow this index's version (once per index)."""
+    if index_name in _registered_indexes:
+        return
+    _registered_indexes.add(index_name)
+    retrieval_cache.register_version_provider(
+        index_name,
+        lambda: _index_version(endpoint, key, index_name)
+    )
+
+
+def _index_version(endpoint: str, key: str, index_name: str) -> Optional[str]:
+    """
+    Fingerprint of an index: changes when its definition is edited (etag) or
+    documents are ingested (document count, storage size). SEARCH_INDEX_VERSION,
+    if the ingestion job sets it, is folded in as well.
+    """
+    client = SearchIndexClient(endpoint=endpoint, credential=AzureKeyCredential(key))
+    index = client.get_index(index_name)
+    stats = client.get_index_statistics(index_name)
+    return ":".join([
+        os.getenv("SEARCH_INDEX_VERSION", ""),
+        str(index.e_tag),
+        str(stats.get("document_count")),
+        str(stats.get("storage_size"))
+    ])
+
+
+def _fallback_documents(intent: str, query: str = None, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Search the local policy indexes when Azure Search is unavailable."""
+    search = hybrid_search if LOCAL_RETRIEVAL_MODE == "hybrid" else bm25_search
+    try:
+        documents = search(query or intent, top_k)
+        # Free text may share no terms with the corpus; the intent label still might
+        if not documents and query:
+            documents = search(intent, top_k)
+        return documents
+    except Exception as e:
+        logger.warning(f"Local policy search failed: {type(e).__name__}: {e}")
+        return []
@@ -1,54 +1,213 @@
 """
 Safety Agent - Content Moderation
 Ensures responses are safe, unbiased, and appropriate.
+
+Prohibited and bias phrases are compiled into one phrase automaton and the
+PII detectors into one regular expression, so a response is scanned once per
+detector family and redacted in a single output pass. StreamingModerator
+applies the same checks to text that arrives in chunks (streamed LLM output).
 """
-from typing import Dict, Any
+import os
+import re
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+from backend.services.pattern_matcher import PhraseMatcher
+
+# Characters held back while streaming so a detection can never straddle
+# what has already been emitted. 0 derives it from the detectors (longest
+# phrase or whitespace-spanning PII match); a larger value overrides that.
+MODERATION_LOOKBEHIND_CHARS = int(os.getenv("MODERATION_LOOKBEHIND_CHARS", "0"))
+
+REDACTION = "[REDACTED]"
+
+PROHIBITED_PATTERNS = [
+    "guaranteed approval",
+    "100% success",
+    "always approved",
+    "never denied"
+]
+
+BIAS_PATTERNS = ["should be", "must be", "obviously", "clearly wrong"]
+
+# name -> (label used in issues, regex). A "<name>_value" group, when present,
+# is the part that gets redacted; the rest of the match is context. Patterns
+# are case-sensitive unless they scope (?i:...) themselves: "a 12345678" is
+# not an A-number.
+PII_DETECTORS = {
+    "ssn": ("SSN", r"\b\d{3}-\d{2}-\d{4}\b"),
+    "sevis_id": ("SEVIS ID", r"(?i:\bN\d{10}\b)"),
+    "a_number": ("A-number", r"\bA[-#]?\s?\d{8,9}\b"),
+    "passport": ("passport number",
+                 r"(?i:\bpassport\s{0,3}(?:no\.?|number|num\.?|#)?\s{0,3}(?:(?:is|was)\s{1,3})?[:#]?\s{0,3}"
+                 r"(?P<passport_value>(?=[A-Z]*\d)[A-Z0-9]{6,9})\b)"),
+    "email": ("email address", r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b"),
+    "phone": ("phone number", r"(?<![\w-])(?:\+?1[-.\s]?)?(?:\(\d{3}\)\s?|\d{3}[-.\s])\d{3}[-.\s]\d{4}\b"),
+}
+
+# Longest possible match of each detector, for the streaming hold-back.
+# Detectors left out (email) never contain whitespace; the streaming
+# moderator does not cut inside the trailing whitespace-free run instead.
+PII_MAX_MATCH_CHARS = {
+    "ssn": 11,
+    "sevis_id": 11,
+    "a_number": 12,
+    "passport": 39,   # "passport" + "number" + "was" + ":" + 9 characters, with up to 3 spaces between
+    "phone": 17,
+}
+
+# Whitespace-free run at the end of the stream buffer
+_TRAILING_RUN = re.compile(r"\S*\Z")
+
+
+class PiiMatch(NamedTuple):
+    start: int          # span to redact
+    end: int
+    name: str           # detector name
+    match_start: int    # start of the whole match, including context such as "passport no."
+
+
+class ModerationEngine:
+    """Precompiled phrase and PII detectors."""
+
+    def __init__(self, prohibited: List[str] = PROHIBITED_PATTERNS, bias: List[str] = BIAS_PATTERNS,
+                 pii_detectors: Dict[str, Tuple[str, str]] = PII_DETECTORS,
+                 pii_max_match_chars: Dict[str, int] = PII_MAX_MATCH_CHARS):
+        self._phrase_issues = [(p, f"Overconfident claim detected: '{p}'") for p in prohibited]
+        self._phrase_issues += [(p, f"Potential bias: '{p}'") for p in bias]
+        self.phrases = PhraseMatcher((phrase, phrase) for phrase, _ in self._phrase_issues)
+
+        self._pii_labels = {name: label for name, (label, _) in pii_detectors.items()}
+        self.pii = re.compile(
+            "|".join(f"(?P<{name}>{pattern})" for name, (_, pattern) in pii_detectors.items())
+        )
+        self.max_phrase_chars = max((len(p) for p, _ in self._phrase_issues), default=0)
+        self.max_pii_chars = max((pii_max_match_chars.get(name, 0) for name in pii_detectors), default=0)
+        # Shortest hold-back that keeps every phrase and whitespace-spanning PII match intact
+        self.max_match_chars = max(self.max_phrase_chars, self.max_pii_chars)
+
+    def find_pii(self, text: str) -> List[PiiMatch]:
+        """PII values to redact, in text order."""
+        spans = []
+        for match in self.pii.finditer(text):
+            name = match.lastgroup
+            value = f"{name}_value"
+            start, end = match.span(value) if value in self.pii.groupindex else match.span()
+            spans.append(PiiMatch(start, end, name, match.start()))
+        return spans
+
+    def find_phrases(self, text: str) -> set:
+        """Registered phrases present in text."""
+        return self.phrases.find_payloads(text)
+
+    def issues(self, phrases: set, pii_names: set) -> List[str]:
+        """Issue messages in detector order (prohibited, bias, PII)."""
+        issues = [message for phrase, message in self._phrase_issues if phrase in phrases]
+        issues += [f"Potential {label} detected - redacting"
+                   for name, label in self._pii_labels.items() if name in pii_names]
+        return issues
+
+    @staticmethod
+    def redact(text: str, spans: List[PiiMatch]) -> str:
+        """Replace every span with REDACTION in one pass over text."""
+        if not spans:
+            return text
+        parts, position = [], 0
+        for start, end, *_ in spans:
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append(REDACTION)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def moderate(self, content: str) -> Dict[str, Any]:
+        """Scan and redact a complete response. See run_safety_check."""
+        spans = self.find_pii(content)
+        safety_issues = self.issues(self.find_phrases(content), {span.name for span in spans})
+        return {
+            "is_safe": len(safety_issues) == 0,
+            "content": self.redact(content, spans),
+            "safety_issues": safety_issues,
+            "moderation_applied": len(safety_issues) > 0
+        }
+
+
+class StreamingModerator:
+    """
+    Moderates text fed in chunks. Everything except the last lookbehind
+    characters (and any whitespace-free run still growing at the end, such
+    as a half-streamed email address) is redacted and released on each
+    feed; the held-back tail is rescanned with the next chunk, so PII split
+    across chunks is still caught.
+    """
+
+    def __init__(self, engine: "ModerationEngine", lookbehind: int = MODERATION_LOOKBEHIND_CHARS):
+        self.engine = engine
+        self.lookbehind = max(lookbehind, engine.max_match_chars)
+        self._buffer = ""
+        self._phrases = set()
+        self._pii_names = set()
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; return the moderated text that is now safe to emit."""
+        self._buffer += chunk
+        cut = min(len(self._buffer) - self.lookbehind, _TRAILING_RUN.search(self._buffer).start())
+        if cut <= 0:
+            return ""
+        return self._release(cut)
+
+    def finish(self) -> str:
+        """Flush the held-back tail at the end of the stream."""
+        return self._release(len(self._buffer))
+
+    def result(self) -> Dict[str, Any]:
+        """Issues found so far, in the same shape as run_safety_check (without content)."""
+        safety_issues = self.engine.issues(self._phrases, self._pii_names)
+        return {
+            "is_safe": len(safety_issues) == 0,
+            "safety_issues": safety_issues,
+            "moderation_applied": len(safety_issues) > 0
+        }
+
+    def _release(self, cut: int) -> str:
+        text = self._buffer
+        self._phrases |= self.engine.find_phrases(text)
+        spans = self.engine.find_pii(text)
+        # Never split a detection: pull the cut back to the start of any match crossing it
+        for span in spans:
+            if span.match_start < cut < span.end:
+                cut = span.match_start
+        released = [span for span in spans if span.end <= cut]
+        self._pii_names |= {span.name for span in released}
+        self._buffer = text[cut:]
+        return self.engine.redact(text[:cut], released)
+
+
+_engine: Optional[ModerationEngine] = None
+
+
+def get_moderation_engine() -> ModerationEngine:
+    """Shared engine, compiled on first use."""
+    global _engine
+    if _engine is None:
+        _engine = ModerationEngine()
+    return _engine
 
 
 def run_safety_check(content: str) -> Dict[str, Any]:
     """
     Run safety and content moderation checks.
-    
+
     Args:
         content: Generated response content
-        
+
     Returns:
         Safety check results with filtered content
     """
-    safety_issues = []
-    
-    # Check for prohibited content patterns
-    prohibited_patterns = [
-        "guaranteed approval",
-        "100% success",
-        "always approved",
-        "never denied"
-    ]
-    
-    content_lower = content.lower()
-    for pattern in prohibited_patterns:
-        if pattern in content_lower:
-            safety_issues.append(f"Overconfident claim detected: '{pattern}'")
-    
-    # Check for bias indicators
-    bias_patterns = ["should be", "must be", "obviously", "clearly wrong"]
-    for pattern in bias_patterns:
-        if pattern in content_lower:
-            safety_issues.append(f"Potential bias: '{pattern}'")
-    
-    # Check for PII patterns (simplified)
-    import re
-    ssn_pattern = r'\b\d{3}-\d{2}-\d{4}\b'
-    if re.search(ssn_pattern, content):
-        safety_issues.append("Potential SSN detected - redacting")
-        content = re.sub(ssn_pattern, "[REDACTED]", content)
-    
-    is_safe = len(safety_issues) == 0
-    
-    return {
-        "is_safe": is_safe,
-        "content": content,
-        "safety_issues": safety_issues,
-        "moderation_applied": len(safety_issues) > 0
-    }
+    return get_moderation_engine().moderate(content)
+
 
+def moderate_stream(lookbehind: int = MODERATION_LOOKBEHIND_CHARS) -> StreamingModerator:
+    """New streaming moderator on the shared engine."""
+    return StreamingModerator(get_moderation_engine(), lookbehind)
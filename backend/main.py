@@ -1,35 +1,61 @@
-import io
-import uuid
+import asyncio
 import json
 import logging
-import pytesseract
-from typing import List
-from PyPDF2 import PdfReader
-from docx import Document
-from PIL import Image
+from typing import List, Optional
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from backend.services.search_service import search_utterances
-from backend.services.openai_service import classify_intent_with_openai
-from backend.services.runbook_evaluator import evaluate_rules
-from backend.services.foundry_agent import call_foundry_agent
-from backend.services.session_store import SessionStore
-
-from backend.agents.classifier import classify_intent
-from backend.agents.retriever import retrieve_documents
+from backend.services.search_service import search_utterances, close_search_clients
+from backend.services.openai_service import classify_intent_with_openai, warm_up_openai_client, close_openai_clients, OPENAI_WARMUP
+from backend.services.runbook_evaluator import evaluate_rules, build_rule_context
+from backend.services.foundry_agent import (
+    call_foundry_agent_async, stream_foundry_agent, close_foundry_client, FoundryAgentError, transport_stats
+)
+from backend.services.executor import run_extraction, run_blocking_io, shutdown_executors
+from backend.services.extraction_cache import extraction_cache, ExtractionFailure
+from backend.services.ocr_engine import shutdown_ocr_pool
+from backend.services.upload_intake import (
+    UploadLimitMiddleware, configure_upload_spooling, upload_size, open_upload_buffer, close_upload_buffer
+)
+from backend.services.text_budget import FULL_TEXT
+from backend.services.text_extraction import extract_cached
+from backend.services.session_store import session_store
+from backend.services.classification_cache import classification_cache
+from backend.services.retrieval_cache import retrieval_cache
+from backend.services.single_flight import upstream_flights
+from backend.services.metrics import registry, trace_request, request_timings
+from backend.services.context_builder import build_context
+from backend.services.pipeline import Stage, StageGraph
+from backend.services.upload_jobs import UPLOAD_JOB_MAX_REQUEST_BYTES
+
+from backend.agents.classifier import classify_intent_async
+from backend.agents.retriever import (
+    retrieve_documents_async, retrieve_multi, reciprocal_rank_fusion, extract_key_phrases
+)
 from backend.agents.validator import validate_document
 from backend.agents.escalation import check_escalation
-from backend.agents.explainer import explain_steps
-from backend.agents.safety import run_safety_check
+from backend.agents.explainer import explain_steps_async, stream_explanation
+from backend.agents.safety import run_safety_check, moderate_stream
 
-from backend.routes.uploads import router as uploads_router
+from backend.routes.uploads import router as uploads_router, upload_jobs
+from backend.routes.sessions import router as sessions_router
+from backend.routes.metrics import router as metrics_router
 
 MAX_FILE_BYTES = 10 * 1024 * 1024   # 10 MB per file
+MAX_REQUEST_BYTES = 50 * 1024 * 1024  # 50 MB per request (all files)
 MAX_EXCERPT_CHARS = 3000            # excerpt chars to send to agent per file
+DEMO_MODE = True                    # answer with the Foundry agent instead of the full pipeline
+DEFAULT_CONFIDENCE = 0.5            # classifier confidence when none is reported
+
+# Chat history lives in the bounded session store (see services/session_store.py)
 
-# In-memory chat history
-chat_sessions = {}
+# Configure logging (would connect to Application Insights in production)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
 # from fastapi.security import OAuth2PasswordBearer
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -38,7 +64,35 @@ chat_sessions = {}
 
 app = FastAPI(title="Compliance Assistant API")
 app.include_router(uploads_router, prefix="/api")
-
+app.include_router(sessions_router, prefix="/api")
+app.include_router(metrics_router)
+
+# Service stats exported on /metrics; the listed keys only increase and are counters
+registry.register_gauges("session_store", session_store.stats,
+                         counters=("evictions", "expirations", "trimmed_messages"))
+registry.register_gauges("extraction_cache", extraction_cache.stats,
+                         counters=("memory_hits", "disk_hits", "misses", "evictions", "disk_evictions"))
+registry.register_gauges("classification_cache", classification_cache.stats,
+                         counters=("exact_hits", "near_hits", "misses", "evictions", "expirations"))
+registry.register_gauges("retrieval_cache", retrieval_cache.stats,
+                         counters=("hits", "misses", "invalidations", "expirations", "evictions", "saved_ms"))
+registry.register_gauges("upload_jobs", upload_jobs.stats)
+registry.register_gauges("foundry_agent", transport_stats,
+                         counters=("calls", "attempts", "retries", "hedges", "hedge_wins", "failures",
+                                   "rejected", "breaker_opened"))
+# Per call name: calls, executions, coalesced, errors and timeouts
+registry.register_gauges("single_flight", upstream_flights.stats,
+                         counters=("calls", "executions", "coalesced", "errors", "timeouts"), label="call")
+
+
+# Reject oversized uploads with 413 while the body streams in; added before
+# CORS so CORS wraps it and the 413 carries the CORS headers
+app.add_middleware(
+    UploadLimitMiddleware,
+    max_file_bytes=MAX_FILE_BYTES,
+    max_request_bytes=MAX_REQUEST_BYTES,
+    request_limits={"/api/upload/jobs": UPLOAD_JOB_MAX_REQUEST_BYTES},
+)
 
 # CORS (frontend -> backend)
 app.add_middleware(
@@ -48,262 +102,409 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def extract_text_from_file(upload: UploadFile) -> str:
-    """Extract text from file"""
-    filename = upload.filename.lower()
-
-    # Always reset pointer before reading
-    upload.file.seek(0)
-    raw = upload.file.read()
-    
-    if len(raw) == 0:
-        return "ERROR: File is empty"
-
-    # Check file size
-    if len(raw) > MAX_FILE_BYTES:
-        return f"File {upload.filename} exceeds maximum size of 10 MB."
+# Spool large uploaded files to disk while multipart bodies are parsed
+configure_upload_spooling()
 
-    # JSON or TXT files
-    if filename.endswith((".json", ".txt")):
-        try:
-            text = raw.decode("utf-8-sig", errors="ignore")
-            
-            # Try to parse as JSON for pretty formatting
-            if filename.endswith(".json"):
-                try:
-                    parsed = json.loads(text)
-                    return json.dumps(parsed, indent=2)
-                except json.JSONDecodeError:
-                    pass  # Fall through to return raw text
-            
-            return text
-            
-        except Exception as e:
-            return f"Could not decode file. Error: {str(e)}"
-
-    # PDF
-    if filename.endswith(".pdf"):
-        text_chunks = []
-        pdf_bytes = io.BytesIO(raw)
-        
-        try:
-            reader = PdfReader(pdf_bytes)
-            
-            # Try text extraction first
-            for page_num, page in enumerate(reader.pages):
-                t = page.extract_text()
-                if t and t.strip():
-                    text_chunks.append(t)
-            
-            # If we got text, return it
-            if text_chunks:
-                extracted = "\n".join(text_chunks).strip()
-                return extracted
-            
-            # If no text extracted, try OCR on PDF pages            
-            try:
-                # You need to install: pip install pdf2image
-                from pdf2image import convert_from_bytes
-                
-                # Convert PDF pages to images
-                images = convert_from_bytes(raw, dpi=300)
-                
-                ocr_text_chunks = []
-                for i, img in enumerate(images):
-                    page_text = pytesseract.image_to_string(img)
-                    if page_text.strip():
-                        ocr_text_chunks.append(page_text)
-                
-                if ocr_text_chunks:
-                    extracted = "\n\n--- Page Break ---\n\n".join(ocr_text_chunks)
-                    return extracted
-                else:
-                    return "PDF processed but no text found (OCR found no readable text)."
-                    
-            except ImportError:
-                return "Could not extract text from PDF. This appears to be an image-based PDF. To enable OCR, install: pip install pdf2image"
-            except Exception as ocr_error:
-                return f"Could not extract text from PDF. OCR failed: {str(ocr_error)}"
-                
-        except Exception as e:
-            return f"Could not process PDF file. Error: {str(e)}"
-
-    # DOCX
-    if filename.endswith(".docx"):
-        try:
-            doc = Document(io.BytesIO(raw))
-            return "\n".join([p.text for p in doc.paragraphs])
-        except Exception as e:
-            return f"Could not extract text from DOCX file. Error: {str(e)}"
-
-    # Images
-    if filename.endswith((".png", ".jpg", ".jpeg")):
-        try:
-            image = Image.open(io.BytesIO(raw))
-            text = pytesseract.image_to_string(image)
-            return text.strip() if text.strip() else "No text found in image."
-        except Exception as e:
-            return f"Could not extract text from image. Error: {str(e)}"
+def extract_text_from_file(upload: UploadFile, max_chars: Optional[int] = FULL_TEXT) -> str:
+    """Extract text from file, stopping once max_chars characters are available"""
+    filename = upload.filename.lower()
 
-    return f"Unsupported file format: {filename}"
+    # Check file size before reading anything
+    size = upload_size(upload)
+    if size == 0:
+        return ExtractionFailure("ERROR: File is empty")
 
-@app.get("/")
-def root():
-    return {"status": "backend is running"}
+    if size > MAX_FILE_BYTES:
+        return ExtractionFailure(f"File {upload.filename} exceeds maximum size of 10 MB.")
 
-# The orchestrator 
-@app.post("/process")
-async def process_request(
-    text: str = Form(None),
-    session_id: str = Form(None),
-    files: List[UploadFile] = File(default=[])
-):
-    DEMO_MODE = True
-    text = (text or "").strip()
+    # Small uploads come back as bytes, disk-spooled ones as a read-only mmap
+    raw = open_upload_buffer(upload)
+    try:
+        return extract_cached(filename, raw, max_chars)
+    finally:
+        close_upload_buffer(raw)
 
-    # Create session if missing
-    if not session_id:
-        session_id = str(uuid.uuid4())
-        chat_sessions[session_id] = []
 
-    # Append user message if any text was provided
-    if text:
-        chat_sessions[session_id].append({"role": "user", "content": text})
+def _no_escalation(results) -> dict:
+    """Escalation stage fallback: the check failed, so nothing is escalated"""
+    return {"should_escalate": False, "case_id": None, "priority": "medium", "triggered_reasons": [],
+            "matched_patterns": [], "reasoning": "Escalation check unavailable"}
 
-    # Process uploaded files
-    uploaded_file_excerpts = []
-    for f in files:
-        extracted_text = extract_text_from_file(f)
-        uploaded_file_excerpts.append({
-            "filename": f.filename,
-            "excerpt": extracted_text[:MAX_EXCERPT_CHARS] if extracted_text else None
-        })
 
-    # Prepare messages for agent: file excerpts as system messages first
-    messages_for_agent = []
-    for file_meta in uploaded_file_excerpts:
-        if file_meta["excerpt"]:
-            messages_for_agent.append({
-                "role": "system",
-                "content": f"Document {file_meta['filename']} content:\n{file_meta['excerpt']}"
-            })
-        else:
-            messages_for_agent.append({
-                "role": "system",
-                "content": f"Document {file_meta['filename']} uploaded but could not be parsed. Please ask clarifying questions."
-            })
-
-    # Append current session history (user + assistant messages)
-    messages_for_agent.extend(chat_sessions[session_id])
+def build_pipeline(text: str, excerpts: List[str] = (), explain: bool = True) -> StageGraph:
+    """
+    Build the full agent pipeline as a stage graph.
 
-    # ---------------------------------------------------------
-    # Demo mode: use Foundry agent for simplicity
-    # ---------------------------------------------------------
-    if DEMO_MODE:
-        agent_response = call_foundry_agent(messages_for_agent)
-        chat_sessions[session_id].append({"role": "assistant", "content": agent_response})
+    Retrieval on the user's text and upload key phrases starts alongside
+    classification; the intent search follows classification (usually a
+    cache hit) and all result lists are fused. Validation and escalation
+    only need intent and docs, so they run together; the runbook follows
+    escalation, whose decision and priority its rules trigger on. With
+    explain=False the explanation and safety stages are left out (the
+    streaming endpoint generates and moderates the explanation itself).
+    """
 
-        return {
-            "mode": "demo_foundry_agent",
-            "session_id": session_id,
-            "input": text,
-            "final_output": agent_response,
-            "history": chat_sessions[session_id],
-            "uploaded_files": uploaded_file_excerpts
-        }
-    
-    # =============================================================
-    # Full pipeline
-    # =============================================================
-    
     # ---------------------
     # Step 1: Classification
     # ---------------------
-    raw_intent = classify_intent(text)
-
-    # normalize to string if dict is returned
-    if isinstance(raw_intent, dict):
-        intent = raw_intent.get("intent", "")
-    else:
-        intent = raw_intent
+    async def classification(results):
+        raw_intent = await classify_intent_async(text)
 
-    # Ensure intent is always a string
-    intent = str(intent)
+        # Keep intent and confidence; escalation and the runbook need both
+        if isinstance(raw_intent, dict):
+            return {
+                "intent": str(raw_intent.get("intent", "")),
+                "confidence": raw_intent.get("confidence", DEFAULT_CONFIDENCE)
+            }
+        return {"intent": str(raw_intent), "confidence": DEFAULT_CONFIDENCE}
 
     # ---------------------
     # Step 2: Azure Search Retrieval
     # ---------------------
-    raw_docs = retrieve_documents(intent)
+    async def query_retrieval(results):
+        # The student's own words and their documents, searched concurrently
+        queries = [text] + [extract_key_phrases(excerpt) for excerpt in excerpts]
+        return await retrieve_multi(queries, "general_inquiry")
 
-    # normalize to list
-    if isinstance(raw_docs, dict):
-        docs = raw_docs.get("docs", [])
-    else:
-        docs = raw_docs or []
+    async def intent_retrieval(results):
+        return await retrieve_documents_async(results["classification"]["intent"])
+
+    async def retrieval(results):
+        return reciprocal_rank_fusion(results["query_retrieval"] + [results["intent_retrieval"]])
 
     # ---------------------
     # Step 3: Runbook evaluation
     # ---------------------
-    context = {
-        "intent": intent,
-        "docs": docs
-    }
-    runbook_result = evaluate_rules(context)
+    async def runbook(results):
+        context = build_rule_context(results["classification"], results["retrieval"], results["escalation"])
+        return evaluate_rules(context)
 
     # ---------------------
     # Step 4: Validation
     # ---------------------
-    validation_data = validate_document(intent, docs)
+    async def validation(results):
+        validation_data = validate_document(results["classification"]["intent"], results["retrieval"])
 
-    # if the validator returns unexpected formats, normalize:
-    if isinstance(validation_data, bool):
-        validation = {"checklist_pass": validation_data}
-    else:
-        validation = validation_data or {}
+        # if the validator returns unexpected formats, normalize:
+        if isinstance(validation_data, bool):
+            return {"checklist_pass": validation_data}
+        return validation_data or {}
 
     # ---------------------
     # Step 5: Escalation
     # ---------------------
-    escalation = check_escalation(intent, docs)
-
-    # normalize escalation
-    if not isinstance(escalation, bool):
-        escalation = False
+    async def escalation(results):
+        classification = results["classification"]
+        return check_escalation(
+            classification["intent"],
+            results["retrieval"],
+            confidence=classification["confidence"],
+            query=text
+        )
 
     # ---------------------
     # Step 6: Explanation
     # ---------------------
-    explanation = explain_steps(
-        intent=intent,
-        documents=docs,
-        validation=validation,
-        escalation=escalation
-    )
-
-    if explanation is None:
-        explanation = "No explanation available."
+    async def explanation(results):
+        explanation = await explain_steps_async(
+            intent=results["classification"]["intent"],
+            documents=results["retrieval"],
+            validation=results["validation"],
+            escalation=results["escalation"]
+        )
+        return explanation if explanation is not None else "No explanation available."
 
     # ---------------------
     # Step 7: Safety check
     # ---------------------
-    safe_output = run_safety_check(explanation)
+    async def safety(results):
+        return run_safety_check(results["explanation"])
+
+    stages = [
+        Stage("classification", classification,
+              fallback=lambda results: {"intent": "general_inquiry", "confidence": DEFAULT_CONFIDENCE}),
+        Stage("query_retrieval", query_retrieval, fallback=lambda results: []),
+        Stage("intent_retrieval", intent_retrieval, depends_on=("classification",), fallback=lambda results: []),
+        Stage("retrieval", retrieval, depends_on=("query_retrieval", "intent_retrieval"), fallback=lambda results: []),
+        Stage("runbook", runbook, depends_on=("classification", "retrieval", "escalation"), fallback=lambda results: {}),
+        Stage("validation", validation, depends_on=("classification", "retrieval"), fallback=lambda results: {}),
+        Stage("escalation", escalation, depends_on=("classification", "retrieval"), fallback=_no_escalation),
+    ]
+    if not explain:
+        return StageGraph(stages)
+
+    return StageGraph(stages + [
+        Stage("explanation", explanation, depends_on=("classification", "retrieval", "validation", "escalation"),
+              fallback="No explanation available."),
+        Stage("safety", safety, depends_on=("explanation",),
+              fallback=lambda results: {"is_safe": False, "content": "", "safety_issues": ["Safety check failed"],
+                                        "moderation_applied": True}),
+    ])
+
+
+@app.get("/")
+def root():
+    return {"status": "backend is running"}
+
+
+@app.on_event("startup")
+async def startup():
+    # Optionally open the Azure OpenAI connection pool before the first request
+    if OPENAI_WARMUP:
+        await run_blocking_io(warm_up_openai_client)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await upload_jobs.shutdown()
+    await close_foundry_client()
+    await close_openai_clients()
+    await close_search_clients()
+    shutdown_executors()
+    shutdown_ocr_pool()
+
+# The orchestrator 
+async def _prepare_request(text: Optional[str], session_id: Optional[str], files: List[UploadFile]) -> dict:
+    """Session bookkeeping, file extraction and agent context shared by /process and /process/stream"""
+    text = (text or "").strip()
+
+    # Create session if missing; unknown or expired ids start a fresh history
+    if not session_id:
+        session_id = session_store.create_session()
+
+    # Responses carry only messages added by this request (after this seq);
+    # older messages are served by GET /api/sessions/{session_id}/messages
+    seen_seq = session_store.last_seq(session_id)
+
+    # Append user message if any text was provided
+    if text:
+        session_store.append_message(session_id, "user", text)
+
+    # Process uploaded files concurrently on the extraction pool
+    extracted_texts = await asyncio.gather(
+        *(run_extraction(extract_text_from_file, f, MAX_EXCERPT_CHARS) for f in files)
+    )
+    uploaded_file_excerpts = []
+    for f, extracted_text in zip(files, extracted_texts):
+        uploaded_file_excerpts.append({
+            "filename": f.filename,
+            "excerpt": extracted_text[:MAX_EXCERPT_CHARS] if extracted_text else None
+        })
+
+    # Prepare messages for agent within the token budget: file excerpts as
+    # system messages first, then a summary of older turns and the recent ones
+    context = build_context(uploaded_file_excerpts, session_store.get_session(session_id))
+
+    return {
+        "text": text,
+        "session_id": session_id,
+        "seen_seq": seen_seq,
+        "uploaded_files": uploaded_file_excerpts,
+        "searchable_excerpts": [
+            excerpt for excerpt in extracted_texts
+            if excerpt and not isinstance(excerpt, ExtractionFailure)
+        ],
+        "context": context
+    }
+
+
+@app.post("/process")
+async def process_request(
+    text: str = Form(None),
+    session_id: str = Form(None),
+    files: List[UploadFile] = File(default=[]),
+    include_history: bool = Form(False),
+    include_timings: bool = Form(False)
+):
+    # Per-request span breakdown (extraction, stages, upstream calls) on request
+    trace = trace_request() if include_timings else None
+    request = await _prepare_request(text, session_id, files)
+    text, session_id = request["text"], request["session_id"]
+    context = request["context"]
+    messages_for_agent = context["messages"]
+
+    # ---------------------------------------------------------
+    # Demo mode: use Foundry agent for simplicity
+    # ---------------------------------------------------------
+    if DEMO_MODE:
+        try:
+            agent_response = await call_foundry_agent_async(messages_for_agent)
+        except FoundryAgentError as e:
+            logger.warning(f"Foundry agent call failed: {e.code} after {e.attempts} attempt(s): {e.message}")
+            return _agent_error_response(e, session_id)
+        session_store.append_message(session_id, "assistant", agent_response)
+        delta = session_store.get_messages(session_id, after=request["seen_seq"]) or {"messages": [], "last_seq": 0}
+
+        response = {
+            "mode": "demo_foundry_agent",
+            "session_id": session_id,
+            "input": text,
+            "final_output": agent_response,
+            "messages": delta["messages"],
+            "last_seq": delta["last_seq"],
+            "uploaded_files": request["uploaded_files"],
+            "context_tokens": context["token_counts"]
+        }
+        # Older clients can still ask for the whole transcript
+        if include_history:
+            response["history"] = session_store.get_session(session_id)
+        if trace is not None:
+            response["timings"] = request_timings(trace)
+        return response
+    
+    # =============================================================
+    # Full pipeline
+    # =============================================================
+    
+    # Independent stages run concurrently; see build_pipeline for the graph
+    pipeline = await build_pipeline(text, request["searchable_excerpts"]).run()
+    results = pipeline["results"]
+
+    classification = results["classification"]
+    docs = results["retrieval"]
+    runbook_result = results["runbook"]
+    validation = results["validation"]
+    escalation = results["escalation"]
+    explanation = results["explanation"]
+    safe_output = results["safety"]
 
     logger.info(f"Processing request: {text}")
     logger.info(f"Session: {session_id}")
 
-    return {
-        "intent": intent,
+    response = {
+        "intent": classification["intent"],
+        "confidence": classification["confidence"],
         "retrieved_docs": docs,
         "runbook_result": runbook_result,
         "validation": validation,
         "escalation": escalation,
         "explanation": explanation,
-        "final_output": safe_output
+        "final_output": safe_output,
+        "stage_timings": pipeline["timings"]
     }
+    if trace is not None:
+        response["timings"] = request_timings(trace)
+    return response
+
+
+def _agent_error_response(error: FoundryAgentError, session_id: str) -> JSONResponse:
+    """Structured error for a failed agent call; the user message stays in the session"""
+    headers = {}
+    if error.retry_after is not None:
+        headers["Retry-After"] = str(max(int(error.retry_after + 0.999), 1))
+    return JSONResponse(
+        status_code=error.http_status,
+        content={"session_id": session_id, **error.to_dict()},
+        headers=headers
+    )
 
-# Configure logging (would connect to Application Insights in production)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+
+def _sse_event(event: str, data: dict) -> str:
+    """One Server-Sent Event frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _citations(docs: List[dict]) -> List[dict]:
+    return [
+        {"id": doc.get("id"), "title": doc.get("title"), "source": doc.get("source")}
+        for doc in docs or []
+    ]
+
+
+@app.post("/process/stream")
+async def process_request_stream(
+    text: str = Form(None),
+    session_id: str = Form(None),
+    files: List[UploadFile] = File(default=[])
+):
+    """
+    Streaming variant of /process as Server-Sent Events:
+
+        meta   session_id, uploaded_files, context_tokens (sent right away)
+        token  {"text": ...} moderated answer text as the model generates it
+        done   final_output, safety, messages/last_seq delta, citations,
+               intent, confidence, escalation, runbook_result, validation
+        error  the agent call failed (see FoundryAgentError.to_dict); no
+               done event follows
+
+    Moderation runs on the stream: a tail as long as the longest phrase or
+    PII match (plus any unfinished word) is held back until the next chunk
+    so PII split across chunks is still redacted before it reaches the client.
+    """
+    request = await _prepare_request(text, session_id, files)
+    text, session_id = request["text"], request["session_id"]
+    context = request["context"]
+
+    async def events():
+        yield _sse_event("meta", {
+            "mode": "demo_foundry_agent" if DEMO_MODE else "pipeline",
+            "session_id": session_id,
+            "uploaded_files": request["uploaded_files"],
+            "context_tokens": context["token_counts"]
+        })
+
+        # Citations, escalation and runbook come from the pipeline without its
+        # explanation stages; in demo mode it runs alongside the agent stream
+        metadata = asyncio.create_task(
+            build_pipeline(text, request["searchable_excerpts"], explain=False).run()
+        )
+        moderator = moderate_stream()
+        output = []
+        try:
+            if DEMO_MODE:
+                chunks = stream_foundry_agent(context["messages"])
+            else:
+                results = (await metadata)["results"]
+                chunks = stream_explanation(
+                    intent=results["classification"]["intent"],
+                    documents=results["retrieval"],
+                    validation=results["validation"],
+                    escalation=results["escalation"]
+                )
+
+            async for chunk in chunks:
+                released = moderator.feed(chunk)
+                if released:
+                    output.append(released)
+                    yield _sse_event("token", {"text": released})
+            released = moderator.finish()
+            if released:
+                output.append(released)
+                yield _sse_event("token", {"text": released})
+
+            pipeline = await metadata
+        except FoundryAgentError as e:
+            # Partial answers are not stored; the client may retry
+            logger.warning(f"Foundry agent stream failed: {e.code} after {e.attempts} attempt(s): {e.message}")
+            yield _sse_event("error", {"session_id": session_id, **e.to_dict()})
+            return
+        finally:
+            # Client went away mid-stream: stop the pipeline as well
+            metadata.cancel()
+
+        final_output = "".join(output)
+        session_store.append_message(session_id, "assistant", final_output)
+        delta = session_store.get_messages(session_id, after=request["seen_seq"]) or {"messages": [], "last_seq": 0}
+        results = pipeline["results"]
+
+        yield _sse_event("done", {
+            "session_id": session_id,
+            "final_output": final_output,
+            "safety": moderator.result(),
+            "messages": delta["messages"],
+            "last_seq": delta["last_seq"],
+            "intent": results["classification"]["intent"],
+            "confidence": results["classification"]["confidence"],
+            "citations": _citations(results["retrieval"]),
+            "escalation": results["escalation"],
+            "runbook_result": results["runbook"],
+            "validation": results["validation"],
+            "stage_timings": pipeline["timings"]
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
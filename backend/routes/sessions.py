@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from backend.services.session_store import session_store, SESSION_PAGE_SIZE
+
+MAX_PAGE_SIZE = 200  # messages per history page
+
+router = APIRouter()
+
+
+def transcript_etag(page: dict, after: int, limit: int) -> str:
+    """Changes whenever a message is added to or trimmed from the transcript, and per page"""
+    return f'"{page["first_seq"]}-{page["last_seq"]}-{after}-{limit}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@router.get("/sessions/{session_id}/messages")
+def get_session_messages(
+    session_id: str,
+    request: Request,
+    response: Response,
+    after: int = Query(0, ge=0, description="Return messages with a higher sequence number"),
+    limit: int = Query(SESSION_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Cursor-paginated chat history; pass next_cursor as `after` for the following page"""
+    page = session_store.get_messages(session_id, after=after, limit=limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired.")
+
+    # Unchanged transcript: nothing to send
+    etag = transcript_etag(page, after, limit)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return page
+
+
+@router.get("/sessions/stats")
+def session_store_stats():
+    """Size and eviction counters of the session store"""
+    return session_store.stats()
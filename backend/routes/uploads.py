@@ -1,11 +1,12 @@
-import io
-import json
-from typing import List
+from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from PIL import Image
-import pytesseract
-from PyPDF2 import PdfReader
-from docx import Document
+
+from backend.services.executor import run_extraction
+from backend.services.extraction_cache import extraction_cache
+from backend.services.upload_jobs import UploadJobManager, QueueFullError
+from backend.services.upload_intake import upload_size, open_upload_buffer, close_upload_buffer
+from backend.services.text_budget import FULL_TEXT
+from backend.services.text_extraction import extract_cached
 
 MAX_FILE_BYTES = 10 * 1024 * 1024  # 10 MB per file
 MAX_EXCERPT_CHARS = 3000           # max chars to send to agent per file
@@ -13,69 +14,44 @@ MAX_EXCERPT_CHARS = 3000           # max chars to send to agent per file
 router = APIRouter()
 
 
-def extract_text_from_file(upload: UploadFile) -> str:
-    """Extract text content from supported file types"""
-    upload.file.seek(0)
+def extract_text_from_file(upload: UploadFile, max_chars: Optional[int] = FULL_TEXT) -> str:
+    """Extract text content from supported file types, stopping once max_chars are available"""
     filename = upload.filename.lower()
-    raw = upload.file.read()
-
-    if len(raw) > MAX_FILE_BYTES:
-        raise HTTPException(status_code=400, detail=f"File {upload.filename} exceeds maximum size of 10 MB.")
-
-    # JSON
-    if filename.endswith(".json"):
-        try:
-            parsed = json.loads(raw.decode("utf-8"))
-            return json.dumps(parsed, indent=2)
-        except Exception:
-            return "Could not parse JSON file."
-
-    # TXT
-    if filename.endswith(".txt"):
-        try:
-            return raw.decode("utf-8", errors="ignore")
-        except Exception:
-            return "Could not decode text file."
-
-    # PDF
-    if filename.endswith(".pdf"):
-        try:
-            reader = PdfReader(io.BytesIO(raw))
-            pages = [p.extract_text() or "" for p in reader.pages]
-            combined = "\n".join(pages).strip()
-            if not combined:
-                # fallback to OCR
-                image_texts = []
-                for page in reader.pages:
-                    xobj = page.get("/Resources", {}).get("/XObject", {})
-                    for obj in xobj.values():
-                        if obj.get("/Subtype") == "/Image":
-                            img_data = obj.get_data()
-                            image = Image.open(io.BytesIO(img_data))
-                            image_texts.append(pytesseract.image_to_string(image))
-                combined = "\n".join(image_texts).strip() or "No extractable text in PDF."
-            return combined
-        except Exception:
-            return "Could not extract text from PDF."
-
-    # DOCX
-    if filename.endswith(".docx"):
-        try:
-            doc = Document(io.BytesIO(raw))
-            return "\n".join([p.text for p in doc.paragraphs])
-        except Exception:
-            return "Could not extract text from DOCX."
-
-    # Images → OCR
-    if filename.endswith((".png", ".jpg", ".jpeg")):
-        try:
-            image = Image.open(io.BytesIO(raw))
-            text = pytesseract.image_to_string(image)
-            return text.strip() or "OCR found no readable text."
-        except Exception:
-            return "Could not run OCR on image."
-
-    return f"No extractor implemented for: {filename}"
+
+    if upload_size(upload) > MAX_FILE_BYTES:
+        raise HTTPException(status_code=413, detail=f"File {upload.filename} exceeds maximum size of 10 MB.")
+
+    # Small uploads come back as bytes, disk-spooled ones as a read-only mmap
+    raw = open_upload_buffer(upload)
+    try:
+        # Same extractor and cache as /process
+        return extract_cached(filename, raw, max_chars)
+    finally:
+        close_upload_buffer(raw)
+
+
+def process_upload(upload: UploadFile) -> Dict[str, Any]:
+    """Extract one upload into an excerpt or an error entry"""
+    try:
+        text = extract_text_from_file(upload, MAX_EXCERPT_CHARS)
+        return {
+            "filename": upload.filename,
+            "excerpt": text[:MAX_EXCERPT_CHARS]
+        }
+    except HTTPException as e:
+        return {
+            "filename": upload.filename,
+            "error": str(e.detail)
+        }
+    except Exception:
+        return {
+            "filename": upload.filename,
+            "error": "Unknown error occurred."
+        }
+
+
+# Background extraction jobs for large multi-file uploads
+upload_jobs = UploadJobManager(process_file=process_upload)
 
 
 @router.post("/upload")
@@ -86,21 +62,32 @@ async def upload_files(files: List[UploadFile] = File(...)):
 
     result = []
     for f in files:
-        try:
-            text = extract_text_from_file(f)
-            excerpt = text[:MAX_EXCERPT_CHARS]
-            result.append({
-                "filename": f.filename,
-                "excerpt": excerpt
-            })
-        except HTTPException as e:
-            result.append({
-                "filename": f.filename,
-                "error": str(e.detail)
-            })
-        except Exception:
-            result.append({
-                "filename": f.filename,
-                "error": "Unknown error occurred."
-            })
+        result.append(await run_extraction(process_upload, f))
     return {"files": result}
+
+
+@router.post("/upload/jobs", status_code=202)
+async def create_upload_job(files: List[UploadFile] = File(...)):
+    """Queue files for background extraction and return a job id to poll"""
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded.")
+
+    try:
+        return await upload_jobs.submit(files)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/upload/jobs/{job_id}")
+def get_upload_job(job_id: str):
+    """Per-file progress and results of an extraction job"""
+    job = upload_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+
+@router.get("/upload/cache")
+def extraction_cache_stats():
+    """Hit/miss counters and size of the shared extraction cache"""
+    return extraction_cache.stats()
@@ -0,0 +1,223 @@
+"""
+BM25 Index - Offline Policy Retrieval
+In-process inverted index with BM25 scoring over the policy corpus
+(data/sample_policies.json). The index is stored in a compact binary file
+that is memory-mapped at startup, and results use the same document shape
+as the Azure Cognitive Search path.
+
+File layout (little-endian):
+    header      magic, version, doc count, term count, avgdl, k1, b,
+                vocab bytes, postings count, docs JSON bytes
+    doc_norms   float32 per doc: k1 * (1 - b + b * len / avgdl)
+    term_table  (uint32 postings start, uint32 df) per term, sorted by term
+    vocab       NUL-separated UTF-8 terms in term_table order, padded to 4 bytes
+    post_docs   uint32 doc id per posting
+    post_tfs    float32 field-weighted term frequency per posting
+    docs        JSON list of documents (id, title, content, source, category)
+"""
+import os
+import re
+import json
+import math
+import mmap
+import heapq
+import struct
+import threading
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICIES_PATH = os.getenv("POLICIES_PATH", os.path.join(BACKEND_DIR, "data", "sample_policies.json"))
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", os.path.join(BACKEND_DIR, "data", "sample_policies.bm25"))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Field weights approximate BM25F: a match in the title or tags counts more
+FIELD_WEIGHTS = {"title": 2.0, "tags": 2.0, "category": 1.5, "content": 1.0}
+
+MAGIC = b"CWBM"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIfffIII")
+
+STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "at", "is", "are", "be",
+    "was", "were", "it", "its", "as", "that", "this", "from", "i", "my", "me", "can", "do", "does", "what",
+    "when", "how", "if", "any", "must", "may", "their", "they", "which", "question", "inquiry"
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-case alphanumeric tokens without stopwords, with plurals folded
+    ("deadlines" -> "deadline"). Underscores split, so intent labels work as queries.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def _document_terms(doc: Dict[str, Any]) -> Counter:
+    """Field-weighted term frequencies for one policy."""
+    weighted = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field) or ""
+        if isinstance(value, list):
+            value = " ".join(value)
+        for token in tokenize(value):
+            weighted[token] += weight
+    return weighted
+
+
+def build_index(policies: List[Dict[str, Any]], path: str):
+    """
+    Build the binary index for a list of policies and write it atomically.
+
+    Args:
+        policies: Policy dicts with id, title, content, source, category, tags
+        path: Destination file
+    """
+    doc_terms = [_document_terms(doc) for doc in policies]
+    lengths = [sum(terms.values()) for terms in doc_terms]
+    avgdl = (sum(lengths) / len(lengths)) if lengths else 1.0
+
+    postings: Dict[str, List[tuple]] = defaultdict(list)
+    for doc_id, terms in enumerate(doc_terms):
+        for term, tf in terms.items():
+            postings[term].append((doc_id, tf))
+
+    terms = sorted(postings)
+    norms = array("f", (BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl) for length in lengths))
+    term_table, post_docs, post_tfs = array("I"), array("I"), array("f")
+    for term in terms:
+        term_table.extend((len(post_docs), len(postings[term])))
+        for doc_id, tf in postings[term]:
+            post_docs.append(doc_id)
+            post_tfs.append(tf)
+
+    vocab = "\0".join(terms).encode("utf-8")
+    padding = b"\0" * (-len(vocab) % 4)  # keep the numeric sections 4-byte aligned
+    docs = json.dumps([
+        {field: doc.get(field) for field in ("id", "title", "content", "source", "category")}
+        for doc in policies
+    ]).encode("utf-8")
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(policies), len(terms), avgdl, BM25_K1, BM25_B,
+                          len(vocab), len(post_docs), len(docs))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in (header, norms.tobytes(), term_table.tobytes(), vocab, padding,
+                      post_docs.tobytes(), post_tfs.tobytes(), docs):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+class BM25Index:
+    """Read-only BM25 index backed by a memory-mapped file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.doc_count, term_count, self.avgdl, self.k1, self.b,
+         vocab_bytes, postings_count, docs_bytes) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index file: {path}")
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def section(size: int) -> memoryview:
+            nonlocal offset
+            part = view[offset:offset + size]
+            offset += size
+            return part
+
+        self._norms = section(4 * self.doc_count).cast("f")
+        term_table = section(8 * term_count).cast("I")
+        vocab = bytes(section(vocab_bytes)).decode("utf-8").split("\0") if term_count else []
+        section(-vocab_bytes % 4)
+        self._post_docs = section(4 * postings_count).cast("I")
+        self._post_tfs = section(4 * postings_count).cast("f")
+        self.documents = json.loads(bytes(section(docs_bytes)).decode("utf-8"))
+
+        # term -> (postings start, df, idf); the vocabulary is small enough to keep as a dict
+        self._terms = {}
+        for i, term in enumerate(vocab):
+            start, df = term_table[2 * i], term_table[2 * i + 1]
+            idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            self._terms[term] = (start, df, idf)
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Rank policies for query with BM25.
+
+        Args:
+            query: Free text or an intent label
+            top_k: Number of documents to return
+
+        Returns:
+            Documents shaped like Azure Search results (id, title, content,
+            source, category, score), best first
+        """
+        scores: Dict[int, float] = {}
+        k1_plus_one = self.k1 + 1
+        post_docs, post_tfs, norms = self._post_docs, self._post_tfs, self._norms
+        for term in set(tokenize(query)):
+            entry = self._terms.get(term)
+            if entry is None:
+                continue
+            start, df, idf = entry
+            for i in range(start, start + df):
+                doc_id = post_docs[i]
+                tf = post_tfs[i]
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * k1_plus_one / (tf + norms[doc_id])
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [{**self.documents[doc_id], "score": round(score, 4)} for doc_id, score in best]
+
+    def close(self):
+        for name in ("_norms", "_post_docs", "_post_tfs"):
+            getattr(self, name).release()
+        self._mmap.close()
+
+
+def load_policies(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("policies", []) if isinstance(data, dict) else data
+
+
+_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+
+
+def get_bm25_index() -> BM25Index:
+    """
+    Return the shared index, (re)building the file when the policy JSON is
+    newer than it, then memory-mapping it.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                stale = (not os.path.exists(BM25_INDEX_PATH)
+                         or os.path.getmtime(BM25_INDEX_PATH) < os.path.getmtime(POLICIES_PATH))
+                if stale:
+                    build_index(load_policies(POLICIES_PATH), BM25_INDEX_PATH)
+                _index = BM25Index(BM25_INDEX_PATH)
+    return _index
+
+
+def bm25_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Search the local policy corpus. See BM25Index.search."""
+    return get_bm25_index().search(query, top_k)
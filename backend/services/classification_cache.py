@@ -0,0 +1,171 @@
+"""
+Classification Cache - Near-Duplicate Intent Lookup
+Caches intent classifications by normalized query text and matches
+rephrasings ("when is OPT deadline?" / "OPT deadline when") locally using
+character n-gram similarity, so repeat questions skip the LLM round trip.
+"""
+import os
+import re
+import time
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+CLASSIFICATION_CACHE_SIZE = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "2048"))
+CLASSIFICATION_CACHE_TTL_SECONDS = float(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", "3600"))
+CLASSIFICATION_CACHE_SIMILARITY = float(os.getenv("CLASSIFICATION_CACHE_SIMILARITY", "0.8"))
+
+NGRAM_SIZE = 3
+
+# Words that carry no intent signal; dropping them lets word-order and
+# filler variations of the same question collapse together
+STOPWORDS = frozenset({
+    "a", "an", "the", "is", "are", "am", "was", "be", "do", "does", "did",
+    "i", "me", "my", "to", "of", "for", "in", "on", "at", "it", "this", "that",
+    "please", "hi", "hello", "hey", "thanks"
+})
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, strip punctuation and stopwords, collapse whitespace."""
+    tokens = _TOKEN_PATTERN.findall(query.lower())
+    return " ".join(t for t in tokens if t not in STOPWORDS)
+
+
+def query_shingles(normalized: str) -> FrozenSet[str]:
+    """
+    Character n-grams of each token, padded with spaces.
+
+    Shingling per token (rather than across the whole string) makes the
+    similarity insensitive to word order while still tolerating typos.
+    """
+    shingles: Set[str] = set()
+    for token in normalized.split():
+        padded = f" {token} "
+        if len(padded) <= NGRAM_SIZE:
+            shingles.add(padded)
+            continue
+        for i in range(len(padded) - NGRAM_SIZE + 1):
+            shingles.add(padded[i:i + NGRAM_SIZE])
+    return frozenset(shingles)
+
+
+class ClassificationCache:
+    """TTL + LRU cache of classification results with near-duplicate lookup."""
+
+    def __init__(self, max_entries: int = CLASSIFICATION_CACHE_SIZE,
+                 ttl_seconds: float = CLASSIFICATION_CACHE_TTL_SECONDS,
+                 similarity_threshold: float = CLASSIFICATION_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # normalized query -> (result, shingles, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # shingle -> normalized queries containing it
+        self._index: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._counters = {"exact_hits": 0, "near_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached classification for query or a near-duplicate of it.
+
+        Args:
+            query: Raw user query
+
+        Returns:
+            Copy of the cached result (original confidence and reasoning), or None
+        """
+        if self.max_entries <= 0:
+            return None
+        normalized = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(normalized, now)
+            if entry is not None:
+                self._entries.move_to_end(normalized)
+                self._counters["exact_hits"] += 1
+                return dict(entry[0])
+
+            match = self._nearest(query_shingles(normalized), now)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self._counters["near_hits"] += 1
+                return dict(self._entries[match][0])
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, query: str, result: Dict[str, Any]):
+        """Cache a successful classification result for query."""
+        if self.max_entries <= 0:
+            return
+        normalized = normalize_query(query)
+        shingles = query_shingles(normalized)
+        with self._lock:
+            if normalized in self._entries:
+                self._remove(normalized)
+            self._entries[normalized] = (dict(result), shingles, time.monotonic() + self.ttl_seconds)
+            for shingle in shingles:
+                self._index[shingle].add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit rate."""
+        with self._lock:
+            hits = self._counters["exact_hits"] + self._counters["near_hits"]
+            lookups = hits + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def _live_entry(self, normalized: str, now: float) -> Optional[tuple]:
+        entry = self._entries.get(normalized)
+        if entry is not None and entry[2] < now:
+            self._remove(normalized)
+            self._counters["expirations"] += 1
+            return None
+        return entry
+
+    def _nearest(self, shingles: FrozenSet[str], now: float) -> Optional[str]:
+        """Most similar live entry by Jaccard similarity, if above the threshold."""
+        if not shingles:
+            return None
+        overlaps: Dict[str, int] = defaultdict(int)
+        for shingle in shingles:
+            for candidate in self._index.get(shingle, ()):
+                overlaps[candidate] += 1
+
+        best, best_score = None, self.similarity_threshold
+        for candidate, overlap in overlaps.items():
+            candidate_size = len(self._entries[candidate][1])
+            score = overlap / (len(shingles) + candidate_size - overlap)
+            if score >= best_score:
+                best, best_score = candidate, score
+
+        if best is not None and self._live_entry(best, now) is None:
+            return None
+        return best
+
+    def _remove(self, normalized: str):
+        _, shingles, _ = self._entries.pop(normalized)
+        for shingle in shingles:
+            bucket = self._index.get(shingle)
+            if bucket is not None:
+                bucket.discard(normalized)
+                if not bucket:
+                    del self._index[shingle]
+
+
+classification_cache = ClassificationCache()
@@ -0,0 +1,230 @@
+"""
+Context Builder - Token-Budgeted Agent Context
+Builds the message list sent to the agent within a fixed token budget:
+uploaded document excerpts (identical excerpts sent once), the most recent
+turns verbatim, and older turns collapsed into short cached summaries. The
+upstream request size stays constant however long the conversation gets.
+"""
+import os
+import re
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Most recent messages kept verbatim when they fit
+CONTEXT_RECENT_MESSAGES = int(os.getenv("CONTEXT_RECENT_MESSAGES", "6"))
+# Share of the budget document excerpts may use
+CONTEXT_EXCERPT_SHARE = float(os.getenv("CONTEXT_EXCERPT_SHARE", "0.5"))
+# Share of the budget reserved for summaries of older turns
+CONTEXT_SUMMARY_SHARE = float(os.getenv("CONTEXT_SUMMARY_SHARE", "0.15"))
+# Fewest tokens a document excerpt is sent with; files beyond that are left out
+CONTEXT_MIN_EXCERPT_TOKENS = int(os.getenv("CONTEXT_MIN_EXCERPT_TOKENS", "64"))
+# The newest message is never cut below this many tokens; documents and summaries give way first
+CONTEXT_MIN_CURRENT_TOKENS = int(os.getenv("CONTEXT_MIN_CURRENT_TOKENS", "256"))
+CONTEXT_SUMMARY_CHARS = int(os.getenv("CONTEXT_SUMMARY_CHARS", "160"))
+CONTEXT_SUMMARY_CACHE_SIZE = int(os.getenv("CONTEXT_SUMMARY_CACHE_SIZE", "8192"))
+
+# Chat formats add a few tokens of framing per message
+MESSAGE_OVERHEAD_TOKENS = 4
+# English text averages about four characters per token
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text (about four characters per token)."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to roughly tokens tokens, marking the cut."""
+    limit = max(tokens, 0) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 3, 0)] + "..."
+
+
+def summarize_message(role: str, content: str, max_chars: int = CONTEXT_SUMMARY_CHARS) -> str:
+    """One-line extractive summary: the first sentence, capped at max_chars."""
+    first = _SENTENCE_END.split(" ".join((content or "").split()), maxsplit=1)[0]
+    if len(first) > max_chars:
+        first = first[:max_chars - 3].rstrip() + "..."
+    speaker = "Student" if role == "user" else "Assistant"
+    return f"{speaker}: {first}"
+
+
+class SummaryCache:
+    """LRU of per-message summaries, keyed by a hash of role and content."""
+
+    def __init__(self, max_entries: int = CONTEXT_SUMMARY_CACHE_SIZE,
+                 summarizer: Callable[[str, str], str] = summarize_message):
+        self.max_entries = max_entries
+        self.summarizer = summarizer
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, role: str, content: str) -> str:
+        key = hashlib.blake2b(f"{role}\0{content}".encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return summary
+            self.misses += 1
+
+        summary = self.summarizer(role, content)
+        with self._lock:
+            self._entries[key] = summary
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return summary
+
+
+summary_cache = SummaryCache()
+
+
+def _document_messages(documents: List[Dict[str, Any]], budget: int) -> Tuple[List[Dict[str, str]], int]:
+    """
+    System messages for uploaded files within budget, sending identical excerpts once.
+
+    Notices for unreadable and duplicate files are charged first; the rest of
+    the budget is split evenly over the distinct readable files. Files that no
+    longer fit (a notice past the budget, or an excerpt that would get less
+    than CONTEXT_MIN_EXCERPT_TOKENS) are left out and counted instead.
+    """
+    seen: Dict[str, str] = {}
+    entries: List[Any] = []
+    for document in documents:
+        filename, excerpt = document.get("filename"), document.get("excerpt")
+        if not excerpt:
+            entries.append(f"Document {filename} uploaded but could not be parsed. Please ask clarifying questions.")
+        elif excerpt in seen:
+            entries.append(f"Document {filename} has the same content as {seen[excerpt]}.")
+        else:
+            seen[excerpt] = filename
+            entries.append((filename, excerpt))
+
+    omitted = 0
+    remaining = budget
+    for index, entry in enumerate(entries):
+        if isinstance(entry, str):
+            tokens = estimate_tokens(entry) + MESSAGE_OVERHEAD_TOKENS
+            if tokens > remaining:
+                entries[index] = None
+                omitted += 1
+            else:
+                remaining -= tokens
+
+    # Split what is left evenly, sending only as many excerpts as get a useful share
+    readable = [entry for entry in entries if isinstance(entry, tuple)]
+    fits = min(len(readable), remaining // (CONTEXT_MIN_EXCERPT_TOKENS + MESSAGE_OVERHEAD_TOKENS))
+    per_document = remaining // fits if fits else 0
+    messages = []
+    for entry in entries:
+        if entry is None:
+            continue
+        if isinstance(entry, str):
+            messages.append({"role": "system", "content": entry})
+            continue
+        if fits == 0:
+            omitted += 1
+            continue
+        fits -= 1
+        filename, excerpt = entry
+        header = f"Document {filename} content:\n"
+        body = truncate_to_tokens(excerpt, per_document - estimate_tokens(header) - MESSAGE_OVERHEAD_TOKENS)
+        messages.append({"role": "system", "content": header + body})
+    return messages, omitted
+
+
+def build_context(documents: List[Dict[str, Any]], history: List[Dict[str, Any]],
+                  budget: int = CONTEXT_TOKEN_BUDGET, recent_messages: int = CONTEXT_RECENT_MESSAGES,
+                  cache: Optional[SummaryCache] = None) -> Dict[str, Any]:
+    """
+    Assemble agent messages within a token budget.
+
+    Args:
+        documents: Uploaded files as {"filename", "excerpt"} (excerpt None if unreadable)
+        history: Session messages, oldest first; the last one is usually the
+            current user message
+        budget: Token budget for the whole message list
+        recent_messages: Newest messages to keep verbatim when they fit
+        cache: Summary cache (defaults to the shared one)
+
+    Returns:
+        Dictionary with "messages" for the agent and "token_counts"
+        (documents, summary, recent, total, budget) plus how many messages
+        were summarized or left out and how many documents were left out
+    """
+    cache = cache or summary_cache
+    # Hold back room for the newest message before documents and summaries are sized
+    current = min(message_tokens(history[-1]), CONTEXT_MIN_CURRENT_TOKENS) if history else 0
+    document_budget = max(min(int(budget * CONTEXT_EXCERPT_SHARE), budget - current), 0)
+    document_messages, omitted_documents = _document_messages(documents, document_budget)
+    document_tokens = sum(message_tokens(m) for m in document_messages)
+
+    summary_budget = max(min(int(budget * CONTEXT_SUMMARY_SHARE), budget - document_tokens - current), 0)
+    remaining = max(budget - document_tokens - summary_budget, current)
+
+    # Newest messages first, verbatim while they fit; the newest is always kept
+    recent: List[Dict[str, Any]] = []
+    recent_tokens = 0
+    index = len(history)
+    while index > 0 and len(recent) < recent_messages:
+        message = history[index - 1]
+        tokens = message_tokens(message)
+        if recent and recent_tokens + tokens > remaining:
+            break
+        if not recent and tokens > remaining:
+            content = truncate_to_tokens(message.get("content", ""), remaining - MESSAGE_OVERHEAD_TOKENS)
+            message = {**message, "content": content}
+            tokens = message_tokens(message)
+        recent.insert(0, {"role": message.get("role", "user"), "content": message.get("content", "")})
+        recent_tokens += tokens
+        index -= 1
+
+    # Older messages become cached one-line summaries, newest kept first. The
+    # per-line estimate (rounded up per line) only decides what fits; the
+    # reported count is measured on the message actually sent.
+    lines: List[str] = []
+    estimate = MESSAGE_OVERHEAD_TOKENS + estimate_tokens("Earlier in this conversation:\n")
+    for message in reversed(history[:index]):
+        line = cache.get(message.get("role", "user"), message.get("content", ""))
+        cost = estimate_tokens(line) + 1
+        if estimate + cost > summary_budget:
+            break
+        lines.insert(0, line)
+        estimate += cost
+
+    messages = list(document_messages)
+    summary_tokens = 0
+    if lines:
+        summary_message = {"role": "system", "content": "Earlier in this conversation:\n" + "\n".join(lines)}
+        summary_tokens = message_tokens(summary_message)
+        messages.append(summary_message)
+    messages.extend(recent)
+
+    return {
+        "messages": messages,
+        "token_counts": {
+            "documents": document_tokens,
+            "summary": summary_tokens,
+            "recent": recent_tokens,
+            "total": document_tokens + summary_tokens + recent_tokens,
+            "budget": budget
+        },
+        "summarized_messages": len(lines),
+        "omitted_messages": index - len(lines),
+        "omitted_documents": omitted_documents
+    }
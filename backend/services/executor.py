@@ -0,0 +1,82 @@
+"""
+Executor Service - Off-Loop Work
+Bounded worker pools that keep blocking work off the FastAPI event loop.
+"""
+import os
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "4"))
+UPSTREAM_WORKERS = int(os.getenv("UPSTREAM_WORKERS", "32"))
+
+# CPU-bound parsing (PyPDF2, python-docx, pytesseract) gets a small pool so a
+# burst of uploads cannot starve the event loop or exhaust memory.
+_extraction_pool = ThreadPoolExecutor(
+    max_workers=EXTRACTION_WORKERS,
+    thread_name_prefix="extraction"
+)
+
+# Synchronous SDK calls (Azure OpenAI, Azure Search) that have no async client
+# yet. These threads mostly wait on sockets, so the pool can be wider.
+_upstream_pool = ThreadPoolExecutor(
+    max_workers=UPSTREAM_WORKERS,
+    thread_name_prefix="upstream"
+)
+
+
+async def run_extraction(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a document extraction function on the bounded extraction pool.
+
+    Args:
+        func: Synchronous extraction function
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    return await run_in_pool(_extraction_pool, func, *args, **kwargs)
+
+
+async def run_blocking_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking upstream call (SDK request) on the upstream pool.
+
+    Args:
+        func: Synchronous function performing network I/O
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    return await run_in_pool(_upstream_pool, func, *args, **kwargs)
+
+
+async def run_in_pool(pool: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run func on the given pool (e.g. a component's own executor).
+
+    Args:
+        pool: Executor to run on
+        func: Synchronous function
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the request's timing trace) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(pool, functools.partial(context.run, func, *args, **kwargs))
+
+
+def shutdown_executors():
+    """Stop accepting work and release worker threads."""
+    _extraction_pool.shutdown(wait=False, cancel_futures=True)
+    _upstream_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,239 @@
+"""
+Extraction Cache - Content-Addressed Text Cache
+Caches extracted document text by file content hash so repeat uploads of the
+same I-20, passport scan or transcript skip parsing and OCR entirely.
+"""
+import os
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from backend.services.metrics import observe
+
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR")  # disk tier disabled when unset
+EXTRACTION_CACHE_DISK_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+class ExtractionFailure(str):
+    """Message returned in place of document text when extraction fails. Never cached."""
+
+
+def make_cache_key(raw: bytes, filename: str, max_chars: Optional[int], version: int) -> str:
+    """
+    Build a cache key from file content and the options that shape the text.
+
+    The endpoint doing the extraction is deliberately not part of the key:
+    a file sent to /api/upload and then to /process is parsed once.
+
+    Args:
+        raw: File bytes
+        filename: Original filename (its extension selects the parser)
+        max_chars: Character budget the extraction stopped at (None for full text)
+        version: Extractor version; bump it whenever extraction output changes
+
+    Returns:
+        Hex digest identifying this (content, parser, options) combination
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    digest = hashlib.sha256(raw).hexdigest()
+    return hashlib.sha256(f"{version}:{extension}:{max_chars or 'full'}:{digest}".encode()).hexdigest()
+
+
+# Formats reported as metric labels; anything else is "other"
+EXTRACTION_FORMATS = frozenset({"pdf", "docx", "txt", "json", "png", "jpg", "jpeg"})
+
+
+def timed_extraction(filename: str, extract: Callable[..., str], *args) -> str:
+    """Run extract(*args) and record its duration under the file's format."""
+    extension = os.path.splitext(filename.lower())[1].lstrip(".")
+    file_format = extension if extension in EXTRACTION_FORMATS else "other"
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        text = extract(*args)
+        if not isinstance(text, ExtractionFailure):
+            outcome = "ok"
+        return text
+    finally:
+        observe("extraction", time.perf_counter() - start, outcome=outcome, format=file_format)
+
+
+class ExtractionCache:
+    """Two-tier (memory LRU + optional disk) cache of extracted text."""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for key, promoting disk hits into memory."""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return text
+
+        text = self._disk_get(key)
+        with self._lock:
+            if text is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._memory_put(key, text)
+        return text
+
+    def put(self, key: str, text: str):
+        """Store text under key in both tiers. Failures are ignored."""
+        if isinstance(text, ExtractionFailure):
+            return
+        with self._lock:
+            self._memory_put(key, text)
+        self._disk_put(key, text)
+
+    def get_or_extract(self, key: str, extract: Callable[[], str]) -> str:
+        """
+        Return cached text for key, or run extract and cache its result.
+
+        Args:
+            key: Cache key from make_cache_key
+            extract: Zero-argument callable performing the extraction
+
+        Returns:
+            Extracted text (or an ExtractionFailure message)
+        """
+        text = self.get(key)
+        if text is None:
+            text = extract()
+            self.put(key, text)
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current tier sizes."""
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left in place)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ---------------------
+    # Memory tier
+    # ---------------------
+
+    def _memory_put(self, key: str, text: str):
+        size = len(text) * 2  # rough upper bound; avoids encoding on every put
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous) * 2
+        self._entries[key] = text
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted) * 2
+            self._counters["evictions"] += 1
+
+    # ---------------------
+    # Disk tier
+    # ---------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.txt")
+
+    def _disk_files(self):
+        """Yield (path, size, mtime) for every file in the disk tier."""
+        for root, _, names in os.walk(self.disk_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return text
+        except OSError:
+            return None
+
+    def _disk_put(self, key: str, text: str):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        data = text.encode("utf-8")
+        try:
+            previous_size = os.path.getsize(path)
+        except OSError:
+            previous_size = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Extraction cache write error: {e}")
+            return
+        with self._lock:
+            # Rewriting a key replaces its file rather than adding one
+            self._disk_bytes += len(data) - previous_size
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._disk_evict()
+
+    def _disk_evict(self):
+        """Delete least recently used files until the tier is at 90% of its budget."""
+        files = sorted(self._disk_files(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        evicted = 0
+        for path, size, _ in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self._counters["disk_evictions"] += evicted
+
+
+# Shared by /process and /api/upload
+extraction_cache = ExtractionCache(
+    max_bytes=EXTRACTION_CACHE_MAX_BYTES,
+    disk_dir=EXTRACTION_CACHE_DIR,
+    disk_max_bytes=EXTRACTION_CACHE_DISK_MAX_BYTES
+)
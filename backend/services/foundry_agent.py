@@ -1,54 +1,478 @@
 """
 Azure Foundry Agent Service
 Handles communication with Azure Foundry Agent endpoint.
+
+All calls share one pooled async HTTP client. Timeouts, connection errors,
+429 and 5xx responses are retried with jittered exponential backoff (a
+Retry-After header sets the wait instead), within an overall deadline.
+Optionally a second, hedged request is sent when the first one has not
+answered after the recent p95 latency. A circuit breaker fails calls fast
+while the agent keeps failing, and lets a single probe through after
+FOUNDRY_AGENT_BREAKER_RESET_SECONDS. Failures raise FoundryAgentError
+instead of being returned as reply text.
 """
 import os
-import requests
-from typing import List, Dict
+import json
+import time
+import random
+import asyncio
+import httpx
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
 from dotenv import load_dotenv
 
+from backend.services.metrics import span
+
 load_dotenv()
 
 AGENT_ENDPOINT = os.getenv("FOUNDRY_AGENT_ENDPOINT")
 AGENT_API_KEY = os.getenv("FOUNDRY_AGENT_API_KEY")
+AGENT_TIMEOUT_SECONDS = float(os.getenv("FOUNDRY_AGENT_TIMEOUT_SECONDS", "30"))
+AGENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("FOUNDRY_AGENT_CONNECT_TIMEOUT_SECONDS", "5"))
+AGENT_MAX_CONNECTIONS = int(os.getenv("FOUNDRY_AGENT_MAX_CONNECTIONS", "100"))
+AGENT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("FOUNDRY_AGENT_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+# Retries: attempts per call, backoff base/cap, and the whole call's deadline
+AGENT_MAX_ATTEMPTS = int(os.getenv("FOUNDRY_AGENT_MAX_ATTEMPTS", "3"))
+AGENT_BACKOFF_BASE_SECONDS = float(os.getenv("FOUNDRY_AGENT_BACKOFF_BASE_SECONDS", "0.5"))
+AGENT_BACKOFF_MAX_SECONDS = float(os.getenv("FOUNDRY_AGENT_BACKOFF_MAX_SECONDS", "8"))
+AGENT_DEADLINE_SECONDS = float(os.getenv("FOUNDRY_AGENT_DEADLINE_SECONDS", "60"))
+
+# Hedging: off by default since it can double upstream load
+AGENT_HEDGE = os.getenv("FOUNDRY_AGENT_HEDGE", "false").lower() in ("1", "true", "yes")
+AGENT_HEDGE_PERCENTILE = float(os.getenv("FOUNDRY_AGENT_HEDGE_PERCENTILE", "95"))
+AGENT_HEDGE_MIN_SECONDS = float(os.getenv("FOUNDRY_AGENT_HEDGE_MIN_SECONDS", "0.2"))
+# Successful calls needed before the percentile is trusted
+AGENT_HEDGE_MIN_SAMPLES = int(os.getenv("FOUNDRY_AGENT_HEDGE_MIN_SAMPLES", "20"))
+
+# Circuit breaker: consecutive failed calls (each after its retries) that open it, and how long it stays open
+AGENT_BREAKER_FAILURES = int(os.getenv("FOUNDRY_AGENT_BREAKER_FAILURES", "5"))
+AGENT_BREAKER_RESET_SECONDS = float(os.getenv("FOUNDRY_AGENT_BREAKER_RESET_SECONDS", "30"))
+
+T = TypeVar("T")
+
+# Shared async client so concurrent chats reuse pooled keep-alive connections
+_async_client: Optional[httpx.AsyncClient] = None
 
 
-def call_foundry_agent(messages: List[Dict[str, str]]) -> str:
+class FoundryAgentError(Exception):
     """
-    Call Azure Foundry Agent with conversation history.
-    
-    Args:
-        messages: List of message dictionaries with role and content
-        
-    Returns:
-        Agent response text
+    A failed agent call.
+
+    Attributes:
+        code: not_configured, circuit_open, timeout, connection_error,
+            rate_limited, upstream_error or bad_response
+        status_code: Upstream HTTP status, if a response was received
+        retry_after: Seconds the caller should wait before trying again
+        retryable: Whether another attempt may succeed
+        attempts: Attempts made before giving up
     """
-    if not AGENT_ENDPOINT or not AGENT_API_KEY:
-        return "Foundry agent is not configured. Please check environment variables."
-    
+
+    def __init__(self, code: str, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+        self.attempts = 0
+
+    @property
+    def http_status(self) -> int:
+        """Status to answer our own client with."""
+        if self.code in ("not_configured", "circuit_open", "rate_limited"):
+            return 503
+        if self.code == "timeout":
+            return 504
+        return 502
+
+    @property
+    def is_outage(self) -> bool:
+        """Whether the failure says the agent is unhealthy (counts toward the breaker)."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "error": self.code,
+            "message": self.message,
+            "upstream_status": self.status_code,
+            "retry_after": round(self.retry_after, 3) if self.retry_after is not None else None,
+            "attempts": self.attempts
+        }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed: calls go through. After failure_threshold consecutive failures it
+    opens and calls are refused for reset_seconds; then it is half-open and
+    a single probe call is let through, whose outcome closes or reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = AGENT_BREAKER_FAILURES,
+                 reset_seconds: float = AGENT_BREAKER_RESET_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or self._clock() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_in(self) -> float:
+        """Seconds until the breaker lets a probe through (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_seconds - (self._clock() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def probing(self) -> bool:
+        """Whether the call in progress is the half-open probe."""
+        return self._probing
+
+    def cancel_probe(self):
+        """The probe call was abandoned without an outcome; let the next call probe."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                self.times_opened += 1
+            self.opened_at = self._clock()
+            self._probing = False
+
+
+class LatencyWindow:
+    """Latencies (seconds) of the most recent successful calls."""
+
+    def __init__(self, size: int = 256):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        """Nearest-rank percentile; None until min_samples calls were seen."""
+        if len(self._samples) < max(min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+
+_breaker = CircuitBreaker()
+_latencies = LatencyWindow()
+_counters = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0, "rejected": 0}
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client, creating it on first use."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(AGENT_TIMEOUT_SECONDS, connect=AGENT_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=AGENT_MAX_CONNECTIONS,
+                max_keepalive_connections=AGENT_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    return _async_client
+
+
+def _headers(stream: bool = False) -> Dict[str, str]:
     headers = {
         "Content-Type": "application/json",
         "api-key": AGENT_API_KEY
     }
-    
-    payload = {"messages": messages}
-    
-    try:
-        response = requests.post(
-            AGENT_ENDPOINT,
-            json=payload,
-            headers=headers,
-            timeout=30
-        )
-        response.raise_for_status()
-        
-        data = response.json()
+    if stream:
+        headers["Accept"] = "text/event-stream"
+    return headers
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds; the header holds either seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _status_error(response: httpx.Response) -> FoundryAgentError:
+    status = response.status_code
+    retry_after = _parse_retry_after(response.headers.get("retry-after"))
+    if status == 429:
+        return FoundryAgentError("rate_limited", "Foundry agent is rate limiting requests.",
+                                 status, retry_after, retryable=True)
+    return FoundryAgentError("upstream_error", f"Foundry agent returned HTTP {status}.",
+                             status, retry_after, retryable=status >= 500)
+
+
+def _transport_error(e: httpx.HTTPError) -> FoundryAgentError:
+    if isinstance(e, httpx.TimeoutException):
+        return FoundryAgentError("timeout", "Request to Foundry agent timed out.", retryable=True)
+    return FoundryAgentError("connection_error", f"Error contacting Foundry agent: {str(e)}", retryable=True)
+
+
+def _completion_content(data: Any) -> str:
+    try:
         return data["choices"][0]["message"]["content"]
-        
-    except requests.exceptions.Timeout:
-        return "Request timed out. Please try again."
-    except requests.exceptions.RequestException as e:
-        return f"Error contacting Foundry agent: {str(e)}"
-    except (KeyError, IndexError) as e:
-        return f"Unexpected response format: {str(e)}"
+    except (KeyError, IndexError, TypeError) as e:
+        raise FoundryAgentError("bad_response", f"Unexpected response format: {str(e)}", 200)
+
+
+def _retry_delay(attempt: int, error: FoundryAgentError) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After plus a little jitter."""
+    if error.retry_after is not None:
+        return error.retry_after + random.uniform(0, AGENT_BACKOFF_BASE_SECONDS)
+    return random.uniform(0, min(AGENT_BACKOFF_MAX_SECONDS, AGENT_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1)))
+
+
+async def _with_retries(send: Callable[[], Awaitable[T]]) -> T:
+    """Run send() under the circuit breaker, retrying retryable failures."""
+    if not AGENT_ENDPOINT or not AGENT_API_KEY:
+        raise FoundryAgentError("not_configured", "Foundry agent is not configured. Please check environment variables.")
+
+    _counters["calls"] += 1
+    deadline = time.monotonic() + AGENT_DEADLINE_SECONDS
+    attempt = 0
+    while True:
+        attempt += 1
+        if not _breaker.allow():
+            _counters["rejected"] += 1
+            error = FoundryAgentError("circuit_open", "Foundry agent is unavailable; not sending requests for now.",
+                                      retry_after=_breaker.retry_in())
+            error.attempts = attempt - 1
+            raise error
+
+        _counters["attempts"] += 1
+        try:
+            result = await send()
+        except FoundryAgentError as e:
+            e.attempts = attempt
+            # The breaker counts failed calls, not attempts: an outage is
+            # recorded once when the call gives up, except that a failed
+            # half-open probe reopens the breaker right away
+            recorded = False
+            if not e.is_outage:
+                _breaker.record_success()
+            elif _breaker.probing:
+                _breaker.record_failure()
+                recorded = True
+            delay = _retry_delay(attempt, e)
+            if not e.retryable or attempt >= AGENT_MAX_ATTEMPTS or time.monotonic() + delay > deadline:
+                if e.is_outage and not recorded:
+                    _breaker.record_failure()
+                _counters["failures"] += 1
+                raise
+            _counters["retries"] += 1
+            await asyncio.sleep(delay)
+            continue
+        except asyncio.CancelledError:
+            # A cancelled half-open probe must not leave the breaker stuck
+            _breaker.cancel_probe()
+            raise
+
+        _breaker.record_success()
+        return result
+
+
+async def _post_once(payload: Dict[str, Any]) -> str:
+    """One POST to the agent; returns the reply text or raises FoundryAgentError."""
+    started = time.monotonic()
+    try:
+        with span("upstream_call", service="foundry", operation="complete"):
+            response = await _get_async_client().post(AGENT_ENDPOINT, json=payload, headers=_headers())
+            if response.status_code >= 400:
+                raise _status_error(response)
+    except httpx.HTTPError as e:
+        raise _transport_error(e)
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise FoundryAgentError("bad_response", f"Unexpected response format: {str(e)}", response.status_code)
+    content = _completion_content(data)
+    _latencies.add(time.monotonic() - started)
+    return content
+
+
+def hedge_delay() -> Optional[float]:
+    """Seconds to wait before hedging, or None when hedging is off or not warmed up."""
+    if not AGENT_HEDGE:
+        return None
+    latency = _latencies.percentile(AGENT_HEDGE_PERCENTILE, AGENT_HEDGE_MIN_SAMPLES)
+    return None if latency is None else max(latency, AGENT_HEDGE_MIN_SECONDS)
+
+
+async def _post_hedged(payload: Dict[str, Any]) -> str:
+    """
+    POST once; if no answer arrives within hedge_delay(), send a second
+    identical request and take whichever succeeds first.
+    """
+    delay = hedge_delay()
+    if delay is None:
+        return await _post_once(payload)
+
+    primary = asyncio.create_task(_post_once(payload))
+    pending = {primary}
+    error: Optional[BaseException] = None
+    try:
+        # Cancelling the caller here cancels the primary request as well
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        _counters["hedges"] += 1
+        hedge = asyncio.create_task(_post_once(payload))
+        pending.add(hedge)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _counters["hedge_wins"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def call_foundry_agent_async(messages: List[Dict[str, str]]) -> str:
+    """
+    Call Azure Foundry Agent without blocking the event loop.
+
+    Args:
+        messages: List of message dictionaries with role and content
+
+    Returns:
+        Agent response text
+
+    Raises:
+        FoundryAgentError: The agent is not configured, the circuit is open,
+            or every attempt failed
+    """
+    return await _with_retries(lambda: _post_hedged({"messages": messages}))
+
+
+async def _open_stream(payload: Dict[str, Any]) -> httpx.Response:
+    """Send a streaming request and return the response once its headers arrived."""
+    client = _get_async_client()
+    request = client.build_request("POST", AGENT_ENDPOINT, json=payload, headers=_headers(stream=True))
+    try:
+        # Time to the response headers; the body streams afterwards
+        with span("upstream_call", service="foundry", operation="stream"):
+            response = await client.send(request, stream=True)
+            if response.status_code >= 400:
+                await response.aclose()
+                raise _status_error(response)
+    except httpx.HTTPError as e:
+        raise _transport_error(e)
+    return response
+
+
+async def stream_foundry_agent(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    """
+    Call Azure Foundry Agent with streaming enabled and yield text as it arrives.
+
+    The endpoint is asked for an OpenAI-style event stream ("data: {json}"
+    lines ending with "data: [DONE]"); an endpoint that answers with a plain
+    JSON completion is yielded as one chunk. Opening the stream is retried
+    like call_foundry_agent_async; once text has been yielded a failure
+    is raised as is.
+
+    Args:
+        messages: List of message dictionaries with role and content
+
+    Yields:
+        Response text fragments
+
+    Raises:
+        FoundryAgentError: The call could not be completed
+    """
+    response = await _with_retries(lambda: _open_stream({"messages": messages, "stream": True}))
+    try:
+        if "text/event-stream" not in response.headers.get("content-type", ""):
+            try:
+                data = json.loads(await response.aread())
+            except ValueError as e:
+                raise FoundryAgentError("bad_response", f"Unexpected response format: {str(e)}", response.status_code)
+            yield _completion_content(data)
+            return
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                choices = json.loads(data).get("choices") or []
+            except (ValueError, AttributeError) as e:
+                raise FoundryAgentError("bad_response", f"Unexpected response format: {str(e)}", response.status_code)
+            content = (choices[0].get("delta") or {}).get("content") if choices else None
+            if content:
+                yield content
+
+    except httpx.HTTPError as e:
+        _breaker.record_failure()
+        raise _transport_error(e)
+    finally:
+        await response.aclose()
+
+
+def transport_stats() -> Dict[str, Any]:
+    """Call counters, circuit breaker state and recent latency of the agent transport."""
+    p50 = _latencies.percentile(50)
+    p95 = _latencies.percentile(95)
+    hedge = hedge_delay()
+    return {
+        **_counters,
+        "breaker_state": _breaker.state,
+        "breaker_opened": _breaker.times_opened,
+        "consecutive_failures": _breaker.failures,
+        "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+        "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        "hedge_delay_ms": round(hedge * 1000, 1) if hedge is not None else None
+    }
+
 
+async def close_foundry_client():
+    """Close the shared async client (called on application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
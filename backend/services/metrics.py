@@ -0,0 +1,276 @@
+"""
+Metrics Service - Latency Histograms and Counters
+Lightweight in-process instrumentation. `span(name, **labels)` times a block
+into the `<name>_seconds` histogram (labelled with its outcome) and, while a
+request is being traced, into that request's timing breakdown. Stats of
+other services are registered with the registry and rendered as gauges, or
+as `_total` counters for the keys that only ever increase. Everything is
+rendered in the Prometheus text format for the /metrics endpoint.
+
+With METRICS_ENABLED=false, span() returns a shared no-op context manager.
+"""
+import os
+import time
+import asyncio
+import bisect
+import threading
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Seconds; spans range from sub-millisecond rule evaluation to multi-second OCR
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    "pipeline_stage_seconds": "Duration of agent pipeline stages",
+    "extraction_seconds": "Duration of text extraction per file format (cache misses)",
+    "ocr_page_seconds": "Duration of OCR per PDF page or image, measured in the worker",
+    "upstream_call_seconds": "Duration of calls to Azure OpenAI, Azure Search and the Foundry agent",
+}
+
+LabelKey = Tuple[Tuple[str, Any], ...]
+
+# Spans of the request being traced: (name, labels, start, duration seconds)
+_request_spans: ContextVar[Optional[list]] = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.counts):
+            self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _StatsProvider:
+    __slots__ = ("provider", "counters", "label")
+
+    def __init__(self, provider: Callable[[], Dict[str, Any]], counters: Tuple[str, ...], label: str):
+        self.provider = provider
+        self.counters = frozenset(counters)
+        self.label = label
+
+
+class MetricsRegistry:
+    """Histograms keyed by metric name and label set, plus registered service stats."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        # prefix -> stats provider
+        self._stats: Dict[str, _StatsProvider] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def register_gauges(self, prefix: str, provider: Callable[[], Dict[str, Any]],
+                        counters: Tuple[str, ...] = (), label: str = "name"):
+        """
+        Expose the numeric values of provider() on /metrics.
+
+        Args:
+            prefix: Metric name prefix, e.g. "extraction_cache"
+            provider: Returns the service's stats; non-numeric values are skipped
+            counters: Keys that only ever increase (hits, retries, ...); they are
+                rendered as `<prefix>_<key>_total` counters, the rest as
+                `<prefix>_<key>` gauges
+            label: Label name for nested values: a stats value that is a dict
+                of {label value: {key: number}} is rendered as one series per
+                label value (e.g. single-flight counters per call name)
+        """
+        self._stats[prefix] = _StatsProvider(provider, tuple(counters), label)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            histograms = {name: {k: _copy(h) for k, h in series.items()} for name, series in self._histograms.items()}
+
+        for name in sorted(histograms):
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(key, le=_number(bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+        for prefix, stats_provider in sorted(self._stats.items()):
+            try:
+                stats = stats_provider.provider()
+            except Exception as e:
+                print(f"Metrics provider {prefix} failed: {e}")
+                continue
+            # metric name -> (type, [(label key, value)])
+            series: Dict[str, Tuple[str, List[Tuple[LabelKey, Any]]]] = {}
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for label_value, nested in value.items():
+                        if isinstance(nested, dict):
+                            for nested_key, nested_value in nested.items():
+                                _add_series(series, prefix, nested_key, nested_value, stats_provider.counters,
+                                            ((stats_provider.label, label_value),))
+                else:
+                    _add_series(series, prefix, key, value, stats_provider.counters, ())
+            for name in sorted(series):
+                kind, samples = series[name]
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(samples, key=lambda sample: str(sample[0])):
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _add_series(series: Dict[str, Tuple[str, list]], prefix: str, key: str, value: Any,
+                counters: frozenset, labels: LabelKey):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return
+    if key in counters:
+        name, kind = f"{prefix}_{key}_total", "counter"
+    else:
+        name, kind = f"{prefix}_{key}", "gauge"
+    series.setdefault(name, (kind, []))[1].append((labels, value))
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    copied = Histogram(histogram.buckets)
+    copied.counts = list(histogram.counts)
+    copied.sum = histogram.sum
+    copied.count = histogram.count
+    return copied
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(key: LabelKey, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+class _Span:
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, labels: Dict[str, Any]):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is None:
+            outcome = "ok"
+        else:
+            outcome = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+        registry.observe(f"{self.name}_seconds", duration, outcome=outcome, **self.labels)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.name, self.labels, self.start, duration, outcome))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """
+    Time a block of code.
+
+    Args:
+        name: Metric name without the _seconds suffix (e.g. "pipeline_stage")
+        **labels: Low-cardinality labels (e.g. stage="retrieval")
+
+    Example:
+        with span("upstream_call", service="openai", operation="classify"):
+            ...
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name, labels)
+
+
+def observe(name: str, seconds: float, outcome: str = "ok", **labels):
+    """Record a duration measured elsewhere (e.g. in a worker process or the stage scheduler)."""
+    if not METRICS_ENABLED:
+        return
+    registry.observe(f"{name}_seconds", seconds, outcome=outcome, **labels)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((name, labels, time.perf_counter() - seconds, seconds, outcome))
+
+
+def trace_request():
+    """
+    Start collecting a per-request timing breakdown in the current context.
+    Tasks and executor calls started afterwards report into it as well.
+
+    Returns:
+        Token for request_timings
+    """
+    return _request_spans.set([]), time.perf_counter()
+
+
+def request_timings(trace) -> List[Dict[str, Any]]:
+    """Spans recorded since trace_request, ordered by start time, in ms from the request start."""
+    token, origin = trace
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return [
+        {
+            "span": name,
+            **labels,
+            "outcome": outcome,
+            "start_ms": round((start - origin) * 1000, 2),
+            "duration_ms": round(duration * 1000, 2)
+        }
+        for name, labels, start, duration, outcome in sorted(spans, key=lambda s: s[2])
+    ]
@@ -0,0 +1,187 @@
+"""
+OCR Engine - Page-Streaming Recognition
+Renders and recognizes image-only PDF pages across a pool of long-lived
+OCR worker processes, keeping only a few pages in flight at a time.
+"""
+import io
+import os
+import time
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+
+from backend.services.metrics import observe
+
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+OCR_DPI = int(os.getenv("OCR_DPI", "300"))
+OCR_MAX_IN_FLIGHT = int(os.getenv("OCR_MAX_IN_FLIGHT", str(OCR_WORKERS * 2)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Extraction threads race to start the pool on first use
+_pool_lock = threading.Lock()
+
+# Per-worker recognizer. With tesserocr installed each worker keeps one
+# Tesseract instance loaded for its whole lifetime; otherwise we fall back to
+# pytesseract, which starts the tesseract binary per call.
+_worker_api = None
+
+
+def _init_worker():
+    """Load the recognizer once when a worker process starts."""
+    global _worker_api
+    try:
+        from tesserocr import PyTessBaseAPI
+        _worker_api = PyTessBaseAPI()
+    except ImportError:
+        _worker_api = None
+
+
+def _recognize(image: Image.Image) -> str:
+    """Recognize text in a single image inside a worker process."""
+    if _worker_api is not None:
+        _worker_api.SetImage(image)
+        return _worker_api.GetUTF8Text()
+    return pytesseract.image_to_string(image)
+
+
+def _worker_error(error: Exception) -> RuntimeError:
+    """
+    Convert a worker exception into one that survives pickling.
+
+    Some OCR exceptions (e.g. pytesseract's TesseractNotFoundError) cannot be
+    unpickled in the parent, which would mark the whole pool as broken.
+    """
+    return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _ocr_pdf_page(pdf_path: str, page_number: int, dpi: int) -> Tuple[str, float]:
+    """
+    Render one PDF page (1-based) and recognize it. Runs in a worker.
+    Returns the text and the seconds spent in the worker.
+    """
+    from pdf2image import convert_from_path
+
+    start = time.perf_counter()
+    try:
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)
+        try:
+            return "".join(_recognize(img) for img in images), time.perf_counter() - start
+        finally:
+            for img in images:
+                img.close()
+    except Exception as e:
+        raise _worker_error(e) from None
+
+
+def _ocr_image_bytes(raw: bytes) -> Tuple[str, float]:
+    """Recognize an encoded image (PNG/JPEG). Runs in a worker; returns text and seconds."""
+    start = time.perf_counter()
+    try:
+        with Image.open(io.BytesIO(raw)) as image:
+            return _recognize(image), time.perf_counter() - start
+    except Exception as e:
+        raise _worker_error(e) from None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared OCR worker pool, starting it on first use."""
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn rather than fork: the API process is multi-threaded
+                _pool = ProcessPoolExecutor(
+                    max_workers=OCR_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+            pool = _pool
+    return pool
+
+
+def iter_ocr_pdf_pages(raw, page_count: Optional[int] = None, dpi: int = OCR_DPI) -> Iterator[str]:
+    """
+    Stream OCR text for each page of an image-only PDF, in page order.
+
+    Pages are rendered and recognized in the worker pool with at most
+    OCR_MAX_IN_FLIGHT pages outstanding, so peak memory stays bounded
+    regardless of document length. Stopping iteration early cancels the
+    pages that have not started yet.
+
+    Args:
+        raw: PDF file contents (bytes-like, e.g. an mmap of the upload)
+        page_count: Number of pages, if already known from a PDF reader
+        dpi: Render resolution
+
+    Returns:
+        Iterator of page texts (possibly empty strings), one per page
+    """
+    # Fail fast in the caller if the renderer is not installed
+    from pdf2image import pdfinfo_from_path
+
+    handle = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    pending = deque()
+    try:
+        handle.write(raw)
+        handle.close()
+
+        if page_count is None:
+            page_count = int(pdfinfo_from_path(handle.name)["Pages"])
+
+        pool = _get_pool()
+        next_page = 1
+
+        def submit():
+            nonlocal next_page
+            pending.append(pool.submit(_ocr_pdf_page, handle.name, next_page, dpi))
+            next_page += 1
+
+        while next_page <= page_count and len(pending) < OCR_MAX_IN_FLIGHT:
+            submit()
+
+        while pending:
+            page_text, seconds = pending.popleft().result()
+            observe("ocr_page", seconds, source="pdf_page")
+            if next_page <= page_count:
+                submit()
+            yield page_text
+    finally:
+        for future in pending:
+            future.cancel()
+        handle.close()
+        try:
+            os.unlink(handle.name)
+        except OSError:
+            pass
+
+
+def ocr_image(raw) -> str:
+    """
+    Recognize text in an encoded image using a long-lived OCR worker.
+
+    Args:
+        raw: PNG or JPEG file contents (bytes-like)
+
+    Returns:
+        Recognized text
+    """
+    # Worker arguments are pickled, so views (mmap, memoryview) become bytes here
+    text, seconds = _get_pool().submit(_ocr_image_bytes, bytes(raw)).result()
+    observe("ocr_page", seconds, source="image")
+    return text
+
+
+def shutdown_ocr_pool():
+    """Terminate OCR worker processes (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
@@ -1,23 +1,129 @@
 """
 Azure OpenAI Service
 Direct Azure OpenAI integration for classification and reasoning.
+
+Clients are process-wide singletons per endpoint so every pipeline stage
+reuses the same keep-alive connection pool instead of paying a new TLS
+handshake per call. Clients are not bound to a deployment (each call names
+its model), so chat and embedding deployments on one endpoint share a pool.
 """
 import os
-from openai import AzureOpenAI
+import threading
+from typing import Dict, Optional
+
+import httpx
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+OPENAI_API_VERSION = "2024-02-15-preview"
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+OPENAI_WARMUP = os.getenv("OPENAI_WARMUP", "false").lower() in ("1", "true", "yes")
+
+ClientKey = Optional[str]
+
+_clients: Dict[ClientKey, AzureOpenAI] = {}
+_async_clients: Dict[ClientKey, AsyncAzureOpenAI] = {}
+_http_clients: Dict[ClientKey, httpx.Client] = {}
+_lock = threading.Lock()
+
+
+def _client_key(endpoint: Optional[str]) -> ClientKey:
+    return endpoint or os.getenv("AZURE_OPENAI_ENDPOINT")
 
-def get_openai_client() -> AzureOpenAI:
-    """Get configured Azure OpenAI client."""
-    return AzureOpenAI(
-        api_key=os.getenv("AZURE_OPENAI_KEY"),
-        api_version="2024-02-15-preview",
-        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SECONDS
     )
 
 
+def get_openai_client(endpoint: Optional[str] = None) -> AzureOpenAI:
+    """
+    Get the shared Azure OpenAI client for an endpoint.
+
+    Args:
+        endpoint: Azure OpenAI endpoint (defaults to AZURE_OPENAI_ENDPOINT)
+
+    Returns:
+        Lazily created client backed by a pooled keep-alive HTTP client
+    """
+    key = _client_key(endpoint)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                http_client = httpx.Client(limits=_pool_limits(), timeout=OPENAI_TIMEOUT_SECONDS)
+                client = AzureOpenAI(
+                    api_key=os.getenv("AZURE_OPENAI_KEY"),
+                    api_version=OPENAI_API_VERSION,
+                    azure_endpoint=key,
+                    http_client=http_client
+                )
+                _http_clients[key] = http_client
+                _clients[key] = client
+    return client
+
+
+def get_async_openai_client(endpoint: Optional[str] = None) -> AsyncAzureOpenAI:
+    """Async counterpart of get_openai_client, for use on the event loop."""
+    key = _client_key(endpoint)
+    client = _async_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _async_clients.get(key)
+            if client is None:
+                client = AsyncAzureOpenAI(
+                    api_key=os.getenv("AZURE_OPENAI_KEY"),
+                    api_version=OPENAI_API_VERSION,
+                    azure_endpoint=key,
+                    http_client=httpx.AsyncClient(limits=_pool_limits(), timeout=OPENAI_TIMEOUT_SECONDS)
+                )
+                _async_clients[key] = client
+    return client
+
+
+def warm_up_openai_client(endpoint: Optional[str] = None) -> bool:
+    """
+    Create the shared client and open a pooled connection to the endpoint,
+    so the first user request does not pay for DNS and the TLS handshake.
+
+    Returns:
+        True if a connection was established (any HTTP status counts)
+    """
+    key = _client_key(endpoint)
+    if not key:
+        return False
+    get_openai_client(key)
+    try:
+        _http_clients[key].get(key, timeout=5)
+        return True
+    except httpx.HTTPError as e:
+        print(f"OpenAI warm-up failed: {e}")
+        return False
+
+
+async def close_openai_clients():
+    """Close every pooled client (called on application shutdown)."""
+    with _lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+        _http_clients.clear()
+    for client in clients:
+        client.close()
+    for client in async_clients:
+        await client.close()
+
+
 def classify_intent_with_openai(query: str) -> dict:
     """
     Classify user intent using Azure OpenAI.
@@ -25,4 +131,3 @@ def classify_intent_with_openai(query: str) -> dict:
     """
     from backend.agents.classifier import classify_intent
     return classify_intent(query)
-
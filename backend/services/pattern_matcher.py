@@ -0,0 +1,112 @@
+"""
+Pattern Matcher - Multi-Phrase Scanning
+Aho-Corasick automaton that finds every occurrence of a set of phrases in
+one left-to-right pass over the text, so scanning cost is linear in the
+text length regardless of how many phrases are registered.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+
+class PhraseMatch(NamedTuple):
+    start: int
+    end: int
+    phrase: str
+    payload: Any
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class PhraseMatcher:
+    """
+    Case-insensitive Aho-Corasick matcher over a fixed phrase set.
+
+    The automaton is compiled into a full transition table (one dict per
+    state), so the scan loop is a single dict lookup per character. With
+    whole_words, matches must start and end on word boundaries ("no" does
+    not match inside "not").
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, Any]], whole_words: bool = True):
+        """
+        Args:
+            phrases: (phrase, payload) pairs; a phrase may appear more than
+                once with different payloads
+            whole_words: Only report matches bounded by non-word characters
+        """
+        self.whole_words = whole_words
+        self._goto: List[Dict[str, int]] = [{}]
+        self._outputs: List[List[Tuple[int, str, Any]]] = [[]]
+
+        for phrase, payload in phrases:
+            key = phrase.lower()
+            if not key:
+                continue
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._outputs.append([])
+                state = nxt
+            self._outputs[state].append((len(key), phrase, payload))
+
+        self._compile()
+
+    def _compile(self):
+        """Add failure links and fold them into a complete transition table."""
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        order = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                target = fail[state]
+                while target and ch not in self._goto[target]:
+                    target = fail[target]
+                fail[nxt] = self._goto[target].get(ch, 0)
+                self._outputs[nxt] = self._outputs[nxt] + self._outputs[fail[nxt]]
+
+        # Breadth-first order guarantees a state's failure target is complete first
+        delta = [dict(self._goto[0])] + [None] * (len(self._goto) - 1)
+        for state in order:
+            delta[state] = {**delta[fail[state]], **self._goto[state]}
+        self._delta = delta
+
+    def finditer(self, text: str) -> Iterator[PhraseMatch]:
+        """Yield every (possibly overlapping) phrase occurrence in text, by end position."""
+        delta, outputs = self._delta, self._outputs
+        folded = text.lower()
+        if len(folded) != len(text):
+            # A few characters lower-case to two; keep those as-is so offsets index the original text
+            folded = "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+        state = 0
+        for index, ch in enumerate(folded):
+            # Every state's table includes the root transitions; anything else restarts
+            state = delta[state].get(ch, 0)
+            if not outputs[state]:
+                continue
+            end = index + 1
+            for length, phrase, payload in outputs[state]:
+                start = end - length
+                if self.whole_words and not self._on_boundaries(text, start, end):
+                    continue
+                yield PhraseMatch(start, end, phrase, payload)
+
+    def find_payloads(self, text: str) -> set:
+        """Distinct payloads of all matches in text."""
+        return {match.payload for match in self.finditer(text)}
+
+    @staticmethod
+    def _on_boundaries(text: str, start: int, end: int) -> bool:
+        if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+            return False
+        if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+            return False
+        return True
@@ -0,0 +1,123 @@
+"""
+Pipeline Scheduler - Stage Graph Execution
+Runs pipeline stages as a dependency graph so independent agents execute
+concurrently, with per-stage timeouts, fallbacks and timings.
+"""
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from backend.services.metrics import observe
+
+PIPELINE_STAGE_TIMEOUT_SECONDS = float(os.getenv("PIPELINE_STAGE_TIMEOUT_SECONDS", "30"))
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Stage:
+    """A named unit of pipeline work with declared dependencies."""
+
+    def __init__(self, name: str, func: StageFunc, depends_on: Iterable[str] = (),
+                 timeout: Optional[float] = None, fallback: Any = None):
+        """
+        Args:
+            name: Unique stage name; its result is stored under this key
+            func: Async function receiving the results of all finished stages
+            depends_on: Names of stages that must finish first
+            timeout: Seconds before the stage is abandoned (default
+                PIPELINE_STAGE_TIMEOUT_SECONDS)
+            fallback: Result used when the stage fails or times out; a
+                callable is invoked with the results dict
+        """
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout if timeout is not None else PIPELINE_STAGE_TIMEOUT_SECONDS
+        self.fallback = fallback
+
+
+class StageGraph:
+    """Validated set of stages that can be executed concurrently."""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names in pipeline")
+        for stage in stages:
+            missing = [dep for dep in stage.depends_on if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle through '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Execute every stage as soon as its dependencies have finished.
+
+        A failing or timed-out stage records its fallback result, so
+        downstream stages always run.
+
+        Returns:
+            Dictionary with "results" (stage name -> result) and "timings"
+            (stage name -> start/duration in ms and status)
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        origin = time.perf_counter()
+
+        async def execute(stage: Stage):
+            if stage.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in stage.depends_on))
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                result = await asyncio.wait_for(stage.func(results), timeout=stage.timeout)
+            except asyncio.TimeoutError:
+                status = "timeout"
+                result = self._fallback(stage, results)
+            except Exception as e:
+                status = f"error: {e}"
+                result = self._fallback(stage, results)
+            end = time.perf_counter()
+            observe("pipeline_stage", end - start, outcome=status.split(":")[0], stage=stage.name)
+            results[stage.name] = result
+            timings[stage.name] = {
+                "start_ms": round((start - origin) * 1000, 2),
+                "duration_ms": round((end - start) * 1000, 2),
+                "status": status
+            }
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+        await asyncio.gather(*tasks.values())
+
+        timings["total"] = {
+            "start_ms": 0.0,
+            "duration_ms": round((time.perf_counter() - origin) * 1000, 2),
+            "status": "ok"
+        }
+        return {"results": results, "timings": timings}
+
+    @staticmethod
+    def _fallback(stage: Stage, results: Dict[str, Any]) -> Any:
+        if callable(stage.fallback):
+            return stage.fallback(results)
+        return stage.fallback
@@ -0,0 +1,129 @@
+"""
+Retrieval Cache - Search Result Caching
+Caches retrieved policy documents per (query, intent, top_k, fields, index)
+and drops everything when the index version or ingestion state changes.
+"""
+import os
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "900"))
+RETRIEVAL_CACHE_VERSION_CHECK_SECONDS = float(os.getenv("RETRIEVAL_CACHE_VERSION_CHECK_SECONDS", "60"))
+
+
+def make_retrieval_key(query: str, intent: str, top_k: int, fields: List[str], index_name: str) -> Tuple:
+    """Cache key for one search call."""
+    return (query, intent, top_k, tuple(fields), index_name)
+
+
+class RetrievalCache:
+    """TTL + LRU cache of search results, invalidated on index version change."""
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE, ttl_seconds: float = RETRIEVAL_CACHE_TTL_SECONDS,
+                 version_check_seconds: float = RETRIEVAL_CACHE_VERSION_CHECK_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        # key -> (documents, expires_at, miss_latency_ms)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # index name -> (version provider, last known version, last check time)
+        self._versions: Dict[str, list] = {}
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0, "expirations": 0, "evictions": 0}
+        self._saved_ms = 0.0
+
+    def register_version_provider(self, index_name: str, provider: Callable[[], Optional[str]]):
+        """
+        Register how to read the current version of an index.
+
+        The provider is polled at most every version_check_seconds; when the
+        value it returns changes, all cached results for that index are dropped.
+
+        Args:
+            index_name: Search index name used in cache keys
+            provider: Returns a version string (e.g. etag + document count +
+                ingestion timestamp), or None if it cannot be determined
+        """
+        with self._lock:
+            self._versions[index_name] = [provider, None, 0.0]
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return a copy of cached documents for key, or None."""
+        if self.max_entries <= 0:
+            return None
+        self._check_version(key[-1])
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < now:
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            self._saved_ms += entry[2]
+            return copy.deepcopy(entry[0])
+
+    def put(self, key: Tuple, documents: List[Dict[str, Any]], latency_ms: float = 0.0):
+        """Cache documents for key; latency_ms is what a future hit saves."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(documents), time.monotonic() + self.ttl_seconds, latency_ms)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def invalidate(self, index_name: Optional[str] = None):
+        """Drop cached results for one index, or for all indexes."""
+        with self._lock:
+            if index_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[-1] == index_name]:
+                    del self._entries[key]
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the search latency saved by hits."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+                "saved_ms": round(self._saved_ms, 2)
+            }
+
+    def _check_version(self, index_name: str):
+        with self._lock:
+            state = self._versions.get(index_name)
+            if state is None or time.monotonic() - state[2] < self.version_check_seconds:
+                return
+            provider, known = state[0], state[1]
+            # Claim this check so concurrent callers do not poll as well
+            state[2] = time.monotonic()
+
+        try:
+            current = provider()
+        except Exception as e:
+            print(f"Index version check failed for {index_name}: {e}")
+            return
+
+        if current is None:
+            return
+        with self._lock:
+            state[1] = current
+        if known is not None and current != known:
+            self.invalidate(index_name)
+
+
+retrieval_cache = RetrievalCache()
@@ -1,62 +1,171 @@
 """
 Runbook Service - Safe Automation
 Evaluates rules and executes safe, predefined actions.
+
+Rules come from data/runbook.jsonlines. Each rule's trigger is compiled once
+into predicates and the rules are bucketed by trigger intent, so evaluating a
+context only visits rules for its intent plus rules without an intent. The
+file is reloaded when its mtime changes.
+
+Trigger keys:
+    intent          context intent equals the value (indexed)
+    <field>_min     context[field] >= value (e.g. confidence_min)
+    <field>_max     context[field] <= value
+    <field>         context[field] equals the value, or is one of a list
 """
+import os
 import json
-from typing import Dict, Any, List
+import time
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNBOOK_PATH = os.getenv("RUNBOOK_PATH", os.path.join(BACKEND_DIR, "data", "runbook.jsonlines"))
+# Minimum seconds between mtime checks, so hot paths do not stat the file per call
+RUNBOOK_RELOAD_CHECK_SECONDS = float(os.getenv("RUNBOOK_RELOAD_CHECK_SECONDS", "1.0"))
+
+_MISSING = object()
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _compile_condition(key: str, value: Any) -> Predicate:
+    """One trigger entry as a predicate over the context."""
+    if key.endswith("_min"):
+        field = key[:-4]
+        return lambda ctx: isinstance(ctx.get(field), (int, float)) and ctx[field] >= value
+    if key.endswith("_max"):
+        field = key[:-4]
+        return lambda ctx: isinstance(ctx.get(field), (int, float)) and ctx[field] <= value
+    if isinstance(value, list):
+        allowed = frozenset(value)
+        return lambda ctx: ctx.get(key, _MISSING) in allowed
+    return lambda ctx: ctx.get(key, _MISSING) == value
+
+
+class Rule:
+    """A runbook rule with its compiled (non-intent) trigger conditions."""
+
+    __slots__ = ("rule_id", "name", "action", "priority", "intent", "conditions", "result")
+
+    def __init__(self, spec: Dict[str, Any]):
+        trigger = dict(spec.get("trigger") or {})
+        self.rule_id = spec.get("rule_id")
+        self.name = spec["name"]
+        self.action = spec["action"]
+        self.priority = spec.get("priority", "low")
+        self.intent = trigger.pop("intent", None)
+        self.conditions: Tuple[Predicate, ...] = tuple(_compile_condition(k, v) for k, v in trigger.items())
+        self.result = {"rule_id": self.rule_id, "name": self.name, "action": self.action, "priority": self.priority}
+
+
+class Runbook:
+    """Compiled rule set with an intent index."""
+
+    def __init__(self, rules: List[Rule], mtime: float = 0.0):
+        self.rules = rules
+        self.mtime = mtime
+        wildcard = [rule for rule in rules if rule.intent is None]
+        # intent -> its rules plus the intent-free rules, in file order
+        self.by_intent: Dict[Any, List[Rule]] = {}
+        for rule in rules:
+            if rule.intent is not None and rule.intent not in self.by_intent:
+                self.by_intent[rule.intent] = [r for r in rules if r.intent in (None, rule.intent)]
+        self.wildcard = wildcard
+
+    @classmethod
+    def load(cls, path: str) -> "Runbook":
+        mtime = os.path.getmtime(path)
+        rules = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    rules.append(Rule(json.loads(line)))
+                except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    print(f"Skipping invalid runbook rule on line {line_number}: {e}")
+        return cls(rules, mtime)
+
+    def evaluate(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        candidates = self.by_intent.get(context.get("intent"), self.wildcard)
+        triggered_rules = []
+        for rule in candidates:
+            try:
+                # A rule matches when none of its conditions fails
+                for condition in rule.conditions:
+                    if not condition(context):
+                        break
+                else:
+                    triggered_rules.append(dict(rule.result))
+            except Exception as e:
+                print(f"Rule evaluation error: {e}")
+
+        return {
+            "triggered_rules": triggered_rules,
+            "actions_taken": [r["action"] for r in triggered_rules],
+            "rule_count": len(triggered_rules)
+        }
+
+
+_runbook: Optional[Runbook] = None
+_last_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_runbook(path: str = RUNBOOK_PATH) -> Runbook:
+    """
+    Return the compiled runbook, reloading it when the file's mtime has
+    changed. A file that cannot be read keeps the last good rule set.
+    """
+    global _runbook, _last_check
+    now = time.monotonic()
+    if _runbook is not None and now - _last_check < RUNBOOK_RELOAD_CHECK_SECONDS:
+        return _runbook
+
+    with _reload_lock:
+        if _runbook is not None and now - _last_check < RUNBOOK_RELOAD_CHECK_SECONDS:
+            return _runbook
+        _last_check = now
+        try:
+            if _runbook is None or os.path.getmtime(path) != _runbook.mtime:
+                _runbook = Runbook.load(path)
+        except OSError as e:
+            print(f"Could not load runbook {path}: {e}")
+            if _runbook is None:
+                _runbook = Runbook([])
+    return _runbook
 
 
 def evaluate_rules(context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Evaluate runbook rules based on context.
-    
+
     Args:
         context: Dictionary with intent, docs, and other contextual data
-        
+            (e.g. confidence, escalation, priority)
+
     Returns:
         Runbook evaluation results with actions to take
     """
-    intent = context.get("intent", "")
-    docs = context.get("docs", [])
-    
-    # Define runbook rules
-    rules = [
-        {
-            "name": "Send confirmation email",
-            "condition": lambda ctx: ctx.get("intent") == "eligibility_question" and len(ctx.get("docs", [])) > 0,
-            "action": "email_confirmation",
-            "priority": "low"
-        },
-        {
-            "name": "Create support ticket",
-            "condition": lambda ctx: ctx.get("intent") == "escalation_needed",
-            "action": "create_ticket",
-            "priority": "high"
-        },
-        {
-            "name": "Log query for analytics",
-            "condition": lambda ctx: True,  # Always log
-            "action": "log_query",
-            "priority": "low"
-        }
-    ]
-    
-    triggered_rules = []
-    for rule in rules:
-        try:
-            if rule["condition"](context):
-                triggered_rules.append({
-                    "name": rule["name"],
-                    "action": rule["action"],
-                    "priority": rule["priority"]
-                })
-        except Exception as e:
-            print(f"Rule evaluation error: {e}")
-    
+    return get_runbook().evaluate(context)
+
+
+def build_rule_context(classification: Dict[str, Any], docs: List[Dict], escalation: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rule context from the pipeline's classification, retrieval and
+    escalation results, with the fields data/runbook.jsonlines triggers on.
+    """
     return {
-        "triggered_rules": triggered_rules,
-        "actions_taken": [r["action"] for r in triggered_rules],
-        "rule_count": len(triggered_rules)
+        "intent": classification.get("intent"),
+        "confidence": classification.get("confidence"),
+        "escalation": bool(escalation.get("should_escalate")),
+        "priority": escalation.get("priority"),
+        "docs": docs
     }
 
-    
\ No newline at end of file
+
+def evaluate_rules_batch(contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Evaluate many contexts against one snapshot of the runbook."""
+    runbook = get_runbook()
+    return [runbook.evaluate(context) for context in contexts]
@@ -1,50 +1,99 @@
 """
 Azure Cognitive Search Service
-Handles search operations against the knowledge base.
+Handles search operations against the knowledge base, and owns the shared
+sync and async SearchClients so callers reuse one connection pool per index.
 """
 import os
-from typing import List, Dict
+import threading
+from typing import List, Dict, Optional, Tuple
 from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.core.credentials import AzureKeyCredential
 from dotenv import load_dotenv
 
+from backend.services.metrics import span
+
 load_dotenv()
 
+# (endpoint, index name) -> client
+_clients: Dict[Tuple[str, str], SearchClient] = {}
+_async_clients: Dict[Tuple[str, str], AsyncSearchClient] = {}
+_clients_lock = threading.Lock()
+
+
+def search_settings(index_name: Optional[str] = None) -> Optional[Tuple[str, str, str]]:
+    """Return (endpoint, key, index name), or None when search is not configured."""
+    search_endpoint = os.getenv("SEARCH_ENDPOINT")
+    search_key = os.getenv("SEARCH_API_KEY")
+    if not search_endpoint or not search_key:
+        return None
+    return search_endpoint, search_key, index_name or os.getenv("SEARCH_INDEX", "immigration-policies")
+
+
+def get_search_client(index_name: Optional[str] = None) -> Optional[SearchClient]:
+    """Shared SearchClient for the configured endpoint and index, or None if unconfigured."""
+    settings = search_settings(index_name)
+    if settings is None:
+        return None
+    endpoint, key, index = settings
+    with _clients_lock:
+        client = _clients.get((endpoint, index))
+        if client is None:
+            client = SearchClient(endpoint=endpoint, index_name=index, credential=AzureKeyCredential(key))
+            _clients[(endpoint, index)] = client
+        return client
+
+
+def get_async_search_client(index_name: Optional[str] = None) -> Optional[AsyncSearchClient]:
+    """Shared async SearchClient (aiohttp transport), or None if unconfigured."""
+    settings = search_settings(index_name)
+    if settings is None:
+        return None
+    endpoint, key, index = settings
+    with _clients_lock:
+        client = _async_clients.get((endpoint, index))
+        if client is None:
+            client = AsyncSearchClient(endpoint=endpoint, index_name=index, credential=AzureKeyCredential(key))
+            _async_clients[(endpoint, index)] = client
+        return client
+
+
+async def close_search_clients():
+    """Close every shared client; call on application shutdown."""
+    with _clients_lock:
+        clients, async_clients = list(_clients.values()), list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for client in async_clients:
+        await client.close()
+
 
 def search_utterances(query: str, top_k: int = 5) -> List[Dict]:
     """
     Search for relevant documents using Azure Cognitive Search.
-    
+
     Args:
         query: Search query
         top_k: Number of results to return
-        
+
     Returns:
         List of search results
     """
     try:
-        search_endpoint = os.getenv("SEARCH_ENDPOINT")
-        search_key = os.getenv("SEARCH_API_KEY")
-        index_name = os.getenv("SEARCH_INDEX", "immigration-policies")
-        
-        if not search_endpoint or not search_key:
+        search_client = get_search_client()
+        if search_client is None:
             return []
-        
-        search_client = SearchClient(
-            endpoint=search_endpoint,
-            index_name=index_name,
-            credential=AzureKeyCredential(search_key)
-        )
-        
-        results = search_client.search(
-            search_text=query,
-            top=top_k,
-            select=["id", "title", "content", "source"]
-        )
-        
-        return [dict(result) for result in results]
-        
+
+        with span("upstream_call", service="search", operation="utterances"):
+            results = search_client.search(
+                search_text=query,
+                top=top_k,
+                select=["id", "title", "content", "source"]
+            )
+            return [dict(result) for result in results]
+
     except Exception as e:
         print(f"Search error: {e}")
         return []
-
@@ -1,24 +1,231 @@
 """
 Session storage service using Azure Cosmos DB.
 For demo purposes, using in-memory storage with Cosmos-compatible interface.
+
+The in-memory store is bounded: messages are kept as compact (seq, role,
+content) tuples, each session keeps at most SESSION_MAX_MESSAGES messages, and the
+whole store stays under SESSION_MAX_BYTES by evicting the least recently
+used sessions. Sessions idle for SESSION_TTL_SECONDS expire. Every message
+gets a sequence number from one store-wide counter, which clients use as a
+cursor to fetch what they have not seen yet; numbers only increase within a
+session, even when it expires and the same id is used again, but are not
+contiguous.
 """
 import os
-from typing import Dict, Any
+import sys
+import time
+import uuid
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 # In production, this would use:
 # from azure.cosmos import CosmosClient
 
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "50"))
+SESSION_MAX_MESSAGE_CHARS = int(os.getenv("SESSION_MAX_MESSAGE_CHARS", "32000"))
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", str(6 * 3600)))
+SESSION_PAGE_SIZE = int(os.getenv("SESSION_PAGE_SIZE", "50"))
+
+# Approximate per-message and per-session bookkeeping cost beyond the content string
+_MESSAGE_OVERHEAD = sys.getsizeof((None, None, None)) + 36
+_SESSION_OVERHEAD = 512
+
+# (seq, role, content)
+Message = Tuple[int, str, str]
+
+
+class _Session:
+    __slots__ = ("messages", "size", "last_access", "next_seq")
+
+    def __init__(self, now: float, next_seq: int = 1):
+        self.messages: List[Message] = []
+        self.size = _SESSION_OVERHEAD
+        self.last_access = now
+        self.next_seq = next_seq
+
+
+def _message_size(message: Message) -> int:
+    return _MESSAGE_OVERHEAD + sys.getsizeof(message[2])
+
+
 class SessionStore:
     """Session store with Cosmos DB-compatible interface."""
-    
-    def __init__(self):
+
+    def __init__(self, max_bytes: int = SESSION_MAX_BYTES, max_messages: int = SESSION_MAX_MESSAGES,
+                 ttl_seconds: float = SESSION_TTL_SECONDS, max_message_chars: int = SESSION_MAX_MESSAGE_CHARS,
+                 clock: Callable[[], float] = time.monotonic):
         # In-memory storage for demo reliability
         # Production would initialize: CosmosClient(endpoint, credential)
-        self._sessions = {}
-    
-    def get_session(self, session_id: str) -> Dict[str, Any]:
-        return self._sessions.get(session_id, [])
-    
+        self.max_bytes = max_bytes
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_message_chars = max_message_chars
+        self._clock = clock
+        # Least recently used first
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        # Next sequence number for any session
+        self._next_seq = 1
+        self._lock = threading.Lock()
+        self._counters = {"evictions": 0, "expirations": 0, "trimmed_messages": 0}
+
+    def create_session(self) -> str:
+        """Start an empty session and return its id."""
+        session_id = str(uuid.uuid4())
+        with self._lock:
+            self._touch(session_id, self._clock())
+        return session_id
+
+    def get_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """Messages of a session as role/content dicts; [] for unknown or expired ids."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            return [{"role": role, "content": content} for _, role, content in session.messages]
+
+    def get_messages(self, session_id: str, after: int = 0,
+                     limit: int = SESSION_PAGE_SIZE) -> Optional[Dict[str, Any]]:
+        """
+        One page of a session's messages, oldest first.
+
+        Args:
+            session_id: Session to read
+            after: Cursor; only messages with a higher sequence number are returned
+            limit: Maximum messages in the page
+
+        Returns:
+            Dictionary with messages (seq, role, content), first_seq and
+            last_seq of the stored transcript, and next_cursor (None on the
+            last page); None for unknown or expired sessions
+        """
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            session.last_access = now
+            self._sessions.move_to_end(session_id)
+            messages = session.messages
+            start = bisect.bisect_right(messages, after, key=lambda m: m[0])
+            page = messages[start:start + max(limit, 0)]
+            has_more = start + len(page) < len(messages)
+            return {
+                "session_id": session_id,
+                "messages": [{"seq": seq, "role": role, "content": content} for seq, role, content in page],
+                "first_seq": messages[0][0] if messages else 0,
+                "last_seq": session.next_seq - 1,
+                "next_cursor": page[-1][0] if has_more and page else None
+            }
+
+    def last_seq(self, session_id: str) -> int:
+        """Cursor past every message of the session so far (0 for unknown or expired sessions)."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            return session.next_seq - 1 if session is not None else 0
+
     def save_session(self, session_id: str, messages: list):
-        self._sessions[session_id] = messages
+        """Replace a session's messages."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            # Sequence numbers keep increasing across a replace
+            previous = self._sessions.get(session_id)
+            self._drop(session_id)
+            session = self._touch(session_id, now)
+            if previous is not None:
+                session.next_seq = previous.next_seq
+            for message in messages:
+                self._append(session, message.get("role", "user"), message.get("content", ""))
+            self._enforce_cap(keep=session_id)
+
+    def append_message(self, session_id: str, role: str, content: str) -> int:
+        """Add one message, creating the session if it is unknown or expired; returns its seq."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._touch(session_id, now)
+            seq = self._append(session, role, content)
+            self._enforce_cap(keep=session_id)
+            return seq
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            self._drop(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current size of the store and eviction counters."""
+        with self._lock:
+            self._expire(self._clock())
+            return {
+                **self._counters,
+                "sessions": len(self._sessions),
+                "messages": sum(len(s.messages) for s in self._sessions.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _touch(self, session_id: str, now: float) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _Session(now, self._next_seq)
+            self._sessions[session_id] = session
+            self._bytes += session.size
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _append(self, session: _Session, role: str, content: str) -> int:
+        content = str(content or "")[:self.max_message_chars]
+        seq = max(session.next_seq, self._next_seq)
+        session.next_seq = self._next_seq = seq + 1
+        message = (seq, sys.intern(str(role)), content)
+        session.messages.append(message)
+        added = _message_size(message)
+        session.size += added
+        self._bytes += added
+        # Per-session cap: drop the oldest messages
+        overflow = len(session.messages) - self.max_messages
+        if overflow > 0:
+            removed = sum(_message_size(m) for m in session.messages[:overflow])
+            del session.messages[:overflow]
+            session.size -= removed
+            self._bytes -= removed
+            self._counters["trimmed_messages"] += overflow
+        return seq
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session.size
+
+    def _expire(self, now: float):
+        # Sessions are ordered by last access, so expired ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl_seconds:
+                break
+            self._drop(session_id)
+            self._counters["expirations"] += 1
+
+    def _enforce_cap(self, keep: Optional[str] = None):
+        # Evict least recently used sessions; the session being written is kept
+        while self._bytes > self.max_bytes and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            self._drop(session_id)
+            self._counters["evictions"] += 1
+
 
+session_store = SessionStore()
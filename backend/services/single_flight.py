@@ -0,0 +1,126 @@
+"""
+Single-Flight Service - Coalescing Identical Upstream Calls
+When many students ask the same question at once, identical calls to the
+classifier, search and explainer are collapsed: the first caller for a key
+starts the call and every concurrent caller with the same key awaits that
+same in-flight future. The key is a hash of the call name and its
+canonicalized arguments. Results (copied per waiter) and exceptions fan
+out to all waiters; the key is released as soon as the call finishes, so
+this is not a cache.
+"""
+import os
+import copy
+import json
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Upper bound for one shared call; waiters get asyncio.TimeoutError after it
+SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_SECONDS", "60"))
+
+T = TypeVar("T")
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-compatible form of value in which equal arguments compare equal."""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=repr)
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return repr(value)
+
+
+def make_flight_key(name: str, *args, **kwargs) -> Tuple[str, str]:
+    """Key for a call: its name plus a hash of the canonicalized arguments."""
+    encoded = json.dumps([_canonical(args), _canonical(kwargs)], sort_keys=True, separators=(",", ":"))
+    return name, hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one in-flight task."""
+
+    def __init__(self, timeout: float = SINGLE_FLIGHT_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._flights: Dict[Tuple[str, str], "asyncio.Task"] = {}
+        # call name -> counters
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, key: Tuple[str, str], func: Callable[[], Awaitable[T]],
+                 timeout: Optional[float] = None) -> T:
+        """
+        Run func() for key, or join the call already in flight for key.
+
+        Args:
+            key: Flight key from make_flight_key
+            func: Starts the upstream call; only invoked by the first caller
+            timeout: Seconds the shared call may take (defaults to self.timeout)
+
+        Returns:
+            The call's result; callers that joined get a deep copy
+
+        Raises:
+            Whatever the shared call raised, or asyncio.TimeoutError
+        """
+        counters = self._counters.setdefault(key[0], {"calls": 0, "executions": 0, "coalesced": 0,
+                                                      "errors": 0, "timeouts": 0})
+        counters["calls"] += 1
+
+        flight = self._flights.get(key)
+        joined = flight is not None
+        if joined:
+            counters["coalesced"] += 1
+        else:
+            counters["executions"] += 1
+            flight = asyncio.ensure_future(self._run(key, func, self.timeout if timeout is None else timeout))
+            self._flights[key] = flight
+
+        # A waiter that is cancelled must not cancel the call the others share
+        result = await asyncio.shield(flight)
+        return copy.deepcopy(result) if joined else result
+
+    async def _run(self, key: Tuple[str, str], func: Callable[[], Awaitable[T]], timeout: float) -> T:
+        counters = self._counters[key[0]]
+        try:
+            return await asyncio.wait_for(func(), timeout)
+        except asyncio.TimeoutError:
+            counters["timeouts"] += 1
+            raise
+        except Exception:
+            counters["errors"] += 1
+            raise
+        finally:
+            self._flights.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per call name: calls, upstream executions, coalesced waiters, errors and timeouts."""
+        return {
+            "in_flight": len(self._flights),
+            "calls": {name: dict(counters) for name, counters in self._counters.items()}
+        }
+
+
+upstream_flights = SingleFlight()
+
+
+async def coalesce(name: str, args: Tuple, func: Callable[[], Awaitable[T]],
+                   timeout: Optional[float] = None) -> T:
+    """
+    Run func() once for all concurrent callers passing the same name and args.
+
+    Args:
+        name: Call name (e.g. "classify_intent")
+        args: Arguments that determine the result
+        func: Starts the call
+        timeout: Per-key timeout in seconds (defaults to SINGLE_FLIGHT_TIMEOUT_SECONDS)
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return await func()
+    return await upstream_flights.do(make_flight_key(name, *args), func, timeout)
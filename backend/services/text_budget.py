@@ -0,0 +1,69 @@
+"""
+Text Budget Helpers
+Lazily assemble extracted text so parsing and OCR stop once the caller's
+character budget is met.
+"""
+import codecs
+from typing import Iterable, Optional
+
+FULL_TEXT = None  # pass as max_chars to extract the whole document
+
+
+def join_within_budget(chunks: Iterable[str], separator: str = "\n", max_chars: Optional[int] = FULL_TEXT,
+                       skip_blank: bool = True) -> str:
+    """
+    Join text chunks (pages, paragraphs, OCR pages), consuming the iterable
+    only until the joined text reaches max_chars.
+
+    Empty or whitespace-only chunks are skipped unless skip_blank is False
+    (e.g. to keep blank DOCX paragraphs as line breaks). If chunks is a generator it
+    is closed when the budget is met, so any pending work it owns (e.g. OCR
+    pages in flight) is cancelled.
+
+    Args:
+        chunks: Iterable of text chunks, produced lazily
+        separator: String placed between chunks
+        max_chars: Character budget, or FULL_TEXT to consume everything
+        skip_blank: Drop empty and whitespace-only chunks
+
+    Returns:
+        Joined text; may exceed max_chars by at most one chunk, callers slice
+    """
+    parts = []
+    total = 0
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            if skip_blank and (not chunk or not chunk.strip()):
+                continue
+            if parts:
+                total += len(separator)
+            parts.append(chunk)
+            total += len(chunk)
+            if max_chars is not None and total >= max_chars:
+                break
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    return separator.join(parts)
+
+
+def decode_within_budget(raw, encoding: str = "utf-8", max_chars: Optional[int] = FULL_TEXT) -> str:
+    """
+    Decode only as many bytes as needed to produce max_chars characters.
+
+    UTF-8 uses at most 4 bytes per character, so the first 4 * max_chars
+    bytes always cover the budget. A character split at the cut is dropped.
+
+    Args:
+        raw: Encoded text (bytes, memoryview or mmap)
+        encoding: Codec name (utf-8 family)
+        max_chars: Character budget, or FULL_TEXT to decode everything
+
+    Returns:
+        Decoded text
+    """
+    if max_chars is not None:
+        raw = raw[:max_chars * 4]
+    return codecs.decode(raw, encoding, "ignore")
@@ -0,0 +1,123 @@
+"""
+Text Extraction - File Contents to Text
+The one extractor behind /process and /api/upload: JSON, TXT, PDF (text
+layer first, OCR of rendered pages otherwise), DOCX and images. Results are
+cached by content and extraction options, so a file sent to one endpoint is
+not parsed again by the other.
+"""
+import codecs
+import json
+from typing import Optional
+
+from PyPDF2 import PdfReader
+from docx import Document
+
+from backend.services.extraction_cache import extraction_cache, make_cache_key, timed_extraction, ExtractionFailure
+from backend.services.ocr_engine import iter_ocr_pdf_pages, ocr_image
+from backend.services.upload_intake import UploadBuffer, as_stream
+from backend.services.text_budget import join_within_budget, decode_within_budget, FULL_TEXT
+
+EXTRACTOR_VERSION = 3  # bump when extraction output changes (invalidates cache)
+
+
+def extract_cached(filename: str, raw: UploadBuffer, max_chars: Optional[int] = FULL_TEXT) -> str:
+    """
+    Extract text through the shared extraction cache.
+
+    Args:
+        filename: Lower-cased filename (its extension selects the parser)
+        raw: File contents (bytes or mmap)
+        max_chars: Stop once this many characters are available (FULL_TEXT for all)
+
+    Returns:
+        Extracted text, or an ExtractionFailure message
+    """
+    # Identical content was already parsed (and possibly OCR'd) before
+    key = make_cache_key(raw, filename, max_chars, EXTRACTOR_VERSION)
+    return extraction_cache.get_or_extract(
+        key, lambda: timed_extraction(filename, extract_text_from_bytes, filename, raw, max_chars)
+    )
+
+
+def extract_text_from_bytes(filename: str, raw: UploadBuffer, max_chars: Optional[int] = FULL_TEXT) -> str:
+    """Parse file contents (bytes or mmap) into text based on the (lower-cased) filename extension"""
+    # JSON or TXT files
+    if filename.endswith((".json", ".txt")):
+        try:
+            # Try to parse as JSON for pretty formatting (needs the whole file)
+            if filename.endswith(".json"):
+                text = codecs.decode(raw, "utf-8-sig", "ignore")
+                try:
+                    parsed = json.loads(text)
+                    return json.dumps(parsed, indent=2)
+                except json.JSONDecodeError:
+                    return text  # Fall back to raw text
+            
+            return decode_within_budget(raw, "utf-8-sig", max_chars)
+            
+        except Exception as e:
+            return ExtractionFailure(f"Could not decode file. Error: {str(e)}")
+
+    # PDF
+    if filename.endswith(".pdf"):
+        try:
+            reader = PdfReader(as_stream(raw))
+            
+            # Try text extraction first, page by page until the budget is met
+            extracted = join_within_budget(
+                (page.extract_text() for page in reader.pages),
+                separator="\n",
+                max_chars=max_chars
+            ).strip()
+            
+            # If we got text, return it
+            if extracted:
+                return extracted
+            
+            # If no text extracted, try OCR on PDF pages            
+            try:
+                # You need to install: pip install pdf2image
+                # Pages are rendered and recognized as a stream across the
+                # OCR worker pool, so only a few pages are in memory at once;
+                # pages past the budget are never rendered
+                extracted = join_within_budget(
+                    iter_ocr_pdf_pages(raw, page_count=len(reader.pages)),
+                    separator="\n\n--- Page Break ---\n\n",
+                    max_chars=max_chars
+                )
+                
+                if extracted:
+                    return extracted
+                else:
+                    return ExtractionFailure("PDF processed but no text found (OCR found no readable text).")
+                    
+            except ImportError:
+                return ExtractionFailure("Could not extract text from PDF. This appears to be an image-based PDF. To enable OCR, install: pip install pdf2image")
+            except Exception as ocr_error:
+                return ExtractionFailure(f"Could not extract text from PDF. OCR failed: {str(ocr_error)}")
+                
+        except Exception as e:
+            return ExtractionFailure(f"Could not process PDF file. Error: {str(e)}")
+
+    # DOCX
+    if filename.endswith(".docx"):
+        try:
+            doc = Document(as_stream(raw))
+            return join_within_budget(
+                (p.text for p in doc.paragraphs),
+                separator="\n",
+                max_chars=max_chars,
+                skip_blank=False
+            )
+        except Exception as e:
+            return ExtractionFailure(f"Could not extract text from DOCX file. Error: {str(e)}")
+
+    # Images
+    if filename.endswith((".png", ".jpg", ".jpeg")):
+        try:
+            text = ocr_image(raw)
+            return text.strip() if text.strip() else "No text found in image."
+        except Exception as e:
+            return ExtractionFailure(f"Could not extract text from image. Error: {str(e)}")
+
+    return ExtractionFailure(f"Unsupported file format: {filename}")
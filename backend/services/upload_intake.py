@@ -0,0 +1,232 @@
+"""
+Upload Intake - Streaming Size Limits and Spooled Buffers
+Enforces per-file and per-request upload limits while the body streams in,
+and hands extractors zero-copy views of spooled uploads.
+"""
+import io
+import mmap
+import os
+from typing import Dict, Optional, Union
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+from starlette.formparsers import MultiPartParser
+
+SPOOL_THRESHOLD_BYTES = int(os.getenv("UPLOAD_SPOOL_THRESHOLD_BYTES", str(1024 * 1024)))
+
+# Allowance for multipart part headers and delimiters around each file
+PART_OVERHEAD_BYTES = 16 * 1024
+
+UploadBuffer = Union[bytes, mmap.mmap]
+
+
+def configure_upload_spooling(threshold: int = SPOOL_THRESHOLD_BYTES):
+    """
+    Spool uploaded files larger than threshold to a temporary file on disk
+    while the body is parsed instead of holding them in memory.
+
+    Starlette keeps this as a class attribute of its multipart parser, so it
+    applies process-wide; call it once while setting up the app.
+    """
+    MultiPartParser.spool_max_size = threshold
+
+
+class UploadTooLarge(Exception):
+    """Raised from the body stream once an upload passes a size limit."""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class _PartSizeTracker:
+    """Tracks the size of the current multipart part across body chunks."""
+
+    def __init__(self, boundary: bytes, max_part_bytes: int):
+        self.delimiter = b"--" + boundary
+        self.max_part_bytes = max_part_bytes
+        self._tail = b""
+        self._offset = 0          # absolute stream offset of the end of the last chunk
+        self._part_start = 0      # absolute offset just past the last delimiter
+
+    def feed(self, chunk: bytes) -> bool:
+        """Consume a body chunk. Returns False once any part exceeds the limit."""
+        data = self._tail + chunk
+        base = self._offset - len(self._tail)
+        index = data.find(self.delimiter)
+        while index != -1:
+            if base + index - self._part_start > self.max_part_bytes:
+                return False
+            self._part_start = base + index + len(self.delimiter)
+            index = data.find(self.delimiter, index + len(self.delimiter))
+
+        self._offset += len(chunk)
+        self._tail = data[-(len(self.delimiter) - 1):]
+        return self._offset - self._part_start <= self.max_part_bytes
+
+
+def _multipart_boundary(content_type: str) -> Optional[bytes]:
+    """Extract the boundary parameter from a multipart/form-data content type."""
+    if not content_type.lower().startswith("multipart/form-data"):
+        return None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware rejecting oversized uploads with 413 before they are buffered.
+
+    Requests whose Content-Length exceeds max_request_bytes are refused without
+    reading the body. Otherwise the body is counted as it streams in, and the
+    request is aborted as soon as the total passes max_request_bytes or any
+    single multipart part passes max_file_bytes. request_limits overrides
+    max_request_bytes for specific paths (e.g. batch upload jobs).
+    """
+
+    def __init__(self, app, max_file_bytes: int, max_request_bytes: int,
+                 request_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        self.request_limits = request_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        max_request_bytes = self.request_limits.get(scope.get("path", ""), self.max_request_bytes)
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        content_length = headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_request_bytes:
+            await self._reject(scope, receive, send, self._request_detail(max_request_bytes))
+            return
+
+        boundary = _multipart_boundary(headers.get("content-type", ""))
+        tracker = _PartSizeTracker(boundary, self.max_file_bytes + PART_OVERHEAD_BYTES) if boundary else None
+        received = 0
+        exceeded: Optional[str] = None
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                received += len(chunk)
+                if received > max_request_bytes:
+                    exceeded = self._request_detail(max_request_bytes)
+                elif tracker is not None and not tracker.feed(chunk):
+                    exceeded = f"File exceeds maximum size of {self.max_file_bytes // (1024 * 1024)} MB."
+                if exceeded:
+                    raise UploadTooLarge(exceeded)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Whatever the app makes of the aborted body (FastAPI reports a
+            # parse error), the client gets the 413 instead
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            if response_started:
+                raise
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send, exceeded)
+
+    @staticmethod
+    def _request_detail(max_request_bytes: int) -> str:
+        return f"Request exceeds maximum size of {max_request_bytes // (1024 * 1024)} MB."
+
+    @staticmethod
+    async def _reject(scope, receive, send, detail: str):
+        response = JSONResponse(status_code=413, content={"detail": detail})
+        await response(scope, receive, send)
+
+
+def upload_size(upload: UploadFile) -> int:
+    """Size of a parsed upload without reading it into memory."""
+    if upload.size is not None:
+        return upload.size
+    upload.file.seek(0, io.SEEK_END)
+    size = upload.file.tell()
+    upload.file.seek(0)
+    return size
+
+
+def open_upload_buffer(upload: UploadFile) -> UploadBuffer:
+    """
+    Return the contents of a spooled upload without extra copies.
+
+    Small uploads still held in memory are returned as bytes. Uploads that
+    were spooled to disk are memory-mapped read-only. Close the result with
+    close_upload_buffer when done.
+
+    Args:
+        upload: Parsed FastAPI upload
+
+    Returns:
+        bytes or a read-only mmap over the upload contents
+    """
+    upload.file.seek(0)
+    size = upload_size(upload)
+    if size > SPOOL_THRESHOLD_BYTES:
+        try:
+            # Already rolled over to a real file, so fileno() does not copy
+            return mmap.mmap(upload.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation):
+            pass
+    return upload.file.read()
+
+
+def close_upload_buffer(buffer: UploadBuffer):
+    """Release a buffer returned by open_upload_buffer."""
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+class _MmapStream(io.RawIOBase):
+    """Read-only seekable stream over an mmap (mmap itself lacks seekable() before 3.13)."""
+
+    def __init__(self, buffer: mmap.mmap):
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self._buffer[self._position:self._position + len(b)]
+        b[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+
+def as_stream(buffer: UploadBuffer):
+    """Seekable file-like view of a buffer for parsers (PdfReader, python-docx, PIL)."""
+    if isinstance(buffer, mmap.mmap):
+        return io.BufferedReader(_MmapStream(buffer))
+    return io.BytesIO(buffer)
@@ -0,0 +1,198 @@
+"""
+Upload Job Service - Background Batch Extraction
+Accepts multi-file uploads as jobs, extracts them concurrently on the job
+manager's own thread pool (so background jobs do not compete with /process
+for the shared extraction pool) and tracks per-file progress for polling.
+"""
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import UploadFile
+
+from backend.services.executor import EXTRACTION_WORKERS, run_in_pool, run_blocking_io
+
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", str(EXTRACTION_WORKERS)))
+UPLOAD_JOB_QUEUE_DEPTH = int(os.getenv("UPLOAD_JOB_QUEUE_DEPTH", "200"))
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", "3600"))
+# Request size limit for job submissions, above the interactive upload limit
+UPLOAD_JOB_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_JOB_MAX_REQUEST_BYTES", str(256 * 1024 * 1024)))
+
+
+class QueueFullError(Exception):
+    """Raised when a job would exceed the configured queue depth."""
+
+
+class UploadJobManager:
+    """In-process job queue for batch file extraction."""
+
+    def __init__(self, process_file: Callable[[UploadFile], Dict[str, Any]], workers: int = UPLOAD_JOB_WORKERS,
+                 queue_depth: int = UPLOAD_JOB_QUEUE_DEPTH, ttl_seconds: int = UPLOAD_JOB_TTL_SECONDS):
+        """
+        Args:
+            process_file: Synchronous function turning one upload into a result
+                dict (e.g. {"filename", "excerpt"} or {"filename", "error"})
+            workers: Number of files processed concurrently (threads of the job pool)
+            queue_depth: Maximum number of files waiting across all jobs
+            ttl_seconds: How long finished jobs stay available for polling
+        """
+        self.process_file = process_file
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Files admitted to a job but still being copied, not yet in the queue
+        self._reserved = 0
+
+    async def submit(self, files: List[UploadFile]) -> Dict[str, Any]:
+        """
+        Take ownership of the uploaded files and enqueue them as one job.
+
+        The request's UploadFile objects are closed once the response is sent,
+        so each file is copied into a temporary file owned by the job first.
+
+        Args:
+            files: Uploaded files from the request
+
+        Returns:
+            Job status snapshot including its job_id
+        """
+        self._ensure_workers()
+        self._purge_expired()
+
+        # Check and reserve with no await in between, so concurrent submits
+        # cannot all pass the check while their copies are in progress
+        if self._queue.qsize() + self._reserved + len(files) > self.queue_depth:
+            raise QueueFullError(f"Upload queue is full ({self.queue_depth} files). Try again shortly.")
+        self._reserved += len(files)
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "created_at": time.time(),
+            "finished_at": None,
+            "files": [{"filename": f.filename, "status": "queued"} for f in files]
+        }
+        self._jobs[job_id] = job
+
+        index = 0
+        try:
+            for index, upload in enumerate(files):
+                owned = await run_blocking_io(_copy_upload, upload)
+                self._queue.put_nowait((job_id, index, owned))
+                self._reserved -= 1
+        except BaseException:
+            # Files not yet queued fail; the reservation for them is released
+            self._reserved -= len(files) - index
+            for entry in job["files"][index:]:
+                entry.update({"status": "error", "error": "Could not read uploaded file."})
+            if index == 0:
+                job["status"] = "failed"
+            self._finish_if_done(job)
+            raise
+
+        return self.status(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a progress snapshot for job_id, or None if unknown or expired."""
+        self._purge_expired()
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        files = job["files"]
+        done = sum(1 for f in files if f["status"] in ("done", "error"))
+        return {
+            **job,
+            "files": [dict(f) for f in files],
+            "progress": {
+                "total": len(files),
+                "completed": done,
+                "failed": sum(1 for f in files if f["status"] == "error")
+            }
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Queue depth and job counts."""
+        self._purge_expired()
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "queued_files": (self._queue.qsize() if self._queue else 0) + self._reserved,
+            "jobs": len(self._jobs),
+            "active_jobs": sum(1 for j in self._jobs.values() if j["status"] in ("queued", "running"))
+        }
+
+    async def shutdown(self):
+        """Cancel workers and release the job pool (called on application shutdown)."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _ensure_workers(self):
+        """Start worker tasks on the running loop the first time a job arrives."""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="upload-job")
+        if not self._worker_tasks:
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            job_id, index, upload = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                entry = job["files"][index]
+                entry["status"] = "processing"
+                job["status"] = "running"
+                try:
+                    result = await run_in_pool(self._pool, self.process_file, upload)
+                except Exception:
+                    result = {"filename": upload.filename, "error": "Unknown error occurred."}
+                entry.update(result)
+                entry["status"] = "error" if "error" in result else "done"
+                self._finish_if_done(job)
+            finally:
+                upload.file.close()
+                self._queue.task_done()
+
+    def _finish_if_done(self, job: Dict[str, Any]):
+        if job["finished_at"] is None and all(f["status"] in ("done", "error") for f in job["files"]):
+            if job["status"] != "failed":
+                job["status"] = "completed"
+            job["finished_at"] = time.time()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+def _copy_upload(upload: UploadFile) -> UploadFile:
+    """Copy a request upload into a temporary file that outlives the request."""
+    upload.file.seek(0)
+    owned = tempfile.TemporaryFile()
+    shutil.copyfileobj(upload.file, owned)
+    size = owned.tell()
+    owned.seek(0)
+    return UploadFile(file=owned, filename=upload.filename, size=size, headers=upload.headers)
@@ -0,0 +1,288 @@
+"""
+Vector Index - Local Dense Retrieval
+Embeds policy chunks into a contiguous float32 matrix stored as a .npy file,
+memory-maps it at startup and ranks chunks for a query with blocked matrix
+products and argpartition. hybrid_search fuses these scores with the BM25
+keyword index, giving "vector + keyword" search without a network hop.
+
+Embeddings come from a pluggable encoder (VECTOR_ENCODER): "hashing" is a
+deterministic feature-hashing encoder that needs no model or network,
+"openai" uses an Azure OpenAI embeddings deployment.
+"""
+import os
+import json
+import zlib
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.bm25_index import POLICIES_PATH, tokenize, load_policies, bm25_search
+from backend.services.metrics import span
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", os.path.join(BACKEND_DIR, "data", "sample_policies.vectors"))
+VECTOR_ENCODER = os.getenv("VECTOR_ENCODER", "hashing").lower()
+VECTOR_DIM = int(os.getenv("VECTOR_DIM", "256"))
+VECTOR_CHUNK_WORDS = int(os.getenv("VECTOR_CHUNK_WORDS", "120"))
+# Weight of the vector score in hybrid fusion; the keyword score gets the rest
+HYBRID_ALPHA = float(os.getenv("HYBRID_ALPHA", "0.5"))
+
+# Rows scored per matrix product; bounds the temporary score buffer for large corpora
+SEARCH_BLOCK_ROWS = 65536
+
+
+class HashingEncoder:
+    """
+    Deterministic bag-of-features encoder: word unigrams, bigrams and
+    character trigrams hashed into dim signed buckets, L2-normalized.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = VECTOR_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        tokens = tokenize(text)
+        features = [(t, 1.0) for t in tokens]
+        features += [(f"{a} {b}", 1.0) for a, b in zip(tokens, tokens[1:])]
+        for token in tokens:
+            padded = f" {token} "
+            features += [(f"#{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2)]
+        return features
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                # The high bit picks the sign so collisions cancel out on average
+                matrix[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        return _normalize(matrix)
+
+
+class OpenAIEncoder:
+    """Embeddings from an Azure OpenAI deployment (default AZURE_OPENAI_EMBEDDING_DEPLOYMENT)."""
+
+    name = "openai"
+
+    def __init__(self, deployment: Optional[str] = None, dim: Optional[int] = None):
+        self.deployment = deployment or os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "text-embedding-3-small")
+        # Expected dimension, if known; checked against every response
+        self.dim = dim
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        from backend.services.openai_service import get_openai_client
+
+        client = get_openai_client()
+        with span("upstream_call", service="openai", operation="embed"):
+            response = client.embeddings.create(model=self.deployment, input=list(texts))
+        matrix = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+        if self.dim is not None and matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding deployment {self.deployment} returned {matrix.shape[1]} dimensions, "
+                             f"expected {self.dim}")
+        self.dim = matrix.shape[1]
+        return _normalize(matrix)
+
+
+ENCODERS = {"hashing": HashingEncoder, "openai": OpenAIEncoder}
+
+
+def get_encoder(name: str = VECTOR_ENCODER):
+    """Instantiate the encoder registered under name."""
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown vector encoder '{name}'. Available: {sorted(ENCODERS)}")
+    return ENCODERS[name]()
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def chunk_policies(policies: List[Dict[str, Any]], chunk_words: int = VECTOR_CHUNK_WORDS) -> List[Dict[str, Any]]:
+    """
+    Split each policy into chunks of at most chunk_words words, each prefixed
+    with the policy title so short chunks keep their context.
+    """
+    chunks = []
+    for doc_index, doc in enumerate(policies):
+        words = (doc.get("content") or "").split()
+        tags = " ".join(doc.get("tags") or [])
+        for start in range(0, max(len(words), 1), chunk_words):
+            body = " ".join(words[start:start + chunk_words])
+            chunks.append({"doc": doc_index, "text": f"{doc.get('title', '')}. {tags}. {body}"})
+    return chunks
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the k largest scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    order = np.argsort(-np.take_along_axis(scores, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def search_matrix(matrix: np.ndarray, queries: np.ndarray, k: int,
+                  block_rows: int = SEARCH_BLOCK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of matrix by inner product for each query vector.
+
+    The matrix is scored in blocks of block_rows so a memory-mapped corpus of
+    millions of rows is streamed through one bounded score buffer.
+
+    Returns:
+        (indices, scores), both shaped (len(queries), k), best first
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    k = min(k, matrix.shape[0])
+    best_idx = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, matrix.shape[0], block_rows):
+        block_scores = queries @ matrix[start:start + block_rows].T
+        local = top_k_rows(block_scores, k)
+        best_idx = np.concatenate([best_idx, local + start], axis=1)
+        best_scores = np.concatenate([best_scores, np.take_along_axis(block_scores, local, axis=1)], axis=1)
+        keep = top_k_rows(best_scores, k)
+        best_idx = np.take_along_axis(best_idx, keep, axis=1)
+        best_scores = np.take_along_axis(best_scores, keep, axis=1)
+    return best_idx, best_scores
+
+
+class VectorIndex:
+    """Read-only chunk embedding matrix backed by a memory-mapped .npy file."""
+
+    def __init__(self, path: str, encoder=None):
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.encoder = encoder or get_encoder(meta["encoder"])
+        self.documents: List[Dict[str, Any]] = meta["documents"]
+        self.chunk_docs = np.asarray(meta["chunk_docs"], dtype=np.int64)
+        self.matrix = np.load(f"{path}.npy", mmap_mode="r")
+
+    def search_batch(self, queries: Sequence[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Rank policies for several queries with one matrix product per block.
+
+        A policy's score is the cosine similarity of its best-matching chunk.
+        """
+        if not len(self.chunk_docs):
+            return [[] for _ in queries]
+        # Over-fetch chunks so several chunks of one policy do not crowd out others
+        indices, scores = search_matrix(self.matrix, self.encoder.encode(queries), top_k * 4)
+        results = []
+        for row_idx, row_scores in zip(indices, scores):
+            seen, ranked = set(), []
+            for chunk, score in zip(row_idx, row_scores):
+                doc_index = int(self.chunk_docs[chunk])
+                if doc_index in seen or score <= 0:
+                    continue
+                seen.add(doc_index)
+                ranked.append({**self.documents[doc_index], "score": round(float(score), 4)})
+                if len(ranked) == top_k:
+                    break
+            results.append(ranked)
+        return results
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Rank policies for one query. See search_batch."""
+        return self.search_batch([query], top_k)[0]
+
+
+def build_vector_index(policies: List[Dict[str, Any]], path: str, encoder=None):
+    """
+    Embed the chunked policies and write path.npy (matrix) and path.json
+    (encoder, chunk -> policy mapping, policy documents) atomically.
+    """
+    encoder = encoder or get_encoder()
+    chunks = chunk_policies(policies)
+    matrix = encoder.encode([c["text"] for c in chunks]) if chunks else np.zeros((0, encoder.dim or 1), np.float32)
+    meta = {
+        "encoder": encoder.name,
+        "dim": int(matrix.shape[1]),
+        "chunk_docs": [c["doc"] for c in chunks],
+        "documents": [
+            {field: doc.get(field) for field in ("id", "title", "content", "source", "category")}
+            for doc in policies
+        ]
+    }
+    # np.save appends .npy to names without it, so the temporary name keeps the suffix
+    np.save(f"{path}.tmp.npy", np.ascontiguousarray(matrix, dtype=np.float32))
+    with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(f"{path}.tmp.npy", f"{path}.npy")
+    os.replace(f"{path}.json.tmp", f"{path}.json")
+
+
+def _index_is_stale(path: str) -> bool:
+    try:
+        if os.path.getmtime(f"{path}.npy") < os.path.getmtime(POLICIES_PATH):
+            return True
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("encoder") != VECTOR_ENCODER:
+            return True
+        return VECTOR_ENCODER == "hashing" and meta.get("dim") != VECTOR_DIM
+    except (OSError, json.JSONDecodeError):
+        return True
+
+
+_index: Optional[VectorIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    """Return the shared index, rebuilding it when the policies or encoder changed."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if _index_is_stale(VECTOR_INDEX_PATH):
+                    build_vector_index(load_policies(POLICIES_PATH), VECTOR_INDEX_PATH)
+                _index = VectorIndex(VECTOR_INDEX_PATH)
+    return _index
+
+
+def vector_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Dense search over the local policy corpus. See VectorIndex.search."""
+    return get_vector_index().search(query, top_k)
+
+
+def fuse_scores(vector_docs: List[Dict[str, Any]], keyword_docs: List[Dict[str, Any]],
+                top_k: int = 5, alpha: float = HYBRID_ALPHA) -> List[Dict[str, Any]]:
+    """
+    Combine two ranked lists by min-max normalized score:
+    alpha * vector + (1 - alpha) * keyword. A document missing from one list
+    scores 0 for that side.
+    """
+    def normalized(docs):
+        if not docs:
+            return {}
+        scores = [d["score"] for d in docs]
+        low, high = min(scores), max(scores)
+        span = (high - low) or 1.0
+        # A single result (or a tie) normalizes to 1 rather than 0
+        return {d["id"]: ((d["score"] - low) / span if high > low else 1.0) for d in docs}
+
+    vector_norm, keyword_norm = normalized(vector_docs), normalized(keyword_docs)
+    by_id = {d["id"]: d for d in keyword_docs}
+    by_id.update({d["id"]: d for d in vector_docs})
+    fused = [
+        {**doc, "score": round(alpha * vector_norm.get(doc_id, 0.0) + (1 - alpha) * keyword_norm.get(doc_id, 0.0), 4)}
+        for doc_id, doc in by_id.items()
+    ]
+    fused.sort(key=lambda d: d["score"], reverse=True)
+    return fused[:top_k]
+
+
+def hybrid_search(query: str, top_k: int = 5, alpha: float = HYBRID_ALPHA) -> List[Dict[str, Any]]:
+    """Vector + keyword search over the local policy corpus."""
+    candidates = top_k * 2
+    return fuse_scores(vector_search(query, candidates), bm25_search(query, candidates), top_k, alpha)
@@ -0,0 +1,82 @@
+"""
+Classifier Benchmark - Fast Path vs LLM
+Runs a labeled query file through the local fast-path classifier and,
+optionally, the Azure OpenAI classifier. Reports how many queries the fast
+path answers, how often it agrees with the labels, and median latency per path.
+
+The labels in benchmarks/data/labeled_queries.jsonl are LLM classifications
+of representative ISO questions.
+
+Usage:
+    python -m benchmarks.classifier
+    python -m benchmarks.classifier --with-llm    # needs AZURE_OPENAI_* settings
+"""
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+from backend.agents.fast_classifier import fast_classify, FAST_CLASSIFIER_THRESHOLD
+from backend.agents.classifier import classify_intent_with_llm
+
+DEFAULT_QUERIES = Path(__file__).parent / "data" / "labeled_queries.jsonl"
+
+
+def load_queries(path: Path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run(queries, threshold: float, with_llm: bool, repeat: int):
+    fast_ms, llm_ms = [], []
+    answered = agreed = llm_agreed = llm_total = 0
+
+    fast_classify("warm up")  # build the index outside the timings
+
+    for item in queries:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            local = fast_classify(item["query"])
+        fast_ms.append((time.perf_counter() - start) * 1000 / repeat)
+
+        if local["confidence"] >= threshold:
+            answered += 1
+            agreed += local["intent"] == item["label"]
+        elif with_llm:
+            start = time.perf_counter()
+            result = classify_intent_with_llm(item["query"])
+            llm_ms.append((time.perf_counter() - start) * 1000)
+            llm_total += 1
+            llm_agreed += result["intent"] == item["label"]
+
+    report = {
+        "queries": len(queries),
+        "threshold": threshold,
+        "fast_path_answered": answered,
+        "fast_path_coverage": round(answered / len(queries), 3),
+        "fast_path_agreement": round(agreed / answered, 3) if answered else None,
+        "fast_path_median_ms": round(statistics.median(fast_ms), 4),
+    }
+    if with_llm:
+        report.update({
+            "llm_path_queries": llm_total,
+            "llm_path_agreement": round(llm_agreed / llm_total, 3) if llm_total else None,
+            "llm_path_median_ms": round(statistics.median(llm_ms), 2) if llm_ms else None,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES)
+    parser.add_argument("--threshold", type=float, default=FAST_CLASSIFIER_THRESHOLD)
+    parser.add_argument("--with-llm", action="store_true", help="Send low-confidence queries to Azure OpenAI")
+    parser.add_argument("--repeat", type=int, default=100, help="Fast-path repetitions per query for timing")
+    args = parser.parse_args()
+
+    print(json.dumps(run(load_queries(args.queries), args.threshold, args.with_llm, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
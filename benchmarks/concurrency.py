@@ -0,0 +1,98 @@
+"""
+Concurrency Benchmark - Event Loop Responsiveness
+Measures latency of short text queries against /process while heavy OCR
+uploads run in the background on the same worker.
+
+Usage:
+    uvicorn backend.main:app --workers 1
+    python -m benchmarks.concurrency --heavy-file scanned.pdf
+"""
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from typing import List, Dict
+
+import httpx
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) using nearest-rank."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+async def _text_queries(client: httpx.AsyncClient, url: str, count: int, concurrency: int) -> List[float]:
+    """Send short text queries and return per-request latencies in ms."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(url, data={"text": f"When is the OPT deadline? ({i})"})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return latencies
+
+
+async def _heavy_uploads(client: httpx.AsyncClient, url: str, payload: bytes, filename: str, stop: asyncio.Event):
+    """Keep posting the heavy file until stop is set."""
+    while not stop.is_set():
+        await client.post(url, files={"files": (filename, payload)}, data={"text": ""})
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run(args) -> Dict[str, Dict[str, float]]:
+    url = args.url.rstrip("/") + "/process"
+    heavy_path = Path(args.heavy_file)
+    payload = heavy_path.read_bytes()
+
+    async with httpx.AsyncClient(timeout=args.timeout) as client:
+        baseline = await _text_queries(client, url, args.queries, args.concurrency)
+
+        stop = asyncio.Event()
+        heavy_tasks = [
+            asyncio.create_task(_heavy_uploads(client, url, payload, heavy_path.name, stop))
+            for _ in range(args.heavy_concurrency)
+        ]
+        # Give the uploads a head start so extraction is already saturated
+        await asyncio.sleep(args.warmup)
+        loaded = await _text_queries(client, url, args.queries, args.concurrency)
+        stop.set()
+        await asyncio.gather(*heavy_tasks, return_exceptions=True)
+
+    return {"baseline": _summary(baseline), "under_ocr_load": _summary(loaded)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--heavy-file", required=True, help="Scanned PDF or image that forces OCR")
+    parser.add_argument("--heavy-concurrency", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    for label, stats in results.items():
+        print(f"{label:>16}: n={stats['count']} p50={stats['p50_ms']}ms p95={stats['p95_ms']}ms p99={stats['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
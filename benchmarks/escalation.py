@@ -0,0 +1,98 @@
+"""
+Escalation Benchmark - Pairwise Scan vs Compiled Engine
+Times conflict detection on synthetic long policy documents with the former
+pairwise implementation (every document pair, content lower-cased per pair,
+substring test per term pair) and with the compiled EscalationEngine, which
+scans each document once for conflict terms and all escalation pattern
+keywords.
+
+Documents are built from policy text words and contain no contradictory
+terms, so both implementations scan everything (the worst case).
+
+Usage:
+    python -m benchmarks.escalation
+    python -m benchmarks.escalation --docs 50 100 200 --words 3000
+"""
+import json
+import time
+import random
+import argparse
+
+from backend.agents.escalation import get_escalation_engine, CONFLICTING_PAIRS
+from backend.services.bm25_index import POLICIES_PATH, load_policies
+
+
+def pairwise_conflicts(documents):
+    """The previous _check_conflicts implementation, kept for comparison."""
+    if len(documents) < 2:
+        return False
+    for doc1 in documents:
+        content1 = doc1.get("content", "").lower()
+        for doc2 in documents:
+            if doc1 == doc2:
+                continue
+            content2 = doc2.get("content", "").lower()
+            for term1, term2 in CONFLICTING_PAIRS:
+                if term1 in content1 and term2 in content2:
+                    return True
+    return False
+
+
+def make_documents(count: int, words: int, seed: int = 0):
+    conflict_terms = {t for pair in CONFLICTING_PAIRS for t in pair}
+    vocabulary = [
+        w for policy in load_policies(POLICIES_PATH) for w in policy["content"].split()
+        if not any(t in w.lower() for t in conflict_terms)
+    ]
+    rng = random.Random(seed)
+    return [
+        {"id": f"doc-{i}", "content": " ".join(rng.choice(vocabulary) for _ in range(words))}
+        for i in range(count)
+    ]
+
+
+def time_ms(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def run(doc_counts, words: int, repeat: int):
+    engine = get_escalation_engine()
+
+    def compiled(documents):
+        return engine.has_conflicts([engine.scan(d["content"]) for d in documents])
+
+    report = []
+    for count in doc_counts:
+        documents = make_documents(count, words)
+        chars = sum(len(d["content"]) for d in documents)
+        assert compiled(documents) == pairwise_conflicts(documents)
+        legacy_ms = time_ms(lambda: pairwise_conflicts(documents), repeat)
+        engine_ms = time_ms(lambda: compiled(documents), repeat)
+        report.append({
+            "documents": count,
+            "total_chars": chars,
+            "pairwise_ms": round(legacy_ms, 2),
+            "engine_ms": round(engine_ms, 2),
+            "engine_mb_per_s": round(chars / 2**20 / (engine_ms / 1000), 2),
+            "speedup": round(legacy_ms / engine_ms, 2)
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[50, 100, 200])
+    parser.add_argument("--words", type=int, default=3000, help="words per document")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for row in run(args.docs, args.words, args.repeat):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Extraction Benchmark - Parsing and OCR per File Format
+Generates a corpus of text PDFs, scanned (image-only) PDFs, DOCX files and
+PNG/JPEG images of synthetic policy text at several page counts, then
+times the /process extractor on each file directly (bypassing the
+extraction cache). Reports latency percentiles, throughput in MB/s and the
+outcome per file. Each file is extracted once untimed first; OCR formats
+report the extractor's failure message (and no timings) when Tesseract or
+pdf2image is not installed.
+
+Usage:
+    python -m benchmarks.extraction
+    python -m benchmarks.extraction --pages 1 10 --repeat 5 --output extraction.json
+    python -m benchmarks.extraction --compare extraction.json
+"""
+import io
+import json
+import time
+import random
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+from docx import Document
+
+from backend.main import MAX_EXCERPT_CHARS
+from backend.services.text_extraction import extract_text_from_bytes as _extract_text_from_bytes
+from backend.services.extraction_cache import ExtractionFailure
+from benchmarks.results import latency_summary, write_results, compare_results
+
+WORDS = (
+    "student visa status program end date optional practical training application form "
+    "employment authorization designated school official sevis record travel signature "
+    "passport transcript enrollment credit hours deadline policy immigration compliance"
+).split()
+
+LINES_PER_PAGE = 40
+
+
+def page_lines(page: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed * 1000 + page)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 12))).capitalize() + "."
+            for _ in range(LINES_PER_PAGE)]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(pages: int) -> bytes:
+    """PDF with a real text layer: one Helvetica content stream per page."""
+    objects: List[bytes] = []
+    font_id = 3
+    page_ids = [4 + 2 * i for i in range(pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, pid in enumerate(page_ids):
+        text = " T* ".join(f"({_pdf_escape(line)}) Tj" for line in page_lines(i))
+        stream = f"BT /F1 10 Tf 14 TL 54 750 Td {text} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def render_page(page: int, width: int = 1275, height: int = 1650) -> Image.Image:
+    """A letter page at 150 dpi with dark text on white, as a scanner would produce."""
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=22)
+    except TypeError:
+        font = ImageFont.load_default()
+    for row, line in enumerate(page_lines(page)):
+        draw.text((80, 80 + row * 36), line, fill=0, font=font)
+    return image
+
+
+def make_scanned_pdf(pages: int) -> bytes:
+    images = [render_page(i) for i in range(pages)]
+    out = io.BytesIO()
+    images[0].save(out, "PDF", save_all=True, append_images=images[1:], resolution=150)
+    return out.getvalue()
+
+
+def make_docx(pages: int, seed: int = 0) -> bytes:
+    document = Document()
+    for i in range(pages):
+        for line in page_lines(i, seed):
+            document.add_paragraph(line)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def make_image(fmt: str) -> Callable[[int], bytes]:
+    def build(pages: int) -> bytes:
+        out = io.BytesIO()
+        render_page(0).save(out, fmt)
+        return out.getvalue()
+    return build
+
+
+# format -> (file extension, generator taking a page count)
+FORMATS: Dict[str, Tuple[str, Callable[[int], bytes]]] = {
+    "text_pdf": (".pdf", make_text_pdf),
+    "scanned_pdf": (".pdf", make_scanned_pdf),
+    "docx": (".docx", make_docx),
+    "png": (".png", make_image("PNG")),
+    "jpeg": (".jpg", make_image("JPEG")),
+}
+# Images are always a single page
+SINGLE_PAGE = {"png", "jpeg"}
+
+
+def build_corpus(page_counts: List[int]) -> List[Dict]:
+    corpus = []
+    for name, (extension, generate) in FORMATS.items():
+        for pages in ([1] if name in SINGLE_PAGE else page_counts):
+            corpus.append({"format": name, "pages": pages, "filename": f"{name}_{pages}p{extension}",
+                           "raw": generate(pages)})
+    return corpus
+
+
+def run(page_counts: List[int], repeat: int, excerpt_only: bool) -> List[Dict]:
+    max_chars = MAX_EXCERPT_CHARS if excerpt_only else None
+    rows = []
+    for item in build_corpus(page_counts):
+        # Warm-up call (imports, OCR worker start-up); a failure is reported without timings
+        text = _extract_text_from_bytes(item["filename"], item["raw"], max_chars)
+        failed = isinstance(text, ExtractionFailure)
+        latencies = []
+        for _ in range(0 if failed else repeat):
+            start = time.perf_counter()
+            _extract_text_from_bytes(item["filename"], item["raw"], max_chars)
+            latencies.append((time.perf_counter() - start) * 1000)
+        summary = latency_summary(latencies)
+        total_seconds = sum(latencies) / 1000
+        rows.append({
+            "format": item["format"],
+            "pages": item["pages"],
+            "bytes": len(item["raw"]),
+            "chars": 0 if failed else len(text),
+            **summary,
+            "mb_per_s": round(len(item["raw"]) * len(latencies) / 2**20 / total_seconds, 2) if total_seconds else None,
+            "outcome": str(text)[:120] if failed else "ok"
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--excerpt-only", action="store_true",
+                        help=f"Stop at MAX_EXCERPT_CHARS ({MAX_EXCERPT_CHARS}) like /process does")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args()
+
+    rows = run(args.pages, args.repeat, args.excerpt_only)
+    for row in rows:
+        print(json.dumps(row))
+    if args.output:
+        write_results(args.output, "extraction", rows, vars(args))
+    if args.compare:
+        for entry in compare_results(args.compare, rows, ("format", "pages"), ("p50_ms", "p95_ms", "mb_per_s")):
+            print(json.dumps({"compare": entry}))
+
+
+if __name__ == "__main__":
+    main()
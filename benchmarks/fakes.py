@@ -0,0 +1,254 @@
+"""
+Fake Azure Services - Local Stand-ins for Offline Benchmarks
+Starlette apps that answer like Azure OpenAI (chat completions, streaming
+and embeddings), Azure Cognitive Search (document search, index definition
+and statistics) and the Foundry agent endpoint, each with a configurable
+latency distribution and error rate, plus helpers to serve them with
+uvicorn on background threads. Each fake counts the requests, errors and
+distinct client connections it served.
+"""
+import math
+import json
+import time
+import random
+import socket
+import asyncio
+import threading
+import zlib
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from backend.services.bm25_index import POLICIES_PATH, load_policies
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z99 = 2.326
+
+ANSWER = (
+    "Based on the policy documents, you must file your OPT application within sixty days "
+    "after your program end date. Check that your I-20 has a DSO recommendation before you "
+    "submit Form I-765, and keep a copy of the receipt notice for your records."
+)
+
+
+class FaultProfile:
+    """
+    Latency and failures of one fake service.
+
+    Latency is log-normal with the given median and 99th percentile (equal
+    values give a fixed latency); error_rate of the requests fail with
+    error_status, and 429s carry Retry-After. Also holds the service's
+    request, error and connection counts.
+    """
+
+    def __init__(self, median_ms: float = 50, p99_ms: float = None, error_rate: float = 0.0,
+                 error_status: int = 503, retry_after: str = "1", seed: int = 0):
+        self.median_ms = median_ms
+        self.p99_ms = p99_ms if p99_ms is not None else median_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self._sigma = math.log(max(self.p99_ms, median_ms) / median_ms) / _Z99 if median_ms > 0 else 0.0
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        # Client (host, port) pairs seen; each TCP connection has its own source port
+        self._clients = set()
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 0) -> "FaultProfile":
+        """From "median_ms[,p99_ms[,error_rate]]", e.g. "300,1200,0.01"."""
+        parts = [float(p) for p in spec.split(",") if p.strip()]
+        median = parts[0] if parts else 50
+        return cls(median, parts[1] if len(parts) > 1 else None, parts[2] if len(parts) > 2 else 0.0, seed=seed)
+
+    @property
+    def connections(self) -> int:
+        """Distinct client connections that sent at least one request."""
+        return len(self._clients)
+
+    def record_client(self, client):
+        self._clients.add(tuple(client))
+
+    def latency(self) -> float:
+        """Seconds for the next request."""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(self._rng.gauss(0, self._sigma)) / 1000
+
+    async def apply(self):
+        """Sleep for the sampled latency; return an error response or None."""
+        self.requests += 1
+        await asyncio.sleep(self.latency())
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            headers = {"Retry-After": self.retry_after} if self.error_status == 429 else {}
+            return JSONResponse({"error": {"code": "injected", "message": "Injected fault"}},
+                                status_code=self.error_status, headers=headers)
+        return None
+
+    def to_dict(self):
+        return {"median_ms": self.median_ms, "p99_ms": self.p99_ms, "error_rate": self.error_rate,
+                "error_status": self.error_status}
+
+
+class _ConnectionCounter:
+    """ASGI wrapper recording the client address of every HTTP request on profile."""
+
+    def __init__(self, app, profile: FaultProfile):
+        self.app = app
+        self.profile = profile
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope.get("client"):
+            self.profile.record_client(scope["client"])
+        await self.app(scope, receive, send)
+
+
+def _completion(content: str) -> dict:
+    return {
+        "id": "chatcmpl-offline",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-4",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 60, "total_tokens": 160}
+    }
+
+
+def _chunk(content: str = None, finish_reason: str = None) -> str:
+    delta = {"content": content} if content is not None else {}
+    payload = {
+        "id": "chatcmpl-offline",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "gpt-4",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def _token_stream(text: str, token_ms: float):
+    async def events():
+        for i, word in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(token_ms / 1000)
+            yield _chunk(word if i == 0 else " " + word)
+        yield _chunk(finish_reason="stop")
+        yield "data: [DONE]\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def fake_openai_app(profile: FaultProfile, token_ms: float = 10, embedding_dim: int = 64):
+    """Azure OpenAI: /openai/deployments/{deployment}/chat/completions and /embeddings."""
+
+    async def chat(request: Request):
+        payload = await request.json()
+        error = await profile.apply()
+        if error is not None:
+            return error
+        system = " ".join(m.get("content", "") for m in payload.get("messages", []) if m.get("role") == "system")
+        if "classification agent" in system:
+            content = json.dumps({"intent": "deadline_inquiry", "confidence": 0.9, "reasoning": "Asks about a deadline"})
+        else:
+            content = ANSWER
+        if payload.get("stream"):
+            return _token_stream(content, token_ms)
+        return JSONResponse(_completion(content))
+
+    async def embeddings(request: Request):
+        payload = await request.json()
+        error = await profile.apply()
+        if error is not None:
+            return error
+        inputs = payload.get("input")
+        inputs = [inputs] if isinstance(inputs, str) else list(inputs or [])
+        data = []
+        for i, text in enumerate(inputs):
+            rng = random.Random(zlib.crc32(str(text).encode("utf-8")))
+            data.append({"object": "embedding", "index": i, "embedding": [rng.uniform(-1, 1) for _ in range(embedding_dim)]})
+        return JSONResponse({"object": "list", "data": data, "model": "text-embedding-3-small",
+                             "usage": {"prompt_tokens": 8, "total_tokens": 8}})
+
+    async def root(request: Request):
+        return JSONResponse({"status": "ok"})
+
+    return _ConnectionCounter(Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", chat, methods=["POST"]),
+        Route("/openai/deployments/{deployment}/embeddings", embeddings, methods=["POST"]),
+        Route("/{path:path}", root, methods=["GET", "HEAD"]),
+    ]), profile)
+
+
+def fake_search_app(profile: FaultProfile, top_k: int = 5):
+    """
+    Azure Cognitive Search REST API: docs/search.post.search over the local
+    policy corpus, plus the index definition and statistics the retrieval
+    cache polls for its version.
+    """
+    documents = [
+        {"id": str(p.get("id")), "title": p.get("title", ""), "content": p.get("content", ""),
+         "source": p.get("source", ""), "category": p.get("category", "")}
+        for p in load_policies(POLICIES_PATH)
+    ]
+
+    async def search(request: Request):
+        payload = await request.json()
+        error = await profile.apply()
+        if error is not None:
+            return error
+        terms = set(str(payload.get("search", "")).lower().split())
+        ranked = sorted(documents, key=lambda d: -len(terms & set((d["title"] + " " + d["content"]).lower().split())))
+        top = int(payload.get("top") or top_k)
+        return JSONResponse({"value": [{"@search.score": 1.0 / (rank + 1), **doc} for rank, doc in enumerate(ranked[:top])]})
+
+    async def dispatch(request: Request):
+        path = request.url.path
+        if request.method == "POST" and path.endswith("/docs/search.post.search"):
+            return await search(request)
+        name = path.split("'")[1] if "'" in path else "immigration-policies"
+        if path.endswith("/search.stats"):
+            return JSONResponse({"documentCount": len(documents), "storageSize": 1024 * len(documents),
+                                 "vectorIndexSize": 0})
+        return JSONResponse({"name": name, "@odata.etag": "\"0x1\"", "fields": [
+            {"name": "id", "type": "Edm.String", "key": True},
+            {"name": "title", "type": "Edm.String", "searchable": True},
+            {"name": "content", "type": "Edm.String", "searchable": True},
+            {"name": "source", "type": "Edm.String"},
+            {"name": "category", "type": "Edm.String", "filterable": True},
+        ]})
+
+    return _ConnectionCounter(Starlette(routes=[Route("/{path:path}", dispatch, methods=["GET", "POST"])]), profile)
+
+
+def fake_foundry_app(profile: FaultProfile, token_ms: float = 10):
+    """Foundry agent: OpenAI-style JSON completion, or an event stream when asked for one."""
+
+    async def agent(request: Request):
+        payload = await request.json()
+        error = await profile.apply()
+        if error is not None:
+            return error
+        if payload.get("stream"):
+            return _token_stream(ANSWER, token_ms)
+        return JSONResponse(_completion(ANSWER))
+
+    return _ConnectionCounter(Starlette(routes=[Route("/agent", agent, methods=["POST"])]), profile)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(app, port: int) -> uvicorn.Server:
+    """Run app with uvicorn on a background thread and wait until it accepts requests."""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
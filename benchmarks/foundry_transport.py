@@ -0,0 +1,167 @@
+"""
+Foundry Transport Benchmark - Retries, Hedging and Circuit Breaker
+Runs call_foundry_agent_async against a local stand-in agent that injects
+latency and faults, and compares transport settings per scenario:
+
+    flaky         a share of requests fail with 503: no retries vs retries
+    rate_limited  a share of requests get 429 with Retry-After
+    tail_latency  a few requests are very slow: no hedging vs hedging
+    outage        every request fails: no breaker vs breaker
+
+Each row reports success rate, latency percentiles, error codes and how
+many requests reached the stand-in server.
+
+Usage:
+    python -m benchmarks.foundry_transport
+    python -m benchmarks.foundry_transport --calls 400 --concurrency 20
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from backend.services import foundry_agent
+from backend.services.foundry_agent import CircuitBreaker, LatencyWindow, FoundryAgentError
+from benchmarks.concurrency import percentile
+from benchmarks.fakes import free_port, serve
+
+
+class Faults:
+    """What the stand-in agent does to each request; changed between scenarios."""
+
+    def __init__(self):
+        self.set()
+
+    def set(self, latency_ms: float = 20, tail_rate: float = 0.0, tail_ms: float = 0,
+            error_rate: float = 0.0, error_status: int = 503, retry_after: str = None):
+        self.latency_ms = latency_ms
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.requests = 0
+
+
+def stand_in_agent(faults: Faults, seed: int = 0) -> Starlette:
+    rng = random.Random(seed)
+
+    async def agent(request: Request):
+        await request.json()
+        faults.requests += 1
+        delay = faults.tail_ms if rng.random() < faults.tail_rate else faults.latency_ms
+        await asyncio.sleep(delay / 1000)
+        if rng.random() < faults.error_rate:
+            headers = {"Retry-After": faults.retry_after} if faults.retry_after else {}
+            return JSONResponse({"error": "injected"}, status_code=faults.error_status, headers=headers)
+        return JSONResponse({"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    return Starlette(routes=[Route("/agent", agent, methods=["POST"])])
+
+
+def configure(max_attempts: int = 1, hedge: bool = False, breaker_failures: int = 10**9,
+              breaker_reset_seconds: float = 30):
+    """Fresh transport state with the given settings."""
+    foundry_agent.AGENT_MAX_ATTEMPTS = max_attempts
+    foundry_agent.AGENT_HEDGE = hedge
+    foundry_agent.AGENT_HEDGE_MIN_SECONDS = 0.05
+    foundry_agent.AGENT_BACKOFF_BASE_SECONDS = 0.05
+    foundry_agent.AGENT_BACKOFF_MAX_SECONDS = 0.5
+    foundry_agent._breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+    foundry_agent._latencies = LatencyWindow()
+    for key in foundry_agent._counters:
+        foundry_agent._counters[key] = 0
+
+
+async def _drive(calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], Counter()
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await foundry_agent.call_foundry_agent_async([{"role": "user", "content": "When is the OPT deadline?"}])
+                errors["ok"] += 1
+            except FoundryAgentError as e:
+                errors[e.code] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        await asyncio.gather(*(one() for _ in range(calls)))
+    finally:
+        await foundry_agent.close_foundry_client()
+    return latencies, errors
+
+
+def run_scenario(name: str, variant: str, faults: Faults, calls: int, concurrency: int) -> dict:
+    latencies, outcomes = asyncio.run(_drive(calls, concurrency))
+    stats = foundry_agent.transport_stats()
+    return {
+        "scenario": name,
+        "variant": variant,
+        "success_rate": round(outcomes.pop("ok", 0) / calls, 3),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "errors": dict(outcomes),
+        "upstream_requests": faults.requests,
+        "retries": stats["retries"],
+        "hedges": stats["hedges"],
+        "breaker_opened": stats["breaker_opened"]
+    }
+
+
+def run(calls: int, concurrency: int) -> list:
+    faults = Faults()
+    port = free_port()
+    serve(stand_in_agent(faults), port)
+    foundry_agent.AGENT_ENDPOINT = f"http://127.0.0.1:{port}/agent"
+    foundry_agent.AGENT_API_KEY = "benchmark"
+
+    scenarios = [
+        ("flaky", dict(error_rate=0.2), [
+            ("no_retries", dict(max_attempts=1)),
+            ("retries", dict(max_attempts=3)),
+        ]),
+        ("rate_limited", dict(error_rate=0.3, error_status=429, retry_after="0.2"), [
+            ("no_retries", dict(max_attempts=1)),
+            ("retries", dict(max_attempts=3)),
+        ]),
+        ("tail_latency", dict(latency_ms=30, tail_rate=0.05, tail_ms=1000), [
+            ("no_hedging", dict()),
+            ("hedging", dict(hedge=True)),
+        ]),
+        ("outage", dict(error_rate=1.0, latency_ms=200), [
+            ("no_breaker", dict(max_attempts=3)),
+            ("breaker", dict(max_attempts=3, breaker_failures=5)),
+        ]),
+    ]
+
+    rows = []
+    for name, fault_settings, variants in scenarios:
+        for variant, settings in variants:
+            faults.set(**fault_settings)
+            configure(**settings)
+            rows.append(run_scenario(name, variant, faults, calls, concurrency))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    for row in run(args.calls, args.concurrency):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
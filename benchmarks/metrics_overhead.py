@@ -0,0 +1,57 @@
+"""
+Metrics Overhead Benchmark - Cost of a Span
+Times an empty `with span(...)` block with metrics enabled, enabled while
+a request trace is active, and disabled, next to a bare loop.
+
+Usage:
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --iterations 1000000
+"""
+import json
+import time
+import argparse
+
+from backend.services import metrics
+
+
+def per_call_ns(iterations: int, body) -> float:
+    start = time.perf_counter()
+    body(iterations)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def spans(iterations: int):
+    span = metrics.span
+    for _ in range(iterations):
+        with span("upstream_call", service="openai", operation="classify"):
+            pass
+
+
+def bare(iterations: int):
+    for _ in range(iterations):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = [{"mode": "bare_loop", "ns_per_call": per_call_ns(args.iterations, bare)}]
+
+    metrics.METRICS_ENABLED = True
+    rows.append({"mode": "enabled", "ns_per_call": per_call_ns(args.iterations, spans)})
+
+    trace = metrics.trace_request()
+    rows.append({"mode": "enabled_with_trace", "ns_per_call": per_call_ns(args.iterations, spans)})
+    metrics.request_timings(trace)
+
+    metrics.METRICS_ENABLED = False
+    rows.append({"mode": "disabled", "ns_per_call": per_call_ns(args.iterations, spans)})
+
+    for row in rows:
+        print(json.dumps({**row, "ns_per_call": round(row["ns_per_call"], 1)}))
+
+
+if __name__ == "__main__":
+    main()
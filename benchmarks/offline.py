@@ -0,0 +1,211 @@
+"""
+Offline Benchmark - /process and /api/upload Against Local Azure Stand-ins
+Starts fake Azure OpenAI, Azure Cognitive Search and Foundry agent servers
+(see benchmarks.fakes) with the given latency distributions and error
+rates, points the backend at them, serves the app with uvicorn and drives
+/process and /api/upload with closed-loop workers at fixed concurrency
+levels. Reports throughput, p50/p95/p99 latency and errors by status per
+endpoint and concurrency, plus how many requests and new connections each fake served. A run
+in which a fake the endpoint should reach served nothing (the backend fell
+back to a local path, e.g. a missing async client dependency) is flagged
+with "warnings" and exits non-zero, so it cannot pass as a clean measurement.
+
+Fault profiles are "median_ms,p99_ms,error_rate". --mode pipeline runs the
+full classify/search/explain pipeline instead of the Foundry agent demo
+path. Questions get a unique suffix so caches and single-flight do not
+hide upstream latency; pass --repeat-questions to measure them instead.
+
+Usage:
+    python -m benchmarks.offline
+    python -m benchmarks.offline --mode pipeline --concurrency 1 8 32 --requests 200
+    python -m benchmarks.offline --openai 300,1200,0.01 --foundry 800,3000,0.01 --output offline.json
+    python -m benchmarks.offline --compare offline.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.fakes import (FaultProfile, fake_openai_app, fake_search_app, fake_foundry_app,
+                              free_port, serve)
+from benchmarks.results import latency_summary, write_results, compare_results
+
+QUESTIONS = [
+    "When is the OPT application deadline after my program end date?",
+    "Can I travel outside the US while my OPT is pending?",
+    "How many credit hours do I need to keep F-1 status?",
+    "What documents does the DSO need for a travel signature?",
+    "How do I report a new employer during OPT?",
+    "Can I work on campus during the summer break?",
+]
+
+# Fakes each endpoint must reach in each mode; zero requests to one means the run measured a fallback
+EXPECTED_UPSTREAMS = {
+    ("process", "demo"): ("foundry",),
+    ("process", "pipeline"): ("openai", "search"),
+}
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def start_fakes(args) -> Dict[str, FaultProfile]:
+    """Serve the fakes and point the backend's settings at them; call before importing backend.main."""
+    profiles = {
+        "openai": FaultProfile.parse(args.openai, seed=1),
+        "search": FaultProfile.parse(args.search, seed=2),
+        "foundry": FaultProfile.parse(args.foundry, seed=3),
+    }
+    apps = {
+        "openai": fake_openai_app(profiles["openai"], token_ms=args.token_ms),
+        "search": fake_search_app(profiles["search"]),
+        "foundry": fake_foundry_app(profiles["foundry"], token_ms=args.token_ms),
+    }
+    urls = {}
+    for name, app in apps.items():
+        port = free_port()
+        serve(app, port)
+        urls[name] = f"http://127.0.0.1:{port}"
+
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": urls["openai"],
+        "AZURE_OPENAI_KEY": "offline",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4",
+        "SEARCH_ENDPOINT": urls["search"],
+        "SEARCH_API_KEY": "offline",
+        "FOUNDRY_AGENT_ENDPOINT": f"{urls['foundry']}/agent",
+        "FOUNDRY_AGENT_API_KEY": "offline",
+    })
+    return profiles
+
+
+def start_backend(mode: str) -> str:
+    import backend.main
+    backend.main.DEMO_MODE = mode == "demo"
+    port = free_port()
+    serve(backend.main.app, port)
+    return f"http://127.0.0.1:{port}"
+
+
+def process_request(repeat_questions: bool) -> Callable[[int], Dict]:
+    def build(n: int) -> Dict:
+        question = QUESTIONS[n % len(QUESTIONS)]
+        if not repeat_questions:
+            question = f"{question} (request {n})"
+        return {"data": {"text": question}}
+    return build
+
+
+def upload_request(pages: int) -> Callable[[int], Dict]:
+    from benchmarks.extraction import make_docx, page_lines
+
+    def build(n: int) -> Dict:
+        # The extraction cache is keyed by content, so every upload is generated from its own seed
+        if n % 2:
+            body = "\n".join(line for page in range(pages) for line in page_lines(page, seed=n))
+            return {"files": [("files", (f"notes_{n}.txt", body.encode("utf-8"), "text/plain"))]}
+        return {"files": [("files", (f"form_{n}.docx", make_docx(pages, seed=n), DOCX_TYPE))]}
+    return build
+
+
+async def drive(base_url: str, path: str, build: Callable[[int], Dict], requests: int,
+                concurrency: int, offset: int) -> Tuple[List[float], Counter, float]:
+    """Closed loop: `concurrency` workers each send their next request as soon as the last one returns."""
+    latencies, statuses = [], Counter()
+    next_request = iter(range(offset, offset + requests))
+
+    async def worker(client: httpx.AsyncClient):
+        for n in next_request:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, **build(n))
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def run(args) -> List[Dict]:
+    profiles = start_fakes(args)
+    base_url = start_backend(args.mode)
+    endpoints = {
+        "process": ("/process", process_request(args.repeat_questions)),
+        "upload": ("/api/upload", upload_request(args.upload_pages)),
+    }
+
+    rows, offset = [], 0
+    for endpoint in args.endpoints:
+        path, build = endpoints[endpoint]
+        for concurrency in args.concurrency:
+            before = {name: (p.requests, p.errors, p.connections) for name, p in profiles.items()}
+            latencies, statuses, elapsed = asyncio.run(drive(base_url, path, build, args.requests, concurrency, offset))
+            offset += args.requests
+            ok = statuses.pop(200, 0)
+            upstream = {name: {"requests": p.requests - before[name][0], "errors": p.errors - before[name][1],
+                               "new_connections": p.connections - before[name][2]}
+                        for name, p in profiles.items()}
+            warnings = [f"{name} fake served no requests" for name in EXPECTED_UPSTREAMS.get((endpoint, args.mode), ())
+                        if upstream[name]["requests"] == 0]
+            rows.append({
+                "endpoint": endpoint,
+                "mode": args.mode,
+                "concurrency": concurrency,
+                "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+                **latency_summary(latencies),
+                "success_rate": round(ok / len(latencies), 3) if latencies else 0.0,
+                "errors": {str(status): count for status, count in statuses.items()},
+                "upstream": upstream,
+                "warnings": warnings
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["demo", "pipeline"], default="demo")
+    parser.add_argument("--endpoints", nargs="+", choices=["process", "upload"], default=["process", "upload"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--openai", default="300,1200,0.01", help="Azure OpenAI fault profile")
+    parser.add_argument("--search", default="40,150,0", help="Azure Cognitive Search fault profile")
+    parser.add_argument("--foundry", default="800,3000,0.01", help="Foundry agent fault profile")
+    parser.add_argument("--token-ms", type=float, default=10, help="Delay between streamed tokens")
+    parser.add_argument("--upload-pages", type=int, default=2)
+    parser.add_argument("--repeat-questions", action="store_true",
+                        help="Reuse the question pool verbatim so caches and single-flight apply")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args()
+
+    rows = run(args)
+    for row in rows:
+        print(json.dumps(row))
+    if args.output:
+        write_results(args.output, "offline", rows, vars(args))
+    if args.compare:
+        for entry in compare_results(args.compare, rows, ("endpoint", "mode", "concurrency"),
+                                     ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")):
+            print(json.dumps({"compare": entry}))
+    warnings = [(row, warning) for row in rows for warning in row["warnings"]]
+    for row, warning in warnings:
+        print(f"warning: {row['endpoint']} ({row['mode']}, concurrency {row['concurrency']}): {warning}; "
+              f"check the backend log for upstream failures", file=sys.stderr)
+    if warnings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
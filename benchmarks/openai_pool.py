@@ -0,0 +1,128 @@
+"""
+OpenAI Connection Pool Benchmark - Client Reuse Against a Local Stand-in
+Serves the fake Azure OpenAI app (see benchmarks.fakes), which counts
+distinct client connections, points the shared client registry at it and
+checks that:
+
+- warm-up opens exactly one connection;
+- sequential classifier and explainer calls after warm-up reuse it;
+- concurrent calls open at most one connection per concurrent caller, and
+  a second concurrent round opens none.
+
+Reports requests, new connections and mean latency per phase, and exits
+non-zero when a check fails. Queries are unique so the classification
+cache never answers instead of the endpoint.
+
+Usage:
+    python -m benchmarks.openai_pool
+    python -m benchmarks.openai_pool --calls 20 --concurrency 8 --latency 20
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks.fakes import FaultProfile, fake_openai_app, free_port, serve
+
+DOCUMENTS = [{"title": "OPT Timeline", "content": "File Form I-765 within 60 days of the program end date.",
+              "source": "uscis.gov"}]
+
+
+def start_fake(latency_ms: float) -> FaultProfile:
+    """Serve the fake and point the backend at it; call before importing backend modules."""
+    profile = FaultProfile(latency_ms)
+    port = free_port()
+    serve(fake_openai_app(profile), port)
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": f"http://127.0.0.1:{port}",
+        "AZURE_OPENAI_KEY": "offline",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4",
+    })
+    return profile
+
+
+def calls() -> Dict[str, Callable[[int], object]]:
+    from backend.agents.classifier import classify_intent_with_llm
+    from backend.agents.explainer import explain_steps
+
+    return {
+        "classify": lambda n: classify_intent_with_llm(f"When is my OPT deadline? (call {n})"),
+        "explain": lambda n: explain_steps("deadline_inquiry", DOCUMENTS, {"status": "ok", "call": n},
+                                           {"should_escalate": False}),
+    }
+
+
+def phase(profile: FaultProfile, name: str, run: Callable[[], List[float]]) -> Dict:
+    requests, connections = profile.requests, profile.connections
+    latencies = run()
+    return {
+        "phase": name,
+        "requests": profile.requests - requests,
+        "new_connections": profile.connections - connections,
+        "total_connections": profile.connections,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+    }
+
+
+def timed(call: Callable[[int], object], n: int) -> float:
+    start = time.perf_counter()
+    call(n)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(args) -> List[Dict]:
+    profile = start_fake(args.latency)
+    from backend.services.openai_service import warm_up_openai_client
+
+    funcs = calls()
+    rows = []
+
+    def warm_up():
+        start = time.perf_counter()
+        if not warm_up_openai_client():
+            raise SystemExit("Warm-up could not reach the fake Azure OpenAI endpoint")
+        return [(time.perf_counter() - start) * 1000]
+
+    row = phase(profile, "warm_up", warm_up)
+    row["ok"] = row["new_connections"] == 1
+    rows.append(row)
+
+    for name, call in funcs.items():
+        row = phase(profile, f"sequential_{name}", lambda: [timed(call, n) for n in range(args.calls)])
+        row["ok"] = row["requests"] == args.calls and row["new_connections"] == 0
+        rows.append(row)
+
+    def concurrent():
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            jobs = [pool.submit(timed, funcs[name], n) for n in range(args.calls) for name in funcs]
+            return [job.result() for job in jobs]
+
+    offset = len(rows)
+    for round_number in (1, 2):
+        row = phase(profile, f"concurrent_round_{round_number}", concurrent)
+        rows.append(row)
+    first, second = rows[offset], rows[offset + 1]
+    # Warm-up's connection counts towards the pool the first round may grow to
+    first["ok"] = first["new_connections"] <= args.concurrency - 1
+    second["ok"] = second["new_connections"] == 0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10, help="Calls per agent and phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=10, help="Fake endpoint latency in ms")
+    args = parser.parse_args()
+
+    rows = run(args)
+    for row in rows:
+        print(json.dumps(row))
+    if not all(row["ok"] for row in rows):
+        raise SystemExit("Azure OpenAI calls did not reuse pooled connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark Results - Machine-Readable Output and Run Comparison
+Writes benchmark rows to a JSON file together with the run's environment
+(git commit, Python, platform, settings), and compares two such files row
+by row so regressions show up as percentage changes.
+"""
+import json
+import time
+import platform
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from benchmarks.concurrency import percentile
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99 of latencies in ms."""
+    return {
+        "count": len(latencies_ms),
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(path: str, suite: str, rows: List[Dict[str, Any]], config: Dict[str, Any]):
+    """Write rows plus run metadata to path as JSON."""
+    document = {
+        "suite": suite,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": rows
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def compare_results(baseline_path: str, rows: List[Dict[str, Any]], key_fields: Iterable[str],
+                    metric_fields: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Match rows to the baseline file's rows by key_fields and report each
+    metric's baseline value, current value and change in percent.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    key_fields, metric_fields = list(key_fields), list(metric_fields)
+
+    def key(row):
+        return tuple(row.get(k) for k in key_fields)
+
+    previous = {key(row): row for row in baseline.get("results", [])}
+    comparison = []
+    for row in rows:
+        old = previous.get(key(row))
+        if old is None:
+            continue
+        entry = {k: row.get(k) for k in key_fields}
+        for metric in metric_fields:
+            before, after = old.get(metric), row.get(metric)
+            if not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+                continue
+            change = round((after - before) / before * 100, 1) if before else None
+            entry[metric] = {"baseline": before, "current": after, "change_pct": change}
+        comparison.append(entry)
+    return comparison
@@ -0,0 +1,116 @@
+"""
+Runbook Benchmark - Rule Evaluation Cost
+Compiles synthetic runbooks of growing size (rules spread over many intents,
+with confidence, escalation and priority triggers like data/runbook.jsonlines)
+and reports evaluation time per context and per rule actually visited.
+
+Before timing, checks that contexts built the way the /process pipeline
+builds them (classifier result, check_escalation decision) trigger the
+confidence rule R001 and the escalation rule R004 of the shipped runbook.
+
+Usage:
+    python -m benchmarks.runbook
+    python -m benchmarks.runbook --check-only
+    python -m benchmarks.runbook --rules 10 100 500 1000 --intents 20
+"""
+import json
+import time
+import random
+import argparse
+
+from backend.agents.escalation import check_escalation
+from backend.services.runbook_evaluator import Rule, Runbook, RUNBOOK_PATH, build_rule_context
+
+
+def make_rules(count: int, intents: int, seed: int = 0):
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        trigger = {}
+        if rng.random() < 0.9:
+            trigger["intent"] = f"intent_{rng.randrange(intents)}"
+        if rng.random() < 0.5:
+            trigger["confidence_min"] = round(rng.uniform(0.5, 0.95), 2)
+        if rng.random() < 0.3:
+            trigger["escalation"] = rng.random() < 0.5
+            trigger["priority"] = rng.choice(["low", "medium", "high"])
+        rules.append(Rule({"rule_id": f"S{i:04d}", "name": f"Synthetic rule {i}", "trigger": trigger,
+                           "action": f"action_{i}", "priority": rng.choice(["low", "medium", "high"])}))
+    return rules
+
+
+def make_contexts(count: int, intents: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [{
+        "intent": f"intent_{rng.randrange(intents)}",
+        "confidence": rng.random(),
+        "escalation": rng.random() < 0.2,
+        "priority": rng.choice(["low", "medium", "high"]),
+        "docs": []
+    } for _ in range(count)]
+
+
+def run(rule_counts, intents: int, contexts: int):
+    samples = make_contexts(contexts, intents)
+    report = []
+    for count in rule_counts:
+        runbook = Runbook(make_rules(count, intents))
+        visited = sum(len(runbook.by_intent.get(c["intent"], runbook.wildcard)) for c in samples)
+        start = time.perf_counter()
+        results = [runbook.evaluate(c) for c in samples]
+        elapsed = time.perf_counter() - start
+        report.append({
+            "rules": count,
+            "intents": intents,
+            "contexts": contexts,
+            "avg_rules_visited": round(visited / contexts, 1),
+            "avg_rules_triggered": round(sum(r["rule_count"] for r in results) / contexts, 2),
+            "us_per_context": round(elapsed / contexts * 1e6, 2),
+            "ns_per_visited_rule": round(elapsed / max(visited, 1) * 1e9, 1)
+        })
+    return report
+
+
+# (classification, retrieved docs, rule id that must trigger)
+PIPELINE_CASES = [
+    ({"intent": "eligibility_question", "confidence": 0.9},
+     [{"id": "1", "content": "Students on F-1 status are eligible for OPT after one academic year."}], "R001"),
+    # Low confidence, high-risk intent and no documents: escalated with high priority
+    ({"intent": "escalation_needed", "confidence": 0.4}, [], "R004"),
+]
+
+
+def check_pipeline_rules(path: str = RUNBOOK_PATH) -> list:
+    """Evaluate pipeline-built contexts against the runbook file; one row per expected rule."""
+    runbook = Runbook.load(path)
+    rows = []
+    for classification, docs, rule_id in PIPELINE_CASES:
+        escalation = check_escalation(classification["intent"], docs, confidence=classification["confidence"])
+        result = runbook.evaluate(build_rule_context(classification, docs, escalation))
+        triggered = [rule["rule_id"] for rule in result["triggered_rules"]]
+        rows.append({"check": "pipeline_context", "intent": classification["intent"], "expected": rule_id,
+                     "triggered": triggered, "ok": rule_id in triggered})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--intents", type=int, default=20)
+    parser.add_argument("--contexts", type=int, default=20000)
+    parser.add_argument("--check-only", action="store_true", help="Only run the pipeline context check")
+    args = parser.parse_args()
+
+    checks = check_pipeline_rules()
+    for row in checks:
+        print(json.dumps(row))
+    if not all(row["ok"] for row in checks):
+        raise SystemExit("Pipeline-built contexts do not trigger the expected runbook rules")
+    if args.check_only:
+        return
+    for row in run(args.rules, args.intents, args.contexts):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
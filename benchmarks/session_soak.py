@@ -0,0 +1,81 @@
+"""
+Session Soak - Memory Over a Simulated Day
+Drives a SessionStore with synthetic chat traffic over a simulated clock
+(24 hours by default, in seconds of simulated time) and prints, once per
+simulated hour, the store's own size accounting next to the Python heap
+size measured with tracemalloc. Both should level off instead of growing.
+
+Usage:
+    python -m benchmarks.session_soak
+    python -m benchmarks.session_soak --hours 24 --requests-per-second 20 --max-mb 16
+"""
+import json
+import random
+import argparse
+import tracemalloc
+
+from backend.services.session_store import SessionStore
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(hours: float, requests_per_second: float, max_mb: float, ttl_seconds: float, seed: int = 0):
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    store = SessionStore(max_bytes=int(max_mb * 2**20), ttl_seconds=ttl_seconds, clock=clock)
+    active = []  # recently used session ids that may come back
+
+    tracemalloc.start()
+    step = 1.0 / requests_per_second
+    next_report = 3600.0
+    report = []
+    while clock.now < hours * 3600:
+        clock.now += step
+        # 70% of requests continue a recent conversation, the rest start one
+        if active and rng.random() < 0.7:
+            session_id = rng.choice(active)
+        else:
+            session_id = store.create_session()
+            active.append(session_id)
+            if len(active) > 500:
+                active.pop(0)
+        store.append_message(session_id, "user", "q" * rng.randint(20, 400))
+        store.append_message(session_id, "assistant", "a" * rng.randint(200, 3000))
+        store.get_session(session_id)
+
+        if clock.now >= next_report:
+            stats = store.stats()
+            current, peak = tracemalloc.get_traced_memory()
+            report.append({
+                "hour": round(clock.now / 3600),
+                "sessions": stats["sessions"],
+                "messages": stats["messages"],
+                "store_mb": round(stats["bytes"] / 2**20, 2),
+                "heap_mb": round(current / 2**20, 2),
+                "evictions": stats["evictions"],
+                "expirations": stats["expirations"]
+            })
+            next_report += 3600.0
+    tracemalloc.stop()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--requests-per-second", type=float, default=5)
+    parser.add_argument("--max-mb", type=float, default=16)
+    parser.add_argument("--ttl-seconds", type=float, default=6 * 3600)
+    args = parser.parse_args()
+    for row in run(args.hours, args.requests_per_second, args.max_mb, args.ttl_seconds):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
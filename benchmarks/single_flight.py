@@ -0,0 +1,93 @@
+"""
+Single-Flight Benchmark - Upstream Calls Under a Burst of Identical Queries
+Fires a burst of concurrent requests drawn from a few distinct questions,
+first against a simulated upstream call (fixed latency, counts executions)
+with coalescing off and on, then through the real pipeline stages
+(classification, retrieval, explanation). Reports calls made by requests
+and calls that actually reached the upstream side.
+
+Usage:
+    python -m benchmarks.single_flight
+    python -m benchmarks.single_flight --requests 500 --unique 5 --upstream-ms 300
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from backend.services.single_flight import SingleFlight, make_flight_key, upstream_flights
+
+QUESTIONS = [
+    "When is the OPT application deadline?",
+    "Can I work off campus on an F-1 visa?",
+    "My I-20 name does not match my passport",
+    "Do I need health insurance as an international student?",
+    "How many credits do I need to stay full time?",
+]
+
+
+def burst(requests: int, unique: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [QUESTIONS[rng.randrange(min(unique, len(QUESTIONS)))] for _ in range(requests)]
+
+
+async def simulated(queries, upstream_ms: float, coalesced: bool) -> dict:
+    flights = SingleFlight()
+    executions = 0
+
+    async def upstream(query: str):
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(upstream_ms / 1000)
+        return {"intent": "deadline_inquiry", "query": query}
+
+    async def one(query: str):
+        if not coalesced:
+            return await upstream(query)
+        return await flights.do(make_flight_key("upstream", query), lambda: upstream(query))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in queries))
+    return {
+        "stage": "simulated_upstream",
+        "coalesced": coalesced,
+        "requests": len(queries),
+        "upstream_calls": executions,
+        "wall_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
+
+async def pipeline(queries) -> list:
+    from backend.main import build_pipeline
+
+    start = time.perf_counter()
+    await asyncio.gather(*(build_pipeline(q).run() for q in queries))
+    wall_ms = round((time.perf_counter() - start) * 1000, 1)
+    rows = []
+    for name, counters in upstream_flights.stats()["calls"].items():
+        rows.append({
+            "stage": name,
+            "coalesced": True,
+            "requests": counters["calls"],
+            "upstream_calls": counters["executions"],
+            "wall_ms": wall_ms
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--unique", type=int, default=3)
+    parser.add_argument("--upstream-ms", type=float, default=200)
+    args = parser.parse_args()
+    queries = burst(args.requests, args.unique)
+    for coalesced in (False, True):
+        print(json.dumps(asyncio.run(simulated(queries, args.upstream_ms, coalesced))))
+    for row in asyncio.run(pipeline(queries)):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
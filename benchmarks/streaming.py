@@ -0,0 +1,116 @@
+"""
+Streaming Benchmark - Time to First Byte of /process vs /process/stream
+Starts a local fake Foundry agent that answers with an OpenAI-style event
+stream (or a plain JSON completion when streaming is not requested) after
+a configurable time-to-first-token, points the backend at it and serves the
+app with uvicorn. Each endpoint is timed from request start to the first
+body byte, the first token event and the end of the response.
+
+Usage:
+    python -m benchmarks.streaming
+    python -m benchmarks.streaming --first-token-ms 800 --token-ms 20 --tokens 300 --requests 5
+"""
+import os
+import json
+import time
+import logging
+import asyncio
+import argparse
+import statistics
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.fakes import free_port, serve
+
+WORDS = "Your OPT application must be filed within sixty days of your program end date ".split()
+
+
+def fake_agent_app(first_token_ms: float, token_ms: float, tokens: int) -> Starlette:
+    """Fake Foundry agent: first token after first_token_ms, then one word every token_ms."""
+    words = [WORDS[i % len(WORDS)] + " " for i in range(tokens)]
+
+    async def agent(request: Request):
+        payload = await request.json()
+        await asyncio.sleep(first_token_ms / 1000)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(token_ms * (tokens - 1) / 1000)
+            return JSONResponse({"choices": [{"message": {"role": "assistant", "content": "".join(words)}}]})
+
+        async def events():
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(token_ms / 1000)
+                yield f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/agent", agent, methods=["POST"])])
+
+
+def time_request(client: httpx.Client, url: str, text: str) -> dict:
+    """Milliseconds to the first body byte, the first token event and the end of the response."""
+    start = time.perf_counter()
+    first_byte = first_token = None
+    body = b""
+    with client.stream("POST", url, data={"text": text}) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            now = time.perf_counter()
+            if first_byte is None:
+                first_byte = now
+            body += chunk
+            if first_token is None and b"event: token" in body:
+                first_token = now
+    end = time.perf_counter()
+    # The buffered endpoint delivers its answer with the first byte
+    first_token = first_token or first_byte
+    return {
+        "first_byte_ms": (first_byte - start) * 1000,
+        "first_token_ms": (first_token - start) * 1000,
+        "total_ms": (end - start) * 1000
+    }
+
+
+def run(first_token_ms: float, token_ms: float, tokens: int, requests: int) -> list:
+    agent_port, app_port = free_port(), free_port()
+    serve(fake_agent_app(first_token_ms, token_ms, tokens), agent_port)
+
+    # The agent endpoint is read when the service module is imported
+    os.environ["FOUNDRY_AGENT_ENDPOINT"] = f"http://127.0.0.1:{agent_port}/agent"
+    os.environ["FOUNDRY_AGENT_API_KEY"] = "benchmark"
+    from backend.main import app
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    serve(app, app_port)
+
+    rows = []
+    with httpx.Client(base_url=f"http://127.0.0.1:{app_port}", timeout=60) as client:
+        for path in ("/process", "/process/stream"):
+            # Warm-up request (imports, client pools, index loading)
+            time_request(client, path, "When is the OPT deadline?")
+            samples = [time_request(client, path, "When is the OPT deadline?") for _ in range(requests)]
+            row = {"endpoint": path}
+            for key in ("first_byte_ms", "first_token_ms", "total_ms"):
+                row[key] = round(statistics.median(s[key] for s in samples), 1)
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token-ms", type=float, default=500)
+    parser.add_argument("--token-ms", type=float, default=15)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=3)
+    args = parser.parse_args()
+    for row in run(args.first_token_ms, args.token_ms, args.tokens, args.requests):
+        print(json.dumps({"first_token_upstream_ms": args.first_token_ms, **row}))
+
+
+if __name__ == "__main__":
+    main()
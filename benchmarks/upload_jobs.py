@@ -0,0 +1,134 @@
+"""
+Upload Job Benchmark - Batch Extraction Time by Worker Count
+Submits one multi-file job (20 files by default) to /api/upload/jobs at
+several job worker counts and polls it until every file is extracted.
+Reports the submit latency, the time until the job finished and files per
+second for each worker count, so scaling with UPLOAD_JOB_WORKERS shows up
+directly. Every file is generated from its own seed so the extraction
+cache does not serve later runs.
+
+The default 20 x 3 MB text job is larger than the interactive upload
+limit, so it also checks that job submissions get their own request limit
+(UPLOAD_JOB_MAX_REQUEST_BYTES).
+
+Usage:
+    python -m benchmarks.upload_jobs
+    python -m benchmarks.upload_jobs --workers 1 2 4 8 --format docx --pages 20
+    python -m benchmarks.upload_jobs --output upload_jobs.json
+    python -m benchmarks.upload_jobs --compare upload_jobs.json
+"""
+import json
+import time
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+from fastapi.testclient import TestClient
+
+import backend.main
+import backend.routes.uploads as uploads
+from backend.services.upload_jobs import UploadJobManager
+from benchmarks.extraction import make_docx, page_lines
+from benchmarks.results import write_results, compare_results
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def text_file(file_mb: float, seed: int) -> bytes:
+    """Synthetic policy text of about file_mb megabytes, unique to seed."""
+    size = int(file_mb * 1024 * 1024)
+    chunks, total, page = [], 0, 0
+    while total < size:
+        chunk = ("\n".join(page_lines(page, seed=seed)) + "\n").encode("utf-8")
+        chunks.append(chunk)
+        total += len(chunk)
+        page += 1
+    return b"".join(chunks)[:size]
+
+
+def job_files(args, run: int) -> List[Tuple[str, Tuple[str, bytes, str]]]:
+    files = []
+    for index in range(args.files):
+        seed = run * 10_000 + index
+        if args.format == "docx":
+            files.append(("files", (f"form_{seed}.docx", make_docx(args.pages, seed=seed), DOCX_TYPE)))
+        else:
+            files.append(("files", (f"notes_{seed}.txt", text_file(args.file_mb, seed), "text/plain")))
+    return files
+
+
+def run_job(client: TestClient, files: List, timeout: float) -> Dict:
+    """Submit one job and poll it to completion; times are in ms from the start of the upload."""
+    start = time.perf_counter()
+    response = client.post("/api/upload/jobs", files=files)
+    submitted = (time.perf_counter() - start) * 1000
+    if response.status_code != 202:
+        return {"status": response.status_code, "error": response.json().get("detail"), "submit_ms": round(submitted, 2)}
+
+    job_id = response.json()["job_id"]
+    deadline = time.perf_counter() + timeout
+    while True:
+        job = client.get(f"/api/upload/jobs/{job_id}").json()
+        if job["finished_at"] is not None or time.perf_counter() > deadline:
+            break
+        time.sleep(0.005)
+    finished = (time.perf_counter() - start) * 1000
+    return {
+        "status": job["status"],
+        "submit_ms": round(submitted, 2),
+        "finish_ms": round(finished, 2),
+        "extract_ms": round(finished - submitted, 2),
+        "failed_files": job["progress"]["failed"]
+    }
+
+
+def run(args) -> List[Dict]:
+    rows = []
+    with TestClient(backend.main.app) as client:
+        for run_index, workers in enumerate(args.workers):
+            files = job_files(args, run_index)
+            request_mb = sum(len(f[1][1]) for f in files) / (1024 * 1024)
+            # The route looks the manager up at call time, so each level gets its own pool
+            manager = UploadJobManager(process_file=uploads.process_upload, workers=workers)
+            uploads.upload_jobs = manager
+            try:
+                result = run_job(client, files, args.timeout)
+            finally:
+                client.portal.call(manager.shutdown)
+            row = {
+                "workers": workers,
+                "files": args.files,
+                "format": args.format,
+                "request_mb": round(request_mb, 2),
+                **result
+            }
+            if "extract_ms" in result:
+                row["files_per_s"] = round(args.files / (result["extract_ms"] / 1000), 2) if result["extract_ms"] else 0.0
+            rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--format", choices=["txt", "docx"], default="txt")
+    parser.add_argument("--file-mb", type=float, default=3, help="Size of each text file")
+    parser.add_argument("--pages", type=int, default=20, help="Pages per DOCX file")
+    parser.add_argument("--timeout", type=float, default=300, help="Seconds to wait for a job to finish")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args()
+
+    rows = run(args)
+    for row in rows:
+        print(json.dumps(row))
+    if args.output:
+        write_results(args.output, "upload_jobs", rows, vars(args))
+    if args.compare:
+        for entry in compare_results(args.compare, rows, ("workers", "files", "format"),
+                                     ("submit_ms", "finish_ms", "files_per_s")):
+            print(json.dumps({"compare": entry}))
+
+
+if __name__ == "__main__":
+    main()